@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1 import auth, customers, products, orders, users
+from app.api.v1 import auth, customers, products, orders, users, admin, routes, stats, reports
 
 api_router = APIRouter()
 
@@ -7,4 +7,8 @@ api_router.include_router(auth.router, prefix="/auth", tags=["Autenticação"])
 api_router.include_router(users.router, prefix="/users", tags=["Usuários"])
 api_router.include_router(customers.router, prefix="/customers", tags=["Clientes"])
 api_router.include_router(products.router, prefix="/products", tags=["Produtos"])
-api_router.include_router(orders.router, prefix="/orders", tags=["Pedidos"])
\ No newline at end of file
+api_router.include_router(orders.router, prefix="/orders", tags=["Pedidos"])
+api_router.include_router(routes.router, prefix="/routes", tags=["Rotas"])
+api_router.include_router(stats.router, prefix="/stats", tags=["Estatísticas"])
+api_router.include_router(reports.router, prefix="/reports", tags=["Relatórios"])
+api_router.include_router(admin.router, prefix="/admin", tags=["Administração"])
\ No newline at end of file
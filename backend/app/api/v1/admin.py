@@ -0,0 +1,110 @@
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from typing import List
+from app.core.config import settings
+from app.core.database import get_db, engine, async_engine, replica_router
+from app.core.security import get_current_admin_user
+from app.models.reminder import ReminderRun
+from app.models.user import User
+from app.schemas.reminder import ReminderRunResponse
+from app.services.whatsapp import whatsapp_service
+from app.utils.db_pool import pool_status
+from app.utils.scheduler import reminder_scheduler
+
+router = APIRouter()
+
+
+@router.get("/reminder-runs", response_model=List[ReminderRunResponse])
+def list_reminder_runs(
+    limit: int = 30,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Lista as execuções de lembretes mais recentes com seu progresso
+    """
+    return db.query(ReminderRun).order_by(ReminderRun.run_date.desc()).limit(limit).all()
+
+
+@router.get("/reminder-runs/{run_id}", response_model=ReminderRunResponse)
+def get_reminder_run(
+    run_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Busca execução de lembretes por ID
+    """
+    run = db.query(ReminderRun).filter(ReminderRun.id == run_id).first()
+    if not run:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Execução não encontrada"
+        )
+    return run
+
+
+@router.post("/reminder-runs", status_code=status.HTTP_202_ACCEPTED)
+def start_reminder_run(
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Inicia (ou retoma) a execução de lembretes do dia em segundo plano
+    """
+    background_tasks.add_task(reminder_scheduler.send_daily_reminders)
+    return {"detail": "Execução de lembretes iniciada"}
+
+
+@router.post("/consumption-learning", status_code=status.HTTP_202_ACCEPTED)
+def start_consumption_learning(
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Recalcula em segundo plano o padrão de consumo aprendido dos clientes
+    """
+    background_tasks.add_task(reminder_scheduler.learn_consumption_patterns)
+    return {"detail": "Aprendizado do padrão de consumo iniciado"}
+
+
+@router.post("/sales-rollup", status_code=status.HTTP_202_ACCEPTED)
+def start_sales_rollup(
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Soma em segundo plano à consolidação de vendas as entregas ainda não consolidadas
+    """
+    background_tasks.add_task(reminder_scheduler.catch_up_sales_rollup)
+    return {"detail": "Consolidação de vendas iniciada"}
+
+
+@router.get("/whatsapp/status")
+def get_whatsapp_status(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Retorna o estado do circuit breaker e os contadores de envio do WhatsApp
+    """
+    return whatsapp_service.stats()
+
+
+@router.get("/database/pool")
+def get_database_pool_status(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Estado dos pools de conexão deste worker (primário e réplicas) e tempo de espera por conexão
+    
+    `max_connections_per_worker` multiplicado pelo número de workers deve
+    ficar abaixo do max_connections do PostgreSQL.
+    """
+    return {
+        "pools": {
+            "sync": pool_status(engine),
+            "async": pool_status(async_engine.sync_engine)
+        },
+        "replicas": replica_router.status(),
+        "max_connections_per_worker": 2 * (settings.DATABASE_POOL_SIZE + settings.DATABASE_MAX_OVERFLOW)
+    }
@@ -1,11 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
-from typing import List
-from app.core.database import get_db
+from typing import List, Optional
+from app.core.database import get_db, get_read_db
 from app.core.security import get_current_user
 from app.models.customer import Customer
 from app.models.user import User
 from app.schemas.customer import CustomerCreate, CustomerUpdate, CustomerResponse
+from app.services.notifications import notification_service
+from app.utils.pagination import paginate, keyset_query, NEXT_CURSOR_HEADER
+from app.utils.streaming import wants_ndjson, ndjson_response
 
 router = APIRouter()
 
@@ -37,22 +40,36 @@ def create_customer(
 
 @router.get("/", response_model=List[CustomerResponse])
 def list_customers(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Lista todos os clientes
+    
+    A próxima página é obtida passando em `cursor` o valor do header X-Next-Cursor.
+    Com `Accept: application/x-ndjson` todos os clientes a partir do cursor
+    são enviados em streaming, um por linha.
     """
-    customers = db.query(Customer).offset(skip).limit(limit).all()
+    keys = [(Customer.id, False)]
+    if wants_ndjson(request):
+        return ndjson_response(db, keyset_query(db.query(Customer), keys, cursor), CustomerResponse)
+    
+    customers, next_cursor = paginate(db.query(Customer), keys, cursor, limit, offset=skip)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    
     return customers
 
 
 @router.get("/{customer_id}", response_model=CustomerResponse)
 def get_customer(
     customer_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -99,9 +116,17 @@ def update_customer(
                 detail="Telefone já cadastrado para outro cliente"
             )
     
+    # Padrão editado pelo operador prevalece sobre o aprendido
+    if "consumption_pattern_days" in update_data:
+        update_data.setdefault("consumption_pattern_manual", True)
+    
     for field, value in update_data.items():
         setattr(customer, field, value)
     
+    # Padrão de consumo alterado: recalcula o próximo lembrete
+    if "consumption_pattern_days" in update_data or "consumption_pattern_manual" in update_data:
+        notification_service.refresh_next_reminder(db, customer)
+    
     db.commit()
     db.refresh(customer)
     
@@ -1,42 +1,141 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from app.core.database import get_db
-from app.core.security import get_current_user
+import asyncio
+import json
+from datetime import date
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from typing import List, Literal, Optional
+from app.core.config import settings
+from app.core.database import get_db, get_read_db, get_async_db
+from app.core.security import get_current_user, get_current_user_for_stream, create_stream_token
 from app.models.order import Order
 from app.models.user import User
-from app.schemas.order import OrderCreate, OrderUpdate, OrderResponse
+from app.schemas.order import OrderCreate, OrderUpdate, OrderResponse, OrderBulkCreate, OrderBulkResponse
+from app.schemas.user import Token
 from app.services.orders import order_service
+from app.services.idempotency import idempotency_service
+from app.services.order_events import order_event_service
+from app.services.stats import stats_service
+from app.services.sales import sales_rollup_service
+from app.utils.order_event_broker import order_event_broker
+from app.utils.pagination import paginate, keyset_query, NEXT_CURSOR_HEADER
+from app.utils.streaming import (
+    wants_ndjson,
+    ndjson_response,
+    parquet_available,
+    iter_csv,
+    iter_parquet,
+    CSV_MEDIA_TYPE,
+    PARQUET_MEDIA_TYPE
+)
 
 router = APIRouter()
 
 
+def _etag(order: Order) -> str:
+    """
+    ETag do pedido, derivado da coluna de versão
+    """
+    return f'"{order.version}"'
+
+
+def _parse_if_match(if_match: Optional[str]) -> Optional[int]:
+    """
+    Extrai a versão esperada do header If-Match (None quando ausente ou "*")
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    
+    value = if_match.strip()
+    if value.startswith("W/"):
+        value = value[2:]
+    try:
+        return int(value.strip('"'))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Header If-Match inválido"
+        )
+
+
 @router.post("/", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
 async def create_order(
     order_data: OrderCreate,
-    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Cria um novo pedido e envia confirmação via WhatsApp
+    
+    Com o header Idempotency-Key, repetições da mesma requisição (ex.: após
+    timeout) devolvem a resposta original sem criar outro pedido.
     """
-    order = await order_service.create_order(db, order_data)
-    return order
+    def create(session: Session):
+        record = None
+        if idempotency_key:
+            record, replay = idempotency_service.begin(
+                session,
+                current_user.id,
+                idempotency_key,
+                idempotency_service.request_hash(order_data.model_dump(mode="json"))
+            )
+            if replay:
+                return replay
+        
+        # Serializa ainda dentro do run_sync, onde carregar os itens não bloqueia
+        return OrderResponse.model_validate(order_service.create_order(session, order_data, record))
+    
+    return await db.run_sync(create)
+
+
+@router.post("/bulk", response_model=OrderBulkResponse)
+async def create_orders_bulk(
+    bulk_data: OrderBulkCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Cria vários pedidos em uma única requisição
+    
+    Pedidos inválidos são reportados em `results` sem impedir os demais;
+    as confirmações via WhatsApp são enviadas em segundo plano.
+    """
+    def create(session: Session):
+        results = order_service.create_orders_bulk(session, bulk_data.orders)
+        created = sum(1 for result in results if result["success"])
+        
+        return OrderBulkResponse.model_validate({
+            "created": created,
+            "failed": len(results) - created,
+            "results": results
+        })
+    
+    return await db.run_sync(create)
 
 
 @router.get("/", response_model=List[OrderResponse])
 def list_orders(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     status_filter: str = None,
     customer_id: int = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Lista todos os pedidos com filtros opcionais
+    
+    A próxima página é obtida passando em `cursor` o valor do header
+    X-Next-Cursor; `skip` continua aceito, mas fica lento em páginas profundas.
+    Com `Accept: application/x-ndjson` todos os pedidos a partir do cursor
+    são enviados em streaming, um por linha (`limit` e `skip` são ignorados).
     """
-    query = db.query(Order)
+    query = db.query(Order).options(selectinload(Order.items))
     
     if status_filter:
         query = query.filter(Order.status == status_filter)
@@ -44,25 +143,168 @@ def list_orders(
     if customer_id:
         query = query.filter(Order.customer_id == customer_id)
     
-    orders = query.order_by(Order.created_at.desc()).offset(skip).limit(limit).all()
+    keys = [(Order.created_at, True), (Order.id, True)]
+    if wants_ndjson(request):
+        return ndjson_response(db, keyset_query(query, keys, cursor), OrderResponse)
+    
+    orders, next_cursor = paginate(query, keys, cursor, limit, offset=skip)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    
     return orders
 
 
+def _sse_message(message: dict) -> str:
+    """
+    Formata o evento no padrão Server-Sent Events
+    """
+    return f"id: {message['id']}\nevent: {message['event_type']}\ndata: {json.dumps(message['payload'])}\n\n"
+
+
+@router.get("/export")
+def export_orders(
+    format: Literal["csv", "parquet"] = "csv",
+    start: Optional[date] = Query(None, alias="from"),
+    end: Optional[date] = Query(None, alias="to"),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Exporta os pedidos criados no período (`from`/`to`, inclusive) com itens
+    e clientes, uma linha por item
+    
+    As linhas são lidas por um cursor do lado do servidor e escritas em blocos,
+    então a memória fica constante qualquer que seja o tamanho da exportação.
+    """
+    if start and end and end < start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Data final anterior à data inicial"
+        )
+    if format == "parquet" and not parquet_available():
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Exportação em Parquet requer o pacote pyarrow"
+        )
+    
+    query = order_service.export_query(start, end)
+    
+    def chunks():
+        # stream_results: cursor do lado do servidor no PostgreSQL
+        result = db.execute(query.execution_options(yield_per=settings.ORDER_EXPORT_CHUNK_SIZE))
+        try:
+            yield from result.partitions()
+        finally:
+            result.close()
+            db.close()
+    
+    if format == "parquet":
+        body, media_type = iter_parquet(query.selected_columns, chunks()), PARQUET_MEDIA_TYPE
+    else:
+        body, media_type = iter_csv(query.selected_columns.keys(), chunks()), CSV_MEDIA_TYPE
+    
+    filename = f"pedidos_{start or 'inicio'}_{end or 'hoje'}.{format}"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.post("/stream/token", response_model=Token)
+async def create_order_stream_token(current_user: User = Depends(get_current_user)):
+    """
+    Gera o token de curta duração para abrir o stream de pedidos
+    
+    O EventSource não envia headers: o token vai no parâmetro `access_token`
+    da URL do stream. Ele expira em STREAM_TOKEN_EXPIRE_SECONDS e não serve
+    para as demais rotas; gere um novo a cada (re)conexão.
+    """
+    return {"access_token": create_stream_token(current_user.id), "token_type": "bearer"}
+
+
+@router.get("/stream")
+async def stream_order_events(
+    request: Request,
+    status_filter: Optional[str] = None,
+    last_event_id: Optional[int] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_for_stream)
+):
+    """
+    Stream (Server-Sent Events) das alterações de pedidos em tempo real
+    
+    Eventos: order.created, order.updated, order.completed e order.deleted.
+    `status_filter` aceita vários status separados por vírgula. Ao reconectar,
+    o navegador envia o header Last-Event-ID e recebe os eventos perdidos.
+    """
+    statuses = {value.strip() for value in status_filter.split(",") if value.strip()} if status_filter else None
+    
+    async def generate():
+        subscription = await db.run_sync(order_event_broker.subscribe)
+        try:
+            yield "retry: 3000\n\n"
+            
+            # Retomada: eventos perdidos até o ponto em que a fila assume
+            last_sent = last_event_id
+            while last_sent is not None and last_sent < subscription.start_id:
+                messages = await db.run_sync(
+                    lambda session: [
+                        order_event_service.serialize(event)
+                        for event in order_event_service.fetch_after(session, last_sent, up_to=subscription.start_id)
+                    ]
+                )
+                for message in messages:
+                    last_sent = message["id"]
+                    if order_event_service.matches(message, statuses):
+                        yield _sse_message(message)
+                if len(messages) < settings.ORDER_EVENTS_CATCH_UP_LIMIT:
+                    break
+            await db.close()
+            
+            while not subscription.dropped:
+                if await request.is_disconnected():
+                    break
+                try:
+                    message = await asyncio.wait_for(
+                        subscription.queue.get(),
+                        timeout=settings.ORDER_EVENTS_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                
+                if order_event_service.matches(message, statuses):
+                    yield _sse_message(message)
+        finally:
+            order_event_broker.unsubscribe(subscription)
+            await db.close()
+    
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/{order_id}", response_model=OrderResponse)
 def get_order(
     order_id: int,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Busca pedido por ID
     """
-    order = db.query(Order).filter(Order.id == order_id).first()
+    order = db.query(Order).options(selectinload(Order.items)).filter(Order.id == order_id).first()
     if not order:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Pedido não encontrado"
         )
+    
+    response.headers["ETag"] = _etag(order)
     return order
 
 
@@ -70,52 +312,59 @@ def get_order(
 def update_order(
     order_id: int,
     order_data: OrderUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Atualiza status ou observações do pedido
-    """
-    order = db.query(Order).filter(Order.id == order_id).first()
-    if not order:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Pedido não encontrado"
-        )
     
-    update_data = order_data.model_dump(exclude_unset=True)
-    
-    for field, value in update_data.items():
-        setattr(order, field, value)
-    
-    db.commit()
-    db.refresh(order)
+    Envie em If-Match o ETag obtido na leitura: se o pedido mudou desde
+    então, a alteração é recusada com 409 em vez de sobrescrever a outra.
+    """
+    order = order_service.update_order(db, order_id, order_data, _parse_if_match(if_match))
     
+    response.headers["ETag"] = _etag(order)
     return order
 
 
 @router.post("/{order_id}/complete", response_model=OrderResponse)
 async def complete_order(
     order_id: int,
-    db: Session = Depends(get_db),
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Marca pedido como concluído e envia confirmação de entrega via WhatsApp
     """
-    order = await order_service.complete_order(db, order_id)
+    expected_version = _parse_if_match(if_match)
+    order = await db.run_sync(
+        lambda session: OrderResponse.model_validate(order_service.complete_order(session, order_id, expected_version))
+    )
+    
+    response.headers["ETag"] = _etag(order)
     return order
 
 
 @router.get("/customer/{customer_id}/history", response_model=List[OrderResponse])
 def get_customer_order_history(
     customer_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Retorna histórico de pedidos de um cliente
+    
+    Com `Accept: application/x-ndjson` o histórico é enviado em streaming,
+    um pedido por linha, sem carregar tudo em memória.
     """
+    if wants_ndjson(request):
+        return ndjson_response(db, order_service.customer_orders_query(db, customer_id), OrderResponse)
+    
     orders = order_service.get_customer_orders(db, customer_id)
     return orders
 
@@ -136,6 +385,9 @@ def delete_order(
             detail="Pedido não encontrado"
         )
     
+    order_event_service.record(db, "order.deleted", order, order.status)
+    stats_service.increment(db, stats_service.order_deleted_deltas(order))
+    sales_rollup_service.revert_delivery(db, order)
     db.delete(order)
     db.commit()
     
@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
-from typing import List
-from app.core.database import get_db
+from typing import List, Optional
+from app.core.database import get_db, get_read_db
 from app.core.security import get_current_user
 from app.models.product import Product
 from app.models.user import User
 from app.schemas.product import ProductCreate, ProductUpdate, ProductResponse
+from app.utils.pagination import paginate, keyset_query, NEXT_CURSOR_HEADER
+from app.utils.streaming import wants_ndjson, ndjson_response
 
 router = APIRouter()
 
@@ -29,15 +31,22 @@ def create_product(
 
 @router.get("/", response_model=List[ProductResponse])
 def list_products(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     product_type: str = None,
     is_active: bool = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Lista todos os produtos com filtros opcionais
+    
+    A próxima página é obtida passando em `cursor` o valor do header X-Next-Cursor.
+    Com `Accept: application/x-ndjson` todos os produtos a partir do cursor
+    são enviados em streaming, um por linha.
     """
     query = db.query(Product)
     
@@ -47,14 +56,21 @@ def list_products(
     if is_active is not None:
         query = query.filter(Product.is_active == is_active)
     
-    products = query.offset(skip).limit(limit).all()
+    keys = [(Product.id, False)]
+    if wants_ndjson(request):
+        return ndjson_response(db, keyset_query(query, keys, cursor), ProductResponse)
+    
+    products, next_cursor = paginate(query, keys, cursor, limit, offset=skip)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    
     return products
 
 
 @router.get("/{product_id}", response_model=ProductResponse)
 def get_product(
     product_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from datetime import date
+from typing import List, Literal, Optional
+from app.core.database import get_read_db
+from app.core.security import get_current_user
+from app.models.user import User
+from app.schemas.reports import DailySalesRow, SalesByTypeRow
+from app.services.sales import sales_rollup_service
+
+router = APIRouter()
+
+
+@router.get("/sales/daily", response_model=List[DailySalesRow])
+def get_daily_sales(
+    start: date,
+    end: date,
+    product_id: Optional[int] = None,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Vendas por dia e produto (pela data de entrega), lidas da consolidação diária
+    """
+    return sales_rollup_service.daily_report(db, start, end, product_id)
+
+
+@router.get("/sales/by-type", response_model=List[SalesByTypeRow])
+def get_sales_by_type(
+    start: date,
+    end: date,
+    granularity: Literal["day", "month"] = Query("day"),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Vendas por tipo de produto (gás x água), por dia ou por mês
+    """
+    return sales_rollup_service.report_by_type(db, start, end, granularity)
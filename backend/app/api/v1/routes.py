@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+from app.core.database import get_db
+from app.core.security import get_current_user
+from app.models.user import User
+from app.schemas.route import RoutePlanResponse
+from app.services.routes import route_planning_service
+
+router = APIRouter()
+
+
+@router.get("/plan", response_model=RoutePlanResponse)
+def plan_routes(
+    capacity: Optional[int] = Query(None, gt=0),
+    depot_latitude: Optional[float] = Query(None, ge=-90, le=90),
+    depot_longitude: Optional[float] = Query(None, ge=-180, le=180),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Agrupa os pedidos novos em cargas por veículo e define a ordem de entrega
+    
+    Sem parâmetros, usa a capacidade e o depósito das configurações.
+    """
+    return route_planning_service.plan_open_orders(db, capacity, depot_latitude, depot_longitude)
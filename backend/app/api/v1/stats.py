@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from app.core.database import get_db
+from app.core.security import get_current_user
+from app.models.user import User
+from app.schemas.stats import StatsSummary
+from app.services.stats import stats_service
+
+router = APIRouter()
+
+
+@router.get("/summary", response_model=StatsSummary)
+def get_stats_summary(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Resumo do dashboard: pedidos por status, pedidos e faturamento do dia
+    e produtos com estoque baixo
+    """
+    return stats_service.get_summary(db)
@@ -1,20 +1,52 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
     # Database
     DATABASE_URL: str
     
+    # Pool de conexões, por engine (cada worker abre uma engine síncrona e uma assíncrona)
+    DATABASE_POOL_SIZE: int = 5
+    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_TIMEOUT: float = 30.0
+    DATABASE_POOL_RECYCLE: int = 1800
+    DATABASE_POOL_PRE_PING: bool = True
+    
+    # Réplicas de leitura (URLs separadas por vírgula; vazio = leituras no primário)
+    DATABASE_REPLICA_URLS: str = ""
+    DATABASE_REPLICA_CHECK_SECONDS: float = 10.0
+    # Limite para abrir conexão com a réplica (réplica inacessível falha rápido)
+    DATABASE_REPLICA_CONNECT_TIMEOUT: int = 2
+    
     # JWT
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Token exclusivo do stream de pedidos (vai na URL do EventSource)
+    STREAM_TOKEN_EXPIRE_SECONDS: int = 60
     
     # WhatsApp
     WHATSAPP_API_URL: str
     WHATSAPP_API_TOKEN: str
     WHATSAPP_PHONE_NUMBER_ID: str
+    WHATSAPP_RATE_LIMIT_PER_SECOND: float = 20.0
+    WHATSAPP_RATE_LIMIT_BURST: int = 20
+    WHATSAPP_MAX_CONCURRENCY: int = 10
+    WHATSAPP_MAX_CONNECTIONS: int = 100
+    WHATSAPP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    WHATSAPP_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    WHATSAPP_HTTP2: bool = False
+    WHATSAPP_CONNECT_TIMEOUT: float = 5.0
+    WHATSAPP_READ_TIMEOUT: float = 15.0
+    WHATSAPP_WRITE_TIMEOUT: float = 10.0
+    WHATSAPP_POOL_TIMEOUT: float = 5.0
+    WHATSAPP_SEND_DEADLINE_SECONDS: float = 30.0
+    WHATSAPP_MAX_RETRIES: int = 3
+    WHATSAPP_RETRY_BASE_DELAY: float = 0.5
+    WHATSAPP_RETRY_MAX_DELAY: float = 10.0
+    WHATSAPP_BREAKER_FAILURE_THRESHOLD: int = 5
+    WHATSAPP_BREAKER_RECOVERY_SECONDS: float = 30.0
     
     # Application
     APP_NAME: str = "Delivery Management System"
@@ -25,6 +57,54 @@ class Settings(BaseSettings):
     SCHEDULER_ENABLED: bool = True
     REMINDER_CHECK_HOUR: int = 9
     REMINDER_CHECK_MINUTE: int = 0
+    REMINDER_BATCH_SIZE: int = 1000
+    # Lease curto, renovado por heartbeat durante a execução: se a instância
+    # cair, outra retoma a execução em poucos minutos
+    REMINDER_LOCK_LEASE_SECONDS: int = 120
+    REMINDER_RESUME_CHECK_MINUTES: int = 5
+    
+    # Aprendizado do padrão de consumo
+    CONSUMPTION_LEARNING_ENABLED: bool = True
+    CONSUMPTION_LEARNING_HOUR: int = 3
+    CONSUMPTION_LEARNING_MIN_INTERVALS: int = 3
+    CONSUMPTION_LEARNING_MAX_INTERVALS: int = 12
+    CONSUMPTION_LEARNING_CHUNK_SIZE: int = 50000
+    
+    # Outbox (envio assíncrono de notificações)
+    OUTBOX_ENABLED: bool = True
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 2.0
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_MAX_ATTEMPTS: int = 5
+    OUTBOX_RETRY_BASE_SECONDS: int = 30
+    # Prazo da reserva de um lote; deve cobrir o envio do lote inteiro
+    OUTBOX_CLAIM_TIMEOUT_SECONDS: int = 300
+    
+    # Planejamento de rotas (capacidade em unidades, ex.: botijões por veículo)
+    ROUTE_VEHICLE_CAPACITY: int = 20
+    DEPOT_LATITUDE: Optional[float] = None
+    DEPOT_LONGITUDE: Optional[float] = None
+    
+    # Stream de eventos de pedidos (SSE)
+    ORDER_EVENTS_POLL_INTERVAL_SECONDS: float = 1.0
+    ORDER_EVENTS_HEARTBEAT_SECONDS: float = 15.0
+    ORDER_EVENTS_RETENTION_HOURS: int = 24
+    ORDER_EVENTS_CATCH_UP_LIMIT: int = 1000
+    ORDER_EVENTS_GAP_GRACE_SECONDS: float = 5.0
+    
+    # Estatísticas do dashboard
+    STATS_RECONCILE_INTERVAL_MINUTES: int = 15
+    LOW_STOCK_THRESHOLD: int = 10
+    LOW_STOCK_LIMIT: int = 20
+    
+    # Consolidação diária de vendas
+    SALES_ROLLUP_CATCH_UP_MINUTES: int = 10
+    SALES_ROLLUP_BATCH_SIZE: int = 1000
+    
+    # Exportação de pedidos (linhas lidas do cursor por bloco)
+    ORDER_EXPORT_CHUNK_SIZE: int = 5000
+    
+    # Chaves de idempotência (header Idempotency-Key)
+    IDEMPOTENCY_KEY_TTL_HOURS: int = 24
     
     class Config:
         env_file = ".env"
@@ -33,6 +113,10 @@ class Settings(BaseSettings):
     @property
     def origins_list(self) -> List[str]:
         return [origin.strip() for origin in self.ALLOWED_ORIGINS.split(",")]
+    
+    @property
+    def replica_urls_list(self) -> List[str]:
+        return [url.strip() for url in self.DATABASE_REPLICA_URLS.split(",") if url.strip()]
 
 
 settings = Settings()
\ No newline at end of file
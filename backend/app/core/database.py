@@ -1,11 +1,85 @@
+from fastapi import Depends, Request
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from app.core.config import settings
+from app.core.replicas import ReplicaRouter
+from app.utils.db_pool import MeasuredAsyncQueuePool, MeasuredQueuePool
 
-engine = create_engine(settings.DATABASE_URL)
+# Drivers assíncronos usados para cada banco
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+# Header com que o cliente pede leitura no primário (logo após uma escrita sua)
+READ_PRIMARY_HEADER = "X-Read-Primary"
+
+
+def pool_options(url: str, poolclass) -> dict:
+    """
+    Opções do pool de conexões definidas nas configurações
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        # SQLite em memória usa o pool padrão de conexão única
+        return {}
+    
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.DATABASE_POOL_SIZE,
+        "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+        "pool_timeout": settings.DATABASE_POOL_TIMEOUT,
+        "pool_recycle": settings.DATABASE_POOL_RECYCLE,
+        "pool_pre_ping": settings.DATABASE_POOL_PRE_PING,
+    }
+
+
+def replica_connect_args(url: str) -> dict:
+    """
+    Timeout de conexão das réplicas, no parâmetro de cada driver
+    """
+    backend = make_url(url).get_backend_name()
+    if backend == "postgresql":
+        return {"connect_timeout": settings.DATABASE_REPLICA_CONNECT_TIMEOUT}
+    if backend == "sqlite":
+        return {"timeout": settings.DATABASE_REPLICA_CONNECT_TIMEOUT}
+    return {}
+
+
+engine = create_engine(settings.DATABASE_URL, **pool_options(settings.DATABASE_URL, MeasuredQueuePool))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+replica_router = ReplicaRouter(
+    [
+        create_engine(url, connect_args=replica_connect_args(url), **pool_options(url, MeasuredQueuePool))
+        for url in settings.replica_urls_list
+    ],
+    settings.DATABASE_REPLICA_CHECK_SECONDS
+)
+
+
+def async_database_url(url: str) -> str:
+    """
+    Converte a URL do banco para o driver assíncrono correspondente
+    (ex.: postgresql:// -> postgresql+asyncpg://)
+    """
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        return url
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+async_engine = create_async_engine(
+    async_database_url(settings.DATABASE_URL),
+    **pool_options(settings.DATABASE_URL, MeasuredAsyncQueuePool)
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False)
+
 Base = declarative_base()
 
 
@@ -17,4 +91,37 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db():
+    """
+    Dependency para obter sessão assíncrona do banco de dados (endpoints async)
+    
+    O código dos serviços, escrito para Session, roda com `await db.run_sync(...)`:
+    cada consulta libera o event loop enquanto espera o banco.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_read_db(request: Request, db: Session = Depends(get_db)):
+    """
+    Dependency para endpoints somente leitura: usa uma réplica, quando houver
+    
+    Fica no primário sem réplica saudável ou quando o cliente envia o header
+    X-Read-Primary, para ler o que acabou de gravar.
+    """
+    replica = None if request.headers.get(READ_PRIMARY_HEADER) else replica_router.pick()
+    if replica is None:
+        yield db
+        return
+    
+    read_db = SessionLocal(bind=replica)
+    try:
+        yield read_db
+    except OperationalError:
+        replica_router.mark_failed(replica)
+        raise
+    finally:
+        read_db.close()
@@ -0,0 +1,118 @@
+import itertools
+import logging
+import threading
+import time
+from typing import List, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from app.utils.db_pool import pool_status
+
+logger = logging.getLogger(__name__)
+
+
+class _Replica:
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        # Só entra no rodízio depois da primeira verificação
+        self.healthy = False
+        self.checked_at: Optional[float] = None
+
+
+class ReplicaRouter:
+    """
+    Escolhe a réplica de leitura de cada sessão: rodízio entre as réplicas
+    saudáveis
+    
+    A saúde (SELECT 1) é verificada a cada `check_interval` segundos por uma
+    thread em segundo plano; pick() só lê o último resultado, então uma réplica
+    inacessível nunca atrasa a requisição. Sem réplicas configuradas ou com
+    todas fora do ar, pick() retorna None e a leitura vai para o primário.
+    """
+    
+    def __init__(self, engines: List[Engine], check_interval: float):
+        self._replicas = [_Replica(engine) for engine in engines]
+        self._turns = itertools.count()
+        self.check_interval = check_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def _check(self, replica: _Replica) -> bool:
+        """
+        Verifica a réplica e atualiza o resultado usado por pick()
+        """
+        try:
+            with replica.engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+            if not replica.healthy:
+                logger.info(f"Réplica {replica.engine.url!r} no rodízio")
+            replica.healthy = True
+        except SQLAlchemyError as e:
+            if replica.healthy or replica.checked_at is None:
+                logger.warning(f"Réplica {replica.engine.url!r} fora do ar: {str(e)}")
+            replica.healthy = False
+        finally:
+            replica.checked_at = time.monotonic()
+        
+        return replica.healthy
+    
+    def check_all(self):
+        """
+        Verifica todas as réplicas (uma rodada da thread de verificação)
+        """
+        for replica in self._replicas:
+            self._check(replica)
+    
+    def _run(self):
+        while not self._stop.is_set():
+            self.check_all()
+            self._stop.wait(self.check_interval)
+    
+    def start(self):
+        """
+        Inicia a verificação periódica em segundo plano (sem réplicas, não faz nada)
+        """
+        if not self._replicas or self._thread is not None:
+            return
+        
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="replica-health", daemon=True)
+        self._thread.start()
+    
+    def pick(self) -> Optional[Engine]:
+        """
+        Próxima réplica saudável no rodízio (None quando não há)
+        """
+        count = len(self._replicas)
+        for _ in range(count):
+            replica = self._replicas[next(self._turns) % count]
+            if replica.healthy:
+                return replica.engine
+        return None
+    
+    def mark_failed(self, engine: Engine):
+        """
+        Tira a réplica do rodízio até a próxima verificação (ex.: erro de conexão na consulta)
+        """
+        for replica in self._replicas:
+            if replica.engine is engine:
+                replica.healthy = False
+                replica.checked_at = time.monotonic()
+    
+    def status(self) -> List[dict]:
+        return [
+            {
+                "url": repr(replica.engine.url),
+                "healthy": replica.healthy,
+                **pool_status(replica.engine)
+            }
+            for replica in self._replicas
+        ]
+    
+    def dispose(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        for replica in self._replicas:
+            replica.engine.dispose()
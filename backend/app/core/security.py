@@ -3,14 +3,19 @@ from typing import Optional
 import jwt
 from jwt.exceptions import DecodeError as JWTError
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.database import get_async_db
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
+oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login", auto_error=False)
+
+# Escopo do token aceito apenas pelo stream de pedidos
+STREAM_TOKEN_SCOPE = "stream"
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -36,11 +41,14 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-):
-    """Obtém usuário atual a partir do token"""
+async def _user_from_token(token: str, db: AsyncSession, scope: Optional[str] = None):
+    """
+    Valida o token e busca o usuário; o escopo do token deve ser exatamente `scope`
+    
+    A sessão é fechada logo após a consulta: a conexão volta ao pool em vez de
+    ficar presa numa transação até o fim da requisição (rotas síncronas usam
+    outra conexão, de get_db). O usuário é devolvido desanexado, já carregado.
+    """
     from app.models.user import User
     
     credentials_exception = HTTPException(
@@ -52,13 +60,58 @@ async def get_current_user(
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         user_id: str = payload.get("sub")
-        if user_id is None:
+        if user_id is None or payload.get("scope") != scope:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    user = await db.scalar(select(User).where(User.id == int(user_id)))
+    await db.close()
     if user is None:
         raise credentials_exception
     
-    return user
\ No newline at end of file
+    return user
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Obtém usuário atual a partir do token de sessão"""
+    return await _user_from_token(token, db)
+
+
+def create_stream_token(user_id: int) -> str:
+    """Cria token curto, válido só para o stream de pedidos"""
+    return create_access_token(
+        {"sub": str(user_id), "scope": STREAM_TOKEN_SCOPE},
+        timedelta(seconds=settings.STREAM_TOKEN_EXPIRE_SECONDS)
+    )
+
+
+async def get_current_user_for_stream(
+    token: Optional[str] = Depends(oauth2_scheme_optional),
+    access_token: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Obtém usuário atual do header ou, para EventSource (que não envia headers),
+    do parâmetro access_token
+    
+    Na URL só é aceito o token de stream (escopo "stream", validade curta):
+    o token de sessão não vai parar em logs de acesso nem no histórico.
+    """
+    if token:
+        return await _user_from_token(token, db)
+    return await _user_from_token(access_token or "", db, scope=STREAM_TOKEN_SCOPE)
+
+
+async def get_current_admin_user(current_user=Depends(get_current_user)):
+    """Garante que o usuário atual é administrador"""
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Acesso restrito a administradores"
+        )
+    
+    return current_user
@@ -3,9 +3,13 @@ from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import logging
 from app.core.config import settings
-from app.core.database import engine, Base
+from app.core.database import engine, async_engine, replica_router, Base
 from app.api.v1 import api_router
 from app.utils.scheduler import reminder_scheduler
+from app.utils.outbox_worker import outbox_worker
+from app.utils.order_event_broker import order_event_broker
+from app.services.whatsapp import whatsapp_service
+from app.utils.pagination import NEXT_CURSOR_HEADER
 
 # Configuração de logging
 logging.basicConfig(
@@ -27,14 +31,28 @@ async def lifespan(app: FastAPI):
     Base.metadata.create_all(bind=engine)
     logger.info("Tabelas do banco de dados verificadas/criadas")
     
+    # Verificação das réplicas de leitura em segundo plano
+    replica_router.start()
+    
+    # Abre o cliente HTTP compartilhado do WhatsApp
+    await whatsapp_service.startup()
+    
     # Inicia o agendador de lembretes
     reminder_scheduler.start()
     
+    # Inicia o envio das notificações do outbox
+    outbox_worker.start()
+    
     yield
     
     # Shutdown
     logger.info("Finalizando aplicação...")
+    await order_event_broker.shutdown()
+    await outbox_worker.shutdown()
     reminder_scheduler.shutdown()
+    await whatsapp_service.shutdown()
+    await async_engine.dispose()
+    replica_router.dispose()
 
 
 # Cria instância do FastAPI
@@ -52,6 +70,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
 # Inclui rotas da API v1
@@ -2,5 +2,12 @@ from app.models.user import User
 from app.models.customer import Customer
 from app.models.product import Product
 from app.models.order import Order, OrderItem
+from app.models.outbox import OutboxMessage
+from app.models.scheduler_lock import SchedulerLock
+from app.models.reminder import ReminderRun, ReminderSend
+from app.models.idempotency import IdempotencyKey
+from app.models.order_event import OrderEvent
+from app.models.stat_counter import StatCounter
+from app.models.sales import DailyProductSales
 
-__all__ = ["User", "Customer", "Product", "Order", "OrderItem"]
\ No newline at end of file
+__all__ = ["User", "Customer", "Product", "Order", "OrderItem", "OutboxMessage", "SchedulerLock", "ReminderRun", "ReminderSend", "IdempotencyKey", "OrderEvent", "StatCounter", "DailyProductSales"]
\ No newline at end of file
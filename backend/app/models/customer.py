@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy import Column, Integer, String, DateTime, Text, Float, Boolean, false
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -12,9 +12,22 @@ class Customer(Base):
     phone = Column(String, nullable=False, unique=True, index=True)
     address = Column(Text, nullable=False)
     
+    # Coordenadas do endereço (usadas no planejamento de rotas)
+    latitude = Column(Float)
+    longitude = Column(Float)
+    
     # Padrão de consumo (em dias)
     consumption_pattern_days = Column(Integer, default=30)
     
+    # Intervalo real aprendido do histórico de entregas (em dias)
+    learned_consumption_days = Column(Integer)
+    
+    # Padrão informado manualmente prevalece sobre o aprendido
+    consumption_pattern_manual = Column(Boolean, nullable=False, default=False, server_default=false())
+    
+    # Próximo lembrete (última entrega + padrão de consumo - antecedência)
+    next_reminder_due_at = Column(DateTime(timezone=True), index=True)
+    
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
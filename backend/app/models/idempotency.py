@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey, UniqueConstraint
+from datetime import datetime
+from app.core.database import Base
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    key = Column(String(255), nullable=False)
+    
+    # Hash do corpo da requisição original (detecta reuso da chave com outro corpo)
+    request_hash = Column(String(64), nullable=False)
+    
+    # Resposta gravada; vazia enquanto a requisição original está em processamento
+    response_status = Column(Integer)
+    response_body = Column(JSON)
+    
+    created_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False, index=True)
+    
+    __table_args__ = (
+        UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_id_key"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -21,17 +21,39 @@ class Order(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     delivered_at = Column(DateTime(timezone=True))
     
+    # Quando a entrega foi somada em daily_product_sales (None = ainda não somada)
+    sales_rolled_up_at = Column(DateTime(timezone=True))
+    
+    # Versão para controle de concorrência otimista (vai no WHERE de cada UPDATE)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    
     # Relacionamentos
     customer = relationship("Customer", back_populates="orders")
     items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
+    
+    # Índices da listagem paginada (ordenada por created_at, id)
+    __table_args__ = (
+        Index("ix_orders_created_at_id", "created_at", "id"),
+        Index("ix_orders_status_created_at", "status", "created_at"),
+        Index("ix_orders_customer_id_created_at", "customer_id", "created_at"),
+        # Entregas ainda não somadas em daily_product_sales (tarefa de consolidação)
+        Index(
+            "ix_orders_sales_rollup_pending",
+            "id",
+            postgresql_where=text("sales_rolled_up_at IS NULL AND status = 'concluido'"),
+            sqlite_where=text("sales_rolled_up_at IS NULL AND status = 'concluido'")
+        ),
+    )
+    
+    __mapper_args__ = {"version_id_col": version}
 
 
 class OrderItem(Base):
     __tablename__ = "order_items"
     
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
-    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
     
     quantity = Column(Integer, nullable=False)
     unit_price = Column(Float, nullable=False)
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON
+from datetime import datetime
+from app.core.database import Base
+
+
+class OrderEvent(Base):
+    __tablename__ = "order_events"
+    
+    # Sequencial: serve de Last-Event-ID para a retomada do stream
+    id = Column(Integer, primary_key=True, index=True)
+    
+    # Sem chave estrangeira: o evento de exclusão sobrevive ao pedido
+    order_id = Column(Integer, nullable=False)
+    
+    # Tipo: order.created, order.updated, order.completed, order.deleted
+    event_type = Column(String, nullable=False)
+    
+    # Status do pedido após o evento e antes dele (para filtros por status)
+    status = Column(String)
+    previous_status = Column(String)
+    
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False, index=True)
@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, JSON, Index
+from sqlalchemy.sql import func
+from datetime import datetime
+from app.core.database import Base
+
+
+class OutboxMessage(Base):
+    __tablename__ = "outbox"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    
+    # Tipo: order_confirmation, delivery_confirmation
+    kind = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    
+    # Status: pending, sent, failed
+    status = Column(String, default="pending", nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text)
+    
+    # Próxima tentativa de envio
+    available_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+    
+    # Reserva do lote em envio (None = livre); vencida, a mensagem é retomada
+    claimed_at = Column(DateTime(timezone=True))
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True))
+    
+    __table_args__ = (
+        Index("ix_outbox_status_available_at", "status", "available_at"),
+    )
@@ -16,7 +16,7 @@ class Product(Base):
     product_type = Column(String, nullable=False)
     
     # Estoque
-    stock_quantity = Column(Integer, default=0)
+    stock_quantity = Column(Integer, default=0, index=True)
     is_active = Column(Boolean, default=True)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
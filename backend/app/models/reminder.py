@@ -0,0 +1,52 @@
+from sqlalchemy import Column, Integer, String, Date, DateTime, Text, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class ReminderRun(Base):
+    __tablename__ = "reminder_runs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    
+    # Uma execução por dia; reexecuções no mesmo dia retomam a existente
+    run_date = Column(Date, nullable=False, unique=True)
+    
+    # Status: running, completed, failed
+    status = Column(String, default="running", nullable=False)
+    
+    # Checkpoint: último cliente processado na ordem (next_reminder_due_at, id)
+    checkpoint_due_at = Column(DateTime(timezone=True))
+    checkpoint_customer_id = Column(Integer)
+    
+    reminders_sent = Column(Integer, default=0, nullable=False)
+    reminders_failed = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text)
+    
+    started_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    finished_at = Column(DateTime(timezone=True))
+    
+    # Relacionamentos
+    sends = relationship("ReminderSend", back_populates="run", cascade="all, delete-orphan")
+
+
+class ReminderSend(Base):
+    __tablename__ = "reminder_sends"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(Integer, ForeignKey("reminder_runs.id"), nullable=False)
+    customer_id = Column(Integer, ForeignKey("customers.id"), nullable=False)
+    
+    # Status: pending, sent, failed
+    status = Column(String, default="pending", nullable=False)
+    error = Column(Text)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relacionamentos
+    run = relationship("ReminderRun", back_populates="sends")
+    
+    __table_args__ = (
+        UniqueConstraint("run_id", "customer_id", name="uq_reminder_sends_run_customer"),
+    )
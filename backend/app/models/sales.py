@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, Float, Date, DateTime, ForeignKey
+from datetime import datetime
+from app.core.database import Base
+
+
+class DailyProductSales(Base):
+    __tablename__ = "daily_product_sales"
+    
+    # Dia da entrega (UTC) e produto
+    day = Column(Date, primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True, index=True)
+    
+    quantity = Column(Integer, default=0, nullable=False)
+    revenue = Column(Float, default=0.0, nullable=False)
+    orders_count = Column(Integer, default=0, nullable=False)
+    
+    updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String, DateTime
+from app.core.database import Base
+
+
+class SchedulerLock(Base):
+    __tablename__ = "scheduler_locks"
+    
+    # Nome da tarefa protegida (ex.: daily_reminders)
+    name = Column(String, primary_key=True)
+    
+    # Instância que detém o lock e até quando
+    owner = Column(String, nullable=False)
+    acquired_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, Float, DateTime
+from datetime import datetime
+from app.core.database import Base
+
+
+class StatCounter(Base):
+    __tablename__ = "stat_counters"
+    
+    # Ex.: orders_by_status:novo, orders_created:2024-01-31, revenue:2024-01-31
+    name = Column(String, primary_key=True)
+    value = Column(Float, default=0.0, nullable=False)
+    
+    updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 from typing import Optional
 
@@ -7,6 +7,8 @@ class CustomerBase(BaseModel):
     name: str
     phone: str
     address: str
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
     consumption_pattern_days: int = 30
 
 
@@ -18,11 +20,18 @@ class CustomerUpdate(BaseModel):
     name: Optional[str] = None
     phone: Optional[str] = None
     address: Optional[str] = None
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
     consumption_pattern_days: Optional[int] = None
+    # False volta a usar o intervalo aprendido
+    consumption_pattern_manual: Optional[bool] = None
 
 
 class CustomerResponse(CustomerBase):
     id: int
+    learned_consumption_days: Optional[int] = None
+    consumption_pattern_manual: bool = False
+    next_reminder_due_at: Optional[datetime] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
     
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 from typing import Optional, List
 
@@ -30,6 +30,10 @@ class OrderCreate(OrderBase):
     items: List[OrderItemCreate]
 
 
+class OrderBulkCreate(BaseModel):
+    orders: List[OrderCreate] = Field(..., min_length=1, max_length=1000)
+
+
 class OrderUpdate(BaseModel):
     status: Optional[str] = None
     notes: Optional[str] = None
@@ -42,7 +46,21 @@ class OrderResponse(OrderBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
     delivered_at: Optional[datetime] = None
+    version: int
     items: List[OrderItemResponse] = []
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class OrderBulkResult(BaseModel):
+    index: int
+    success: bool
+    order: Optional[OrderResponse] = None
+    error: Optional[str] = None
+
+
+class OrderBulkResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[OrderBulkResult]
\ No newline at end of file
@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from datetime import date, datetime
+from typing import Optional
+
+
+class ReminderRunResponse(BaseModel):
+    id: int
+    run_date: date
+    status: str
+    checkpoint_due_at: Optional[datetime] = None
+    checkpoint_customer_id: Optional[int] = None
+    reminders_sent: int
+    reminders_failed: int
+    last_error: Optional[str] = None
+    started_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
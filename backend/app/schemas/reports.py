@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+from datetime import date
+
+
+class DailySalesRow(BaseModel):
+    day: date
+    product_id: int
+    product_name: str
+    product_type: str
+    quantity: int
+    revenue: float
+    orders_count: int
+
+
+class SalesByTypeRow(BaseModel):
+    period: str
+    product_type: str
+    quantity: int
+    revenue: float
@@ -0,0 +1,29 @@
+from pydantic import BaseModel
+from typing import List
+
+
+class RouteStop(BaseModel):
+    order_id: int
+    customer_id: int
+    customer_name: str
+    address: str
+    latitude: float
+    longitude: float
+    quantity: int
+    distance_from_previous_km: float
+
+
+class RouteBatch(BaseModel):
+    vehicle: int
+    total_quantity: int
+    distance_km: float
+    stops: List[RouteStop]
+
+
+class RoutePlanResponse(BaseModel):
+    depot_latitude: float
+    depot_longitude: float
+    vehicle_capacity: int
+    total_distance_km: float
+    batches: List[RouteBatch]
+    unrouted_order_ids: List[int] = []
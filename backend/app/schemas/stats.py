@@ -0,0 +1,25 @@
+from pydantic import BaseModel
+from datetime import date
+from typing import Dict, List
+
+
+class TodayStats(BaseModel):
+    date: date
+    orders: int
+    revenue: float
+
+
+class LowStockProduct(BaseModel):
+    id: int
+    name: str
+    stock_quantity: int
+    
+    class Config:
+        from_attributes = True
+
+
+class StatsSummary(BaseModel):
+    total_orders: int
+    orders_by_status: Dict[str, int]
+    today: TodayStats
+    low_stock_products: List[LowStockProduct]
@@ -0,0 +1,155 @@
+import numpy as np
+from sqlalchemy.orm import Session
+from sqlalchemy import select, update, extract
+from datetime import datetime
+from typing import Optional
+from app.core.config import settings
+from app.models.customer import Customer
+from app.models.order import Order
+from app.services.notifications import REMINDER_ADVANCE_DAYS
+
+SECONDS_PER_DAY = 86400.0
+
+# Limites para o intervalo aprendido (em dias)
+MIN_LEARNED_DAYS = REMINDER_ADVANCE_DAYS + 1
+MAX_LEARNED_DAYS = 365
+
+
+class ConsumptionLearningService:
+    """
+    Serviço que aprende o intervalo real de reposição de cada cliente
+    a partir do histórico de entregas
+    """
+
+    @staticmethod
+    def compute_intervals(
+        customer_ids: np.ndarray,
+        delivered_epochs: np.ndarray,
+        min_intervals: int,
+        max_intervals: int
+    ):
+        """
+        Calcula, de forma vetorizada, a mediana dos intervalos entre entregas
+
+        Args:
+            customer_ids: IDs dos clientes, ordenados por (cliente, data de entrega)
+            delivered_epochs: Datas de entrega em segundos desde a época
+            min_intervals: Mínimo de intervalos para considerar o histórico suficiente
+            max_intervals: Quantidade de intervalos mais recentes considerados
+
+        Returns:
+            Tupla (ids, dias_aprendidos, última_entrega) dos clientes com histórico suficiente
+        """
+        empty = (np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, np.float64))
+        if len(customer_ids) < 2:
+            return empty
+
+        # Intervalos entre entregas consecutivas do mesmo cliente
+        same_customer = customer_ids[1:] == customer_ids[:-1]
+        gap_ids = customer_ids[1:][same_customer]
+        gaps = (np.diff(delivered_epochs) / SECONDS_PER_DAY)[same_customer]
+
+        # Entregas no mesmo dia contam como uma única reposição
+        refill = gaps >= 1.0
+        gap_ids = gap_ids[refill]
+        gaps = gaps[refill]
+        if len(gaps) == 0:
+            return empty
+
+        # Mantém apenas os intervalos mais recentes de cada cliente
+        _, starts, counts = np.unique(gap_ids, return_index=True, return_counts=True)
+        group_ends = np.repeat(starts + counts, counts)
+        recent = (group_ends - np.arange(len(gap_ids))) <= max_intervals
+        gap_ids = gap_ids[recent]
+        gaps = gaps[recent]
+
+        # Mediana por cliente: ordena os intervalos dentro de cada grupo
+        order = np.lexsort((gaps, gap_ids))
+        gap_ids = gap_ids[order]
+        gaps = gaps[order]
+        ids, starts, counts = np.unique(gap_ids, return_index=True, return_counts=True)
+        medians = (gaps[starts + (counts - 1) // 2] + gaps[starts + counts // 2]) / 2
+
+        enough = counts >= min_intervals
+        ids = ids[enough]
+        learned_days = np.clip(np.rint(medians[enough]), MIN_LEARNED_DAYS, MAX_LEARNED_DAYS).astype(np.int64)
+
+        # Última entrega de cada cliente (última linha de cada grupo)
+        last_rows = np.flatnonzero(np.append(customer_ids[1:] != customer_ids[:-1], True))
+        last_ids = customer_ids[last_rows]
+        last_delivered = delivered_epochs[last_rows][np.searchsorted(last_ids, ids)]
+
+        return ids, learned_days, last_delivered
+
+    @staticmethod
+    def learn_intervals(db: Session, chunk_size: Optional[int] = None) -> dict:
+        """
+        Percorre o histórico de entregas em blocos e grava o intervalo
+        aprendido (e o próximo lembrete) dos clientes com histórico suficiente
+        
+        Clientes com padrão de consumo informado manualmente ficam de fora.
+        """
+        chunk_size = chunk_size or settings.CONSUMPTION_LEARNING_CHUNK_SIZE
+        min_intervals = settings.CONSUMPTION_LEARNING_MIN_INTERVALS
+        max_intervals = settings.CONSUMPTION_LEARNING_MAX_INTERVALS
+
+        stmt = (
+            select(Order.customer_id, extract("epoch", Order.delivered_at))
+            .where(
+                Order.status == "concluido",
+                Order.delivered_at.isnot(None),
+                Order.customer_id.notin_(select(Customer.id).where(Customer.consumption_pattern_manual.is_(True)))
+            )
+            .order_by(Order.customer_id, Order.delivered_at)
+            .execution_options(yield_per=chunk_size)
+        )
+
+        results = []
+        carry_ids = np.empty(0, np.int64)
+        carry_epochs = np.empty(0, np.float64)
+        orders_scanned = 0
+
+        for partition in db.execute(stmt).partitions():
+            rows = np.array(partition, dtype=np.float64)
+            orders_scanned += len(rows)
+
+            ids = np.concatenate([carry_ids, rows[:, 0].astype(np.int64)])
+            epochs = np.concatenate([carry_epochs, rows[:, 1]])
+
+            # O último cliente do bloco pode continuar no próximo
+            split = np.searchsorted(ids, ids[-1])
+            carry_ids, carry_epochs = ids[split:], epochs[split:]
+            results.append(ConsumptionLearningService.compute_intervals(
+                ids[:split], epochs[:split], min_intervals, max_intervals
+            ))
+
+        results.append(ConsumptionLearningService.compute_intervals(
+            carry_ids, carry_epochs, min_intervals, max_intervals
+        ))
+
+        ids = np.concatenate([r[0] for r in results])
+        learned_days = np.concatenate([r[1] for r in results])
+        last_delivered = np.concatenate([r[2] for r in results])
+        next_due = last_delivered + (learned_days - REMINDER_ADVANCE_DAYS) * SECONDS_PER_DAY
+
+        # Grava em lotes (executemany de UPDATE por chave primária)
+        for start in range(0, len(ids), chunk_size):
+            end = start + chunk_size
+            db.execute(update(Customer), [
+                {
+                    "id": int(customer_id),
+                    "learned_consumption_days": int(days),
+                    "next_reminder_due_at": datetime.utcfromtimestamp(due)
+                }
+                for customer_id, days, due in zip(ids[start:end], learned_days[start:end], next_due[start:end])
+            ])
+        db.commit()
+
+        return {
+            "orders_scanned": orders_scanned,
+            "customers_updated": len(ids),
+            "timestamp": datetime.utcnow()
+        }
+
+
+consumption_learning_service = ConsumptionLearningService()
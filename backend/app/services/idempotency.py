@@ -0,0 +1,133 @@
+import hashlib
+import json
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from app.core.config import settings
+from app.models.idempotency import IdempotencyKey
+
+# Header que indica uma resposta reaproveitada
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+class IdempotencyService:
+    """
+    Serviço que permite ao cliente repetir uma requisição (Idempotency-Key)
+    sem que o servidor execute o trabalho duas vezes
+    """
+    
+    @staticmethod
+    def request_hash(payload: dict) -> str:
+        """
+        Hash estável do corpo da requisição
+        """
+        canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(canonical.encode()).hexdigest()
+    
+    @staticmethod
+    def _expires_before() -> datetime:
+        return datetime.utcnow() - timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+    
+    @staticmethod
+    def _find(db: Session, user_id: int, key: str) -> Optional[IdempotencyKey]:
+        return db.query(IdempotencyKey).filter(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key
+        ).first()
+    
+    @staticmethod
+    def _replay(record: IdempotencyKey, request_hash: str) -> JSONResponse:
+        """
+        Devolve a resposta gravada para a chave
+        """
+        if record.request_hash != request_hash:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key já utilizada com outro corpo de requisição"
+            )
+        
+        if record.response_status is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Requisição com esta Idempotency-Key ainda em processamento"
+            )
+        
+        return JSONResponse(
+            status_code=record.response_status,
+            content=record.response_body,
+            headers={REPLAYED_HEADER: "true"}
+        )
+    
+    @staticmethod
+    def begin(
+        db: Session,
+        user_id: int,
+        key: str,
+        request_hash: str
+    ) -> Tuple[Optional[IdempotencyKey], Optional[JSONResponse]]:
+        """
+        Reserva a chave na transação em andamento ou, se ela já foi usada,
+        retorna a resposta gravada
+        
+        A reserva não faz commit: ela é confirmada junto com o trabalho da
+        requisição, então uma falha no meio libera a chave para nova tentativa.
+        A restrição única faz requisições simultâneas com a mesma chave
+        esperarem a primeira terminar.
+        
+        Returns:
+            Tupla (reserva, None) para executar a requisição ou (None, resposta gravada)
+        """
+        if len(key) > 255:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Idempotency-Key deve ter no máximo 255 caracteres"
+            )
+        
+        existing = IdempotencyService._find(db, user_id, key)
+        if existing:
+            if existing.created_at >= IdempotencyService._expires_before():
+                return None, IdempotencyService._replay(existing, request_hash)
+            
+            # Chave expirada pode ser reutilizada
+            db.delete(existing)
+            db.flush()
+        
+        record = IdempotencyKey(user_id=user_id, key=key, request_hash=request_hash)
+        db.add(record)
+        try:
+            db.flush()
+        except IntegrityError:
+            # Outra requisição com a mesma chave terminou primeiro
+            db.rollback()
+            return None, IdempotencyService._replay(IdempotencyService._find(db, user_id, key), request_hash)
+        
+        return record, None
+    
+    @staticmethod
+    def set_response(record: IdempotencyKey, status_code: int, body) -> None:
+        """
+        Guarda na reserva a resposta enviada ao cliente, sem commit
+        
+        Deve ser chamado antes do commit que confirma o trabalho da requisição:
+        assim a chave nunca fica confirmada sem resposta (o que a faria
+        responder 409 até expirar, se o processo caísse entre dois commits).
+        """
+        record.response_status = status_code
+        record.response_body = body
+    
+    @staticmethod
+    def purge_expired(db: Session) -> int:
+        """
+        Remove as chaves mais antigas que o prazo de validade
+        """
+        deleted = db.query(IdempotencyKey).filter(
+            IdempotencyKey.created_at < IdempotencyService._expires_before()
+        ).delete(synchronize_session=False)
+        db.commit()
+        return deleted
+
+
+idempotency_service = IdempotencyService()
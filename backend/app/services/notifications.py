@@ -1,64 +1,334 @@
+import asyncio
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from datetime import datetime, timedelta
+from sqlalchemy import select, update, func, or_, and_
+from sqlalchemy.exc import IntegrityError
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterator, List, Optional, Tuple
+from app.core.config import settings
 from app.models.customer import Customer
 from app.models.order import Order
+from app.models.reminder import ReminderRun, ReminderSend
 from app.services.whatsapp import whatsapp_service
 
+# Quantos dias antes do fim do padrão de consumo o lembrete é enviado
+REMINDER_ADVANCE_DAYS = 3
+
 
 class NotificationService:
     """
     Serviço para gerenciar notificações e lembretes automáticos
     """
-    
+
     @staticmethod
-    async def check_and_send_reminders(db: Session):
+    def _as_naive_utc(value: datetime) -> datetime:
         """
-        Verifica clientes que precisam de lembrete e envia mensagem
+        Normaliza datas com fuso (PostgreSQL) para UTC sem fuso, como utcnow()
         """
-        customers = db.query(Customer).all()
-        reminders_sent = 0
-        
-        for customer in customers:
-            # Busca último pedido concluído do cliente
-            last_order = db.query(Order).filter(
-                and_(
-                    Order.customer_id == customer.id,
-                    Order.status == "concluido",
-                    Order.delivered_at.isnot(None)
-                )
-            ).order_by(Order.delivered_at.desc()).first()
-            
-            if not last_order:
-                continue
-            
-            # Calcula dias desde a última entrega
-            days_since_delivery = (datetime.utcnow() - last_order.delivered_at).days
-            
-            # Calcula quando deve enviar o lembrete (3 dias antes do padrão de consumo)
-            reminder_threshold = customer.consumption_pattern_days - 3
-            
-            if days_since_delivery >= reminder_threshold:
-                # Calcula dias restantes estimados
-                days_remaining = customer.consumption_pattern_days - days_since_delivery
-                
-                if days_remaining < 0:
-                    days_remaining = 0
-                
-                # Envia lembrete
-                result = await whatsapp_service.send_reminder(
-                    customer_name=customer.name,
-                    customer_phone=customer.phone,
-                    days_until_estimated=days_remaining
-                )
-                
-                if result.get("success"):
-                    reminders_sent += 1
+        if value.tzinfo is not None:
+            return value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+    @staticmethod
+    def pattern_days_for(customer: Customer) -> int:
+        """
+        Padrão de consumo efetivo: o informado no cadastro quando foi editado
+        manualmente, senão o intervalo aprendido (se houver histórico suficiente)
+        """
+        if customer.consumption_pattern_manual:
+            return customer.consumption_pattern_days or 30
+        return customer.learned_consumption_days or customer.consumption_pattern_days or 30
+
+    @staticmethod
+    def compute_next_reminder_due_at(
+        last_delivered_at: Optional[datetime],
+        consumption_pattern_days: Optional[int]
+    ) -> Optional[datetime]:
+        """
+        Calcula quando o cliente deve receber o próximo lembrete
+        (3 dias antes do fim do padrão de consumo)
+        """
+        if last_delivered_at is None:
+            return None
+
+        pattern_days = consumption_pattern_days or 30
+        return last_delivered_at + timedelta(days=pattern_days - REMINDER_ADVANCE_DAYS)
+
+    @staticmethod
+    def refresh_next_reminder(db: Session, customer: Customer):
+        """
+        Recalcula o próximo lembrete a partir da última entrega concluída
+        (sem commit; usado quando o padrão de consumo muda)
+        """
+        last_delivered_at = db.query(func.max(Order.delivered_at)).filter(
+            Order.customer_id == customer.id,
+            Order.status == "concluido"
+        ).scalar()
+
+        customer.next_reminder_due_at = NotificationService.compute_next_reminder_due_at(
+            NotificationService._as_naive_utc(last_delivered_at) if last_delivered_at else None,
+            NotificationService.pattern_days_for(customer)
+        )
+
+    @staticmethod
+    def _reminder_candidates_query(
+        now: datetime,
+        after: Optional[Tuple[datetime, int]],
+        limit: int
+    ):
+        """
+        Monta a consulta de um bloco de clientes com lembrete vencido: uma
+        varredura de intervalo no índice de next_reminder_due_at, paginada
+        por chave (next_reminder_due_at, id) a partir do último bloco
+        """
+        stmt = (
+            select(
+                Customer.id,
+                Customer.name,
+                Customer.phone,
+                Customer.next_reminder_due_at
+            )
+            .where(Customer.next_reminder_due_at <= now)
+            .order_by(Customer.next_reminder_due_at, Customer.id)
+            .limit(limit)
+        )
+
+        if after is not None and after[0] is not None:
+            last_due_at, last_id = after
+            stmt = stmt.where(or_(
+                Customer.next_reminder_due_at > last_due_at,
+                and_(Customer.next_reminder_due_at == last_due_at, Customer.id > last_id)
+            ))
+
+        return stmt
+
+    @staticmethod
+    def iter_reminder_candidates(
+        db: Session,
+        now: Optional[datetime] = None,
+        chunk_size: Optional[int] = None,
+        after: Optional[Tuple[datetime, int]] = None
+    ) -> Iterator[List]:
+        """
+        Percorre os clientes que precisam de lembrete em blocos de tamanho fixo
         
+        Cada bloco é uma consulta independente que continua de onde o anterior
+        parou, então o consumo de memória é constante e é seguro fazer commit
+        entre os blocos (ou retomar a partir de um checkpoint com `after`).
+        """
+        now = now or datetime.utcnow()
+        chunk_size = chunk_size or settings.REMINDER_BATCH_SIZE
+
+        while True:
+            stmt = NotificationService._reminder_candidates_query(now, after, chunk_size)
+            chunk = db.execute(stmt).all()
+            if not chunk:
+                return
+
+            yield chunk
+
+            if len(chunk) < chunk_size:
+                return
+            after = (chunk[-1].next_reminder_due_at, chunk[-1].id)
+
+    @staticmethod
+    def _get_or_create_run(db: Session, run_date: date) -> ReminderRun:
+        """
+        Busca a execução do dia ou cria uma nova
+        """
+        run = db.query(ReminderRun).filter(ReminderRun.run_date == run_date).first()
+        if run is not None:
+            return run
+
+        run = ReminderRun(run_date=run_date, status="running")
+        db.add(run)
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            run = db.query(ReminderRun).filter(ReminderRun.run_date == run_date).one()
+        return run
+
+    @staticmethod
+    def get_interrupted_run(db: Session, run_date: Optional[date] = None) -> Optional[ReminderRun]:
+        """
+        Retorna a execução do dia que foi interrompida antes de terminar
+        """
+        run_date = run_date or datetime.utcnow().date()
+        return db.query(ReminderRun).filter(
+            ReminderRun.run_date == run_date,
+            ReminderRun.status != "completed"
+        ).first()
+
+    @staticmethod
+    def _start_run(db: Session, run_date: date) -> Tuple[int, bool, Tuple[Optional[datetime], Optional[int]]]:
+        """
+        Busca ou cria a execução do dia e a marca como em andamento
+        (síncrono; chamado numa thread, fora do event loop)
+
+        Returns:
+            Tupla (id da execução, se ainda há trabalho, checkpoint)
+        """
+        run = NotificationService._get_or_create_run(db, run_date)
+        run_id, checkpoint = run.id, (run.checkpoint_due_at, run.checkpoint_customer_id)
+        if run.status == "completed":
+            return run_id, False, checkpoint
+
+        run.status = "running"
+        run.last_error = None
+        db.commit()
+        return run_id, True, checkpoint
+
+    @staticmethod
+    def _finish_run(db: Session, run_id: int, status: Optional[str] = None, error: Optional[str] = None) -> dict:
+        """
+        Grava o desfecho da execução (se informado) e retorna o resumo
+        (síncrono; chamado numa thread, fora do event loop)
+        """
+        db.rollback()
+        run = db.get(ReminderRun, run_id)
+        if status is not None:
+            run.status = status
+            run.last_error = error
+            if status == "completed":
+                run.finished_at = datetime.utcnow()
+            db.commit()
+
         return {
-            "reminders_sent": reminders_sent,
+            "run_id": run.id,
+            "reminders_sent": run.reminders_sent,
+            "reminders_failed": run.reminders_failed,
             "timestamp": datetime.utcnow()
         }
 
+    @staticmethod
+    async def check_and_send_reminders(db: Session):
+        """
+        Verifica clientes que precisam de lembrete e envia mensagem
+        
+        O progresso é gravado a cada bloco em reminder_runs/reminder_sends;
+        se a execução do dia for interrompida, a próxima chamada retoma do
+        último checkpoint e não reenvia para clientes já processados.
+        Todo acesso ao banco roda numa thread; no event loop fica só o envio.
+        """
+        now = datetime.utcnow()
+        run_id, pending, checkpoint = await asyncio.to_thread(NotificationService._start_run, db, now.date())
+
+        if not pending:
+            return await asyncio.to_thread(NotificationService._finish_run, db, run_id)
+
+        try:
+            await NotificationService._process_run(db, run_id, now, checkpoint)
+        except Exception as e:
+            await asyncio.to_thread(NotificationService._finish_run, db, run_id, "failed", str(e))
+            raise
+
+        return await asyncio.to_thread(NotificationService._finish_run, db, run_id, "completed")
+
+    @staticmethod
+    def _reserve_chunk(
+        db: Session,
+        run_id: int,
+        now: datetime,
+        after: Tuple[Optional[datetime], Optional[int]]
+    ) -> Tuple[List, List, List[int]]:
+        """
+        Busca o próximo bloco de clientes e registra no ledger os que ainda
+        não foram processados nesta execução (síncrono; roda numa thread)
+
+        Returns:
+            Tupla (bloco completo, clientes a enviar, ids das entradas do ledger)
+        """
+        candidates = db.execute(
+            NotificationService._reminder_candidates_query(now, after, settings.REMINDER_BATCH_SIZE)
+        ).all()
+        if not candidates:
+            db.rollback()
+            return [], [], []
+
+        # Clientes já registrados nesta execução não recebem de novo
+        already_processed = {
+            customer_id for (customer_id,) in db.query(ReminderSend.customer_id).filter(
+                ReminderSend.run_id == run_id,
+                ReminderSend.customer_id.in_([candidate.id for candidate in candidates])
+            )
+        }
+        pending = [c for c in candidates if c.id not in already_processed]
+
+        # Registra os envios antes de disparar: após uma queda, um envio
+        # "pending" é considerado feito (no máximo uma mensagem por cliente)
+        ledger = [ReminderSend(run_id=run_id, customer_id=c.id) for c in pending]
+        db.add_all(ledger)
+        db.flush()
+        ledger_ids = [entry.id for entry in ledger]
+        db.commit()
+
+        return candidates, pending, ledger_ids
+
+    @staticmethod
+    def _checkpoint(db: Session, run_id: int, ledger_ids: List[int], batch: dict, last_candidate) -> None:
+        """
+        Grava o resultado dos envios do bloco e o checkpoint da execução
+        (síncrono; roda numa thread)
+        """
+        if ledger_ids:
+            db.execute(update(ReminderSend), [
+                {
+                    "id": entry_id,
+                    "status": "sent" if result.get("success") else "failed",
+                    "error": result.get("error")
+                }
+                for entry_id, result in zip(ledger_ids, batch["results"])
+            ])
+
+        run = db.get(ReminderRun, run_id)
+        run.reminders_sent += batch["sent"]
+        run.reminders_failed += batch["failed"]
+        run.checkpoint_due_at = last_candidate.next_reminder_due_at
+        run.checkpoint_customer_id = last_candidate.id
+        db.commit()
+
+    @staticmethod
+    async def _process_run(
+        db: Session,
+        run_id: int,
+        now: datetime,
+        checkpoint: Tuple[Optional[datetime], Optional[int]]
+    ):
+        """
+        Envia os lembretes pendentes da execução, bloco a bloco
+        """
+        after = checkpoint
+        while True:
+            candidates, pending, ledger_ids = await asyncio.to_thread(
+                NotificationService._reserve_chunk, db, run_id, now, after
+            )
+            if not candidates:
+                return
+
+            sends = []
+            for candidate in pending:
+                # Dias desde que o lembrete venceu
+                days_overdue = (
+                    now - NotificationService._as_naive_utc(candidate.next_reminder_due_at)
+                ).days
+
+                # Calcula dias restantes estimados até o fim do padrão de consumo
+                days_remaining = max(REMINDER_ADVANCE_DAYS - days_overdue, 0)
+
+                sends.append(whatsapp_service.send_reminder(
+                    customer_name=candidate.name,
+                    customer_phone=candidate.phone,
+                    days_until_estimated=days_remaining
+                ))
+
+            # Envia os lembretes do bloco em paralelo, respeitando o limite do provedor
+            batch = await whatsapp_service.dispatch_batch(sends)
+
+            # Checkpoint do bloco
+            await asyncio.to_thread(NotificationService._checkpoint, db, run_id, ledger_ids, batch, candidates[-1])
+
+            if len(candidates) < settings.REMINDER_BATCH_SIZE:
+                return
+            after = (candidates[-1].next_reminder_due_at, candidates[-1].id)
 
-notification_service = NotificationService()
\ No newline at end of file
+notification_service = NotificationService()
@@ -0,0 +1,102 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from datetime import datetime, timedelta
+from typing import List, Optional
+from app.core.config import settings
+from app.models.order import Order
+from app.models.order_event import OrderEvent
+
+
+class OrderEventService:
+    """
+    Serviço que registra as alterações de pedidos para o stream em tempo real
+    
+    Os eventos são gravados na mesma transação da alteração (como o outbox),
+    então todas as instâncias da API enxergam a mesma sequência de IDs.
+    """
+    
+    @staticmethod
+    def record(db: Session, event_type: str, order: Order, previous_status: Optional[str] = None) -> OrderEvent:
+        """
+        Adiciona evento sem fazer commit; ele é persistido junto com o pedido
+        """
+        event = OrderEvent(
+            order_id=order.id,
+            event_type=event_type,
+            status=order.status,
+            previous_status=previous_status,
+            payload={
+                "id": order.id,
+                "customer_id": order.customer_id,
+                "status": order.status,
+                "previous_status": previous_status,
+                "total_amount": order.total_amount,
+                "notes": order.notes,
+                "delivered_at": order.delivered_at.isoformat() if order.delivered_at else None,
+                "version": order.version
+            }
+        )
+        db.add(event)
+        return event
+    
+    @staticmethod
+    def fetch_after(
+        db: Session,
+        last_event_id: int,
+        up_to: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> List[OrderEvent]:
+        """
+        Eventos posteriores ao ID informado (até `up_to`, se informado), em ordem
+        """
+        query = db.query(OrderEvent).filter(OrderEvent.id > last_event_id)
+        if up_to is not None:
+            query = query.filter(OrderEvent.id <= up_to)
+        
+        return (
+            query
+            .order_by(OrderEvent.id)
+            .limit(limit or settings.ORDER_EVENTS_CATCH_UP_LIMIT)
+            .all()
+        )
+    
+    @staticmethod
+    def latest_id(db: Session) -> int:
+        """
+        ID do evento mais recente (0 se não houver)
+        """
+        return db.query(func.coalesce(func.max(OrderEvent.id), 0)).scalar()
+    
+    @staticmethod
+    def serialize(event: OrderEvent) -> dict:
+        """
+        Converte o evento em dicionário (independente da sessão do banco)
+        """
+        return {
+            "id": event.id,
+            "event_type": event.event_type,
+            "status": event.status,
+            "previous_status": event.previous_status,
+            "payload": event.payload
+        }
+    
+    @staticmethod
+    def matches(message: dict, statuses: Optional[set]) -> bool:
+        """
+        Verifica o filtro de status do cliente; o pedido que sai de um status
+        filtrado também é entregue, para que a tela o remova
+        """
+        return not statuses or message["status"] in statuses or message["previous_status"] in statuses
+    
+    @staticmethod
+    def purge_expired(db: Session) -> int:
+        """
+        Remove eventos mais antigos que o prazo de retenção
+        """
+        cutoff = datetime.utcnow() - timedelta(hours=settings.ORDER_EVENTS_RETENTION_HOURS)
+        deleted = db.query(OrderEvent).filter(OrderEvent.created_at < cutoff).delete(synchronize_session=False)
+        db.commit()
+        return deleted
+
+
+order_event_service = OrderEventService()
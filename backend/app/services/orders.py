@@ -1,10 +1,20 @@
-from sqlalchemy.orm import Session
-from datetime import datetime
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm.exc import StaleDataError
+from sqlalchemy import insert, update, bindparam, select
+from sqlalchemy.sql import Select
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
 from app.models.order import Order, OrderItem
 from app.models.product import Product
 from app.models.customer import Customer
-from app.schemas.order import OrderCreate
-from app.services.whatsapp import whatsapp_service
+from app.models.idempotency import IdempotencyKey
+from app.schemas.order import OrderCreate, OrderUpdate, OrderResponse
+from app.services.idempotency import idempotency_service
+from app.services.outbox import outbox_service
+from app.services.order_events import order_event_service
+from app.services.stats import stats_service
+from app.services.sales import sales_rollup_service
+from app.services.notifications import notification_service
 from fastapi import HTTPException, status
 
 
@@ -14,33 +24,31 @@ class OrderService:
     """
     
     @staticmethod
-    async def create_order(db: Session, order_data: OrderCreate) -> Order:
+    def _load_products(db: Session, product_ids) -> Dict[int, Product]:
         """
-        Cria um novo pedido e envia confirmação via WhatsApp
+        Carrega os produtos informados em uma única consulta, travando as
+        linhas (em ordem de id, evitando deadlocks) onde há suporte
+        """
+        return {
+            product.id: product
+            for product in db.query(Product)
+            .filter(Product.id.in_(sorted(set(product_ids))))
+            .order_by(Product.id)
+            .with_for_update()
+        }
+    
+    @staticmethod
+    def _prepare_order(order_data: OrderCreate, products: Dict[int, Product]) -> dict:
+        """
+        Valida os itens do pedido e calcula valores, sem tocar no banco
         """
-        # Verifica se o cliente existe
-        customer = db.query(Customer).filter(Customer.id == order_data.customer_id).first()
-        if not customer:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Cliente não encontrado"
-            )
-        
-        # Cria o pedido
-        order = Order(
-            customer_id=order_data.customer_id,
-            notes=order_data.notes,
-            status="novo"
-        )
-        db.add(order)
-        db.flush()
-        
         total_amount = 0.0
+        items = []
         items_for_message = []
+        stock_changes = {}
         
-        # Adiciona itens ao pedido
         for item_data in order_data.items:
-            product = db.query(Product).filter(Product.id == item_data.product_id).first()
+            product = products.get(item_data.product_id)
             if not product:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
@@ -56,42 +64,187 @@ class OrderService:
             subtotal = product.price * item_data.quantity
             total_amount += subtotal
             
-            order_item = OrderItem(
-                order_id=order.id,
-                product_id=product.id,
-                quantity=item_data.quantity,
-                unit_price=product.price,
-                subtotal=subtotal
-            )
-            db.add(order_item)
+            items.append({
+                "product_id": product.id,
+                "quantity": item_data.quantity,
+                "unit_price": product.price,
+                "subtotal": subtotal
+            })
             
             items_for_message.append({
                 "product_name": product.name,
                 "quantity": item_data.quantity
             })
             
-            # Atualiza estoque
-            product.stock_quantity -= item_data.quantity
+            stock_changes[product.id] = stock_changes.get(product.id, 0) + item_data.quantity
+        
+        return {
+            "total_amount": total_amount,
+            "items": items,
+            "items_for_message": items_for_message,
+            "stock_changes": stock_changes
+        }
+    
+    @staticmethod
+    def _persist_orders(db: Session, prepared: List[tuple]) -> List[Order]:
+        """
+        Grava pedidos já validados: pedidos, itens e baixa de estoque em
+        lote, a confirmação de cada um no outbox, o evento do stream e os
+        contadores do dashboard (sem commit)
+        
+        Args:
+            prepared: Lista de (OrderCreate, Customer, resultado de _prepare_order)
+        """
+        orders = [
+            Order(
+                customer_id=order_data.customer_id,
+                notes=order_data.notes,
+                status="novo",
+                total_amount=plan["total_amount"]
+            )
+            for order_data, _, plan in prepared
+        ]
+        db.add_all(orders)
+        db.flush()
+        
+        items_for_insert = []
+        stock_changes = {}
+        for order, (_, _, plan) in zip(orders, prepared):
+            for item in plan["items"]:
+                items_for_insert.append({**item, "order_id": order.id})
+            for product_id, quantity in plan["stock_changes"].items():
+                stock_changes[product_id] = stock_changes.get(product_id, 0) + quantity
+        
+        if items_for_insert:
+            # Insere os itens com um único executemany
+            db.execute(insert(OrderItem), items_for_insert)
+            
+            # Baixa de estoque atômica no banco (sem read-modify-write em Python)
+            products_table = Product.__table__
+            db.execute(
+                update(products_table)
+                .where(products_table.c.id == bindparam("b_product_id"))
+                .values(stock_quantity=products_table.c.stock_quantity - bindparam("b_quantity")),
+                [
+                    {"b_product_id": product_id, "b_quantity": quantity}
+                    for product_id, quantity in sorted(stock_changes.items())
+                ]
+            )
+        
+        # Confirmação via WhatsApp gravada na mesma transação do pedido
+        for order, (_, customer, plan) in zip(orders, prepared):
+            outbox_service.enqueue(db, "order_confirmation", {
+                "customer_name": customer.name,
+                "customer_phone": customer.phone,
+                "order_id": order.id,
+                "items": plan["items_for_message"],
+                "total": plan["total_amount"]
+            })
+            order_event_service.record(db, "order.created", order)
+        
+        stats_service.increment(db, stats_service.order_created_deltas(orders))
+        
+        return orders
+    
+    @staticmethod
+    def create_order(
+        db: Session,
+        order_data: OrderCreate,
+        idempotency_record: Optional[IdempotencyKey] = None
+    ) -> Order:
+        """
+        Cria um novo pedido e agenda confirmação via WhatsApp
+        
+        Com idempotency_record, a resposta é gravada na reserva da chave no
+        mesmo commit do pedido.
+        """
+        # Verifica se o cliente existe
+        customer = db.query(Customer).filter(Customer.id == order_data.customer_id).first()
+        if not customer:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Cliente não encontrado"
+            )
+        
+        products = OrderService._load_products(db, [item.product_id for item in order_data.items])
+        plan = OrderService._prepare_order(order_data, products)
+        
+        order = OrderService._persist_orders(db, [(order_data, customer, plan)])[0]
+        
+        if idempotency_record is not None:
+            db.flush()
+            idempotency_service.set_response(
+                idempotency_record,
+                status.HTTP_201_CREATED,
+                OrderResponse.model_validate(order).model_dump(mode="json")
+            )
         
-        order.total_amount = total_amount
         db.commit()
         db.refresh(order)
         
-        # Envia confirmação via WhatsApp
-        await whatsapp_service.send_order_confirmation(
-            customer_name=customer.name,
-            customer_phone=customer.phone,
-            order_id=order.id,
-            items=items_for_message,
-            total=total_amount
+        return order
+    
+    @staticmethod
+    def create_orders_bulk(db: Session, orders_data: List[OrderCreate]) -> List[dict]:
+        """
+        Cria vários pedidos de uma vez com poucas consultas
+        
+        Pedidos inválidos são reportados individualmente e não impedem
+        a criação dos demais.
+        
+        Returns:
+            Lista, na ordem recebida, com {"index", "success", "order" ou "error"}
+        """
+        customer_ids = {order_data.customer_id for order_data in orders_data}
+        customers = {
+            customer.id: customer
+            for customer in db.query(Customer).filter(Customer.id.in_(customer_ids))
+        }
+        products = OrderService._load_products(
+            db, [item.product_id for order_data in orders_data for item in order_data.items]
         )
         
-        return order
+        results = []
+        prepared = []
+        for index, order_data in enumerate(orders_data):
+            customer = customers.get(order_data.customer_id)
+            try:
+                if not customer:
+                    raise HTTPException(
+                        status_code=status.HTTP_404_NOT_FOUND,
+                        detail="Cliente não encontrado"
+                    )
+                plan = OrderService._prepare_order(order_data, products)
+            except HTTPException as e:
+                results.append({"index": index, "success": False, "error": e.detail})
+                continue
+            
+            results.append({"index": index, "success": True})
+            prepared.append((order_data, customer, plan))
+        
+        if prepared:
+            orders = OrderService._persist_orders(db, prepared)
+            db.commit()
+            
+            # Recarrega os pedidos criados com seus itens em duas consultas
+            order_ids = [order.id for order in orders]
+            loaded = {
+                order.id: order
+                for order in db.query(Order).options(selectinload(Order.items)).filter(Order.id.in_(order_ids))
+            }
+            created = iter(order_ids)
+            for result in results:
+                if result["success"]:
+                    result["order"] = loaded[next(created)]
+        else:
+            db.rollback()
+        
+        return results
     
     @staticmethod
-    async def complete_order(db: Session, order_id: int) -> Order:
+    def _get_for_update(db: Session, order_id: int, expected_version: Optional[int]) -> Order:
         """
-        Marca pedido como concluído e envia confirmação de entrega
+        Busca o pedido a ser alterado, conferindo a versão informada pelo cliente (If-Match)
         """
         order = db.query(Order).filter(Order.id == order_id).first()
         if not order:
@@ -100,27 +253,156 @@ class OrderService:
                 detail="Pedido não encontrado"
             )
         
-        order.status = "concluido"
-        order.delivered_at = datetime.utcnow()
+        if expected_version is not None and order.version != expected_version:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Pedido foi alterado por outra requisição; recarregue e tente novamente"
+            )
+        
+        return order
+    
+    @staticmethod
+    def _flush_or_conflict(db: Session):
+        """
+        Envia as alterações ao banco; se outra requisição alterou o pedido depois
+        da leitura, o UPDATE com a versão antiga não afeta linhas e resulta em 409
+        """
+        try:
+            db.flush()
+        except StaleDataError:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Pedido foi alterado por outra requisição; recarregue e tente novamente"
+            )
+    
+    @staticmethod
+    def update_order(
+        db: Session,
+        order_id: int,
+        order_data: OrderUpdate,
+        expected_version: Optional[int] = None
+    ) -> Order:
+        """
+        Atualiza status ou observações do pedido sem bloquear a linha
+        """
+        order = OrderService._get_for_update(db, order_id, expected_version)
+        previous_status, previous_delivered_at = order.status, order.delivered_at
+        
+        for field, value in order_data.model_dump(exclude_unset=True).items():
+            setattr(order, field, value)
+        
+        OrderService._flush_or_conflict(db)
+        order_event_service.record(db, "order.updated", order, previous_status)
+        stats_service.increment(
+            db, stats_service.status_change_deltas(order, previous_status, previous_delivered_at)
+        )
+        
+        if order.status != "concluido":
+            sales_rollup_service.revert_delivery(db, order)
+        else:
+            sales_rollup_service.record_delivery(db, order)
         db.commit()
         db.refresh(order)
         
-        # Envia confirmação de entrega via WhatsApp
+        return order
+    
+    @staticmethod
+    def complete_order(db: Session, order_id: int, expected_version: Optional[int] = None) -> Order:
+        """
+        Marca pedido como concluído e agenda confirmação de entrega
+        """
+        order = OrderService._get_for_update(db, order_id, expected_version)
+        previous_status, previous_delivered_at = order.status, order.delivered_at
+        
+        # Conclusão repetida: retira a entrega anterior antes de mudar a data
+        sales_rollup_service.revert_delivery(db, order)
+        
+        order.status = "concluido"
+        order.delivered_at = datetime.utcnow()
+        
+        # Reinicia o ciclo de lembretes a partir desta entrega
         customer = order.customer
-        await whatsapp_service.send_delivery_confirmation(
-            customer_name=customer.name,
-            customer_phone=customer.phone,
-            order_id=order.id
+        customer.next_reminder_due_at = notification_service.compute_next_reminder_due_at(
+            order.delivered_at,
+            notification_service.pattern_days_for(customer)
         )
         
+        # Confirmação de entrega gravada na mesma transação do pedido
+        outbox_service.enqueue(db, "delivery_confirmation", {
+            "customer_name": customer.name,
+            "customer_phone": customer.phone,
+            "order_id": order.id
+        })
+        
+        OrderService._flush_or_conflict(db)
+        order_event_service.record(db, "order.completed", order, previous_status)
+        stats_service.increment(
+            db, stats_service.status_change_deltas(order, previous_status, previous_delivered_at)
+        )
+        sales_rollup_service.record_delivery(db, order)
+        db.commit()
+        db.refresh(order)
+        
         return order
     
+    @staticmethod
+    def customer_orders_query(db: Session, customer_id: int):
+        """
+        Consulta do histórico de pedidos de um cliente (mais recentes primeiro)
+        """
+        return (
+            db.query(Order)
+            .options(selectinload(Order.items))
+            .filter(Order.customer_id == customer_id)
+            .order_by(Order.created_at.desc(), Order.id.desc())
+        )
+    
+    @staticmethod
+    def export_query(start: Optional[date] = None, end: Optional[date] = None) -> Select:
+        """
+        Consulta da exportação: uma linha por item, com dados do pedido e do
+        cliente, em ordem de criação (pedidos sem itens saem em uma linha só)
+        
+        Args:
+            start: Primeiro dia de criação (inclusive)
+            end: Último dia de criação (inclusive)
+        """
+        query = (
+            select(
+                Order.id.label("order_id"),
+                Order.created_at,
+                Order.delivered_at,
+                Order.status,
+                Order.total_amount.label("order_total"),
+                Customer.id.label("customer_id"),
+                Customer.name.label("customer_name"),
+                Customer.phone.label("customer_phone"),
+                OrderItem.product_id,
+                Product.name.label("product_name"),
+                Product.product_type,
+                OrderItem.quantity,
+                OrderItem.unit_price,
+                OrderItem.subtotal
+            )
+            .join(Customer, Customer.id == Order.customer_id)
+            .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+            .outerjoin(Product, Product.id == OrderItem.product_id)
+            .order_by(Order.created_at, Order.id, OrderItem.id)
+        )
+        if start:
+            query = query.where(Order.created_at >= datetime.combine(start, datetime.min.time()))
+        if end:
+            query = query.where(Order.created_at < datetime.combine(end + timedelta(days=1), datetime.min.time()))
+        
+        return query
+    
     @staticmethod
     def get_customer_orders(db: Session, customer_id: int):
         """
         Retorna histórico de pedidos de um cliente
         """
-        return db.query(Order).filter(Order.customer_id == customer_id).order_by(Order.created_at.desc()).all()
+        return OrderService.customer_orders_query(db, customer_id).all()
 
 
 order_service = OrderService()
\ No newline at end of file
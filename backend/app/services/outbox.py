@@ -0,0 +1,133 @@
+import asyncio
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from typing import List
+from app.core.config import settings
+from app.models.outbox import OutboxMessage
+from app.services.whatsapp import whatsapp_service
+
+
+class OutboxService:
+    """
+    Serviço para notificações gravadas na mesma transação do pedido
+    e enviadas depois pelo worker do outbox
+    """
+    
+    # Tipo da mensagem -> método do WhatsAppService que a envia
+    HANDLERS = {
+        "order_confirmation": "send_order_confirmation",
+        "delivery_confirmation": "send_delivery_confirmation",
+    }
+    
+    @staticmethod
+    def enqueue(db: Session, kind: str, payload: dict) -> OutboxMessage:
+        """
+        Adiciona mensagem ao outbox sem fazer commit; ela é persistida
+        junto com a transação em andamento
+        """
+        if kind not in OutboxService.HANDLERS:
+            raise ValueError(f"Tipo de mensagem desconhecido: {kind}")
+        
+        message = OutboxMessage(kind=kind, payload=payload)
+        db.add(message)
+        return message
+    
+    @staticmethod
+    async def _send(kind: str, payload: dict) -> dict:
+        handler = getattr(whatsapp_service, OutboxService.HANDLERS[kind])
+        return await handler(**payload)
+    
+    @staticmethod
+    def _retry_delay(attempts: int) -> timedelta:
+        """
+        Backoff exponencial entre tentativas (limitado a 1 hora)
+        """
+        seconds = settings.OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+        return timedelta(seconds=min(seconds, 3600))
+    
+    @staticmethod
+    def _claim(db: Session, batch_size: int, claimed_at: datetime) -> List[tuple]:
+        """
+        Reserva um lote de mensagens pendentes e faz commit em seguida
+        
+        A reserva adia available_at pelo prazo de OUTBOX_CLAIM_TIMEOUT_SECONDS:
+        nenhum outro worker pega o lote nesse prazo, e se este worker cair
+        antes de registrar o resultado, as mensagens voltam a ficar disponíveis.
+        
+        Returns:
+            Lista de (id, kind, payload) das mensagens reservadas
+        """
+        # SKIP LOCKED permite vários workers reservando lotes ao mesmo tempo
+        messages = db.query(OutboxMessage).filter(
+            OutboxMessage.status == "pending",
+            OutboxMessage.available_at <= claimed_at
+        ).order_by(OutboxMessage.id).limit(batch_size).with_for_update(skip_locked=True).all()
+        
+        claimed = [(message.id, message.kind, message.payload) for message in messages]
+        for message in messages:
+            message.claimed_at = claimed_at
+            message.available_at = claimed_at + timedelta(seconds=settings.OUTBOX_CLAIM_TIMEOUT_SECONDS)
+        
+        db.commit()
+        return claimed
+    
+    @staticmethod
+    def _record(db: Session, claimed_at: datetime, results: dict) -> None:
+        """
+        Registra o resultado dos envios numa transação curta
+        
+        Só atualiza as mensagens que ainda estão reservadas por este lote; uma
+        reserva vencida e retomada por outro worker não é sobrescrita.
+        """
+        messages = db.query(OutboxMessage).filter(
+            OutboxMessage.id.in_(list(results)),
+            OutboxMessage.claimed_at == claimed_at
+        ).with_for_update().all()
+        
+        now = datetime.utcnow()
+        for message in messages:
+            result = results[message.id]
+            message.attempts += 1
+            message.claimed_at = None
+            
+            if result.get("success"):
+                message.status = "sent"
+                message.sent_at = now
+                message.last_error = None
+            else:
+                message.last_error = result.get("error")
+                if message.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                    message.status = "failed"
+                else:
+                    message.available_at = now + OutboxService._retry_delay(message.attempts)
+        
+        db.commit()
+    
+    @staticmethod
+    async def process_pending(db: Session, batch_size: int = None) -> int:
+        """
+        Envia um lote de mensagens pendentes e registra o resultado de cada uma
+        
+        Reserva e registro são transações curtas rodando numa thread (fora do
+        event loop); o envio acontece sem transação nem locks abertos.
+        
+        Returns:
+            Quantidade de mensagens processadas
+        """
+        batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+        claimed_at = datetime.utcnow()
+        
+        claimed = await asyncio.to_thread(OutboxService._claim, db, batch_size, claimed_at)
+        if not claimed:
+            return 0
+        
+        batch = await whatsapp_service.dispatch_batch(
+            OutboxService._send(kind, payload) for _, kind, payload in claimed
+        )
+        
+        results = {message_id: result for (message_id, _, _), result in zip(claimed, batch["results"])}
+        await asyncio.to_thread(OutboxService._record, db, claimed_at, results)
+        
+        return len(claimed)
+
+outbox_service = OutboxService()
@@ -0,0 +1,259 @@
+import numpy as np
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from typing import List, Optional, Tuple
+from fastapi import HTTPException, status
+from app.core.config import settings
+from app.models.customer import Customer
+from app.models.order import Order, OrderItem
+
+EARTH_RADIUS_KM = 6371.0
+
+# Limite de passadas do 2-opt (cada passada é O(n²), mas vetorizada)
+TWO_OPT_MAX_PASSES = 50
+
+
+class RoutePlanningService:
+    """
+    Serviço que agrupa os pedidos em aberto em cargas por veículo e define a
+    ordem de entrega de cada carga
+    """
+
+    @staticmethod
+    def distance_matrix(coordinates: np.ndarray) -> np.ndarray:
+        """
+        Distâncias (km, fórmula de haversine) entre todos os pares de pontos
+
+        Args:
+            coordinates: Matriz (n, 2) com latitude e longitude em graus
+        """
+        lat = np.radians(coordinates[:, 0])[:, None]
+        lon = np.radians(coordinates[:, 1])[:, None]
+
+        a = (
+            np.sin((lat - lat.T) / 2) ** 2
+            + np.cos(lat) * np.cos(lat.T) * np.sin((lon - lon.T) / 2) ** 2
+        )
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+    @staticmethod
+    def split_by_capacity(
+        coordinates: np.ndarray,
+        quantities: np.ndarray,
+        depot: Tuple[float, float],
+        capacity: int
+    ) -> List[np.ndarray]:
+        """
+        Divide as paradas em cargas por varredura angular em torno do depósito,
+        fechando a carga quando a próxima parada excederia a capacidade
+
+        Cada carga cobre um setor do mapa, o que mantém as rotas compactas.
+        Um pedido maior que a capacidade vai sozinho em uma carga.
+        """
+        if len(coordinates) == 0:
+            return []
+
+        angles = np.arctan2(coordinates[:, 0] - depot[0], coordinates[:, 1] - depot[1])
+        order = np.argsort(angles)
+
+        # Começa a varredura logo após o maior vão entre paradas vizinhas
+        sorted_angles = angles[order]
+        gaps = np.diff(np.append(sorted_angles, sorted_angles[0] + 2 * np.pi))
+        order = np.roll(order, -(int(np.argmax(gaps)) + 1))
+
+        batches = []
+        current = []
+        load = 0
+        for index in order:
+            quantity = int(quantities[index])
+            if current and load + quantity > capacity:
+                batches.append(np.array(current))
+                current, load = [], 0
+            current.append(index)
+            load += quantity
+        batches.append(np.array(current))
+
+        return batches
+
+    @staticmethod
+    def nearest_neighbour(distances: np.ndarray) -> np.ndarray:
+        """
+        Rota inicial gulosa: parte do ponto 0 (depósito) e segue sempre para
+        a parada mais próxima ainda não visitada
+        """
+        size = len(distances)
+        visited = np.zeros(size, dtype=bool)
+        tour = np.empty(size, dtype=np.int64)
+
+        current = 0
+        visited[0] = True
+        tour[0] = 0
+        for position in range(1, size):
+            candidates = np.where(visited, np.inf, distances[current])
+            current = int(np.argmin(candidates))
+            visited[current] = True
+            tour[position] = current
+
+        return tour
+
+    @staticmethod
+    def two_opt(tour: np.ndarray, distances: np.ndarray, max_passes: int = TWO_OPT_MAX_PASSES) -> np.ndarray:
+        """
+        Melhora a rota (circuito fechado, volta ao depósito) invertendo trechos
+        enquanto isso reduzir a distância
+
+        Para cada aresta, o ganho de trocá-la por todas as arestas seguintes é
+        calculado de uma vez com numpy e aplica-se a melhor troca.
+        """
+        tour = tour.copy()
+        size = len(tour)
+        if size < 4:
+            return tour
+
+        for _ in range(max_passes):
+            improved = False
+            for i in range(1, size - 1):
+                a, b = tour[i - 1], tour[i]
+                c = tour[i + 1:]
+                d = np.append(tour[i + 2:], tour[0])
+
+                delta = distances[a, c] + distances[b, d] - distances[a, b] - distances[c, d]
+                best = int(np.argmin(delta))
+                if delta[best] < -1e-9:
+                    j = i + 1 + best
+                    tour[i:j + 1] = tour[i:j + 1][::-1]
+                    improved = True
+
+            if not improved:
+                break
+
+        return tour
+
+    @staticmethod
+    def tour_length(tour: np.ndarray, distances: np.ndarray) -> float:
+        """
+        Distância total do circuito, incluindo a volta ao depósito
+        """
+        return float(distances[tour, np.roll(tour, -1)].sum())
+
+    @staticmethod
+    def plan(
+        coordinates: np.ndarray,
+        quantities: np.ndarray,
+        depot: Tuple[float, float],
+        capacity: int
+    ) -> List[dict]:
+        """
+        Planeja as rotas sem acessar o banco
+
+        Returns:
+            Lista de cargas com os índices das paradas na ordem de entrega,
+            a distância de cada trecho e a distância total (km)
+        """
+        if len(coordinates) == 0:
+            return []
+
+        # Índice 0 é o depósito; paradas deslocadas em 1
+        points = np.vstack([np.array([depot], dtype=np.float64), coordinates])
+        distances = RoutePlanningService.distance_matrix(points)
+
+        batches = []
+        for stops in RoutePlanningService.split_by_capacity(coordinates, quantities, depot, capacity):
+            nodes = np.concatenate([[0], stops + 1])
+            sub = distances[np.ix_(nodes, nodes)]
+
+            tour = RoutePlanningService.two_opt(RoutePlanningService.nearest_neighbour(sub), sub)
+            legs = sub[tour[:-1], tour[1:]]
+
+            batches.append({
+                "stops": nodes[tour[1:]] - 1,
+                "legs_km": legs,
+                "distance_km": RoutePlanningService.tour_length(tour, sub),
+                "total_quantity": int(quantities[stops].sum())
+            })
+
+        return batches
+
+    @staticmethod
+    def plan_open_orders(
+        db: Session,
+        capacity: Optional[int] = None,
+        depot_latitude: Optional[float] = None,
+        depot_longitude: Optional[float] = None
+    ) -> dict:
+        """
+        Planeja as rotas dos pedidos novos (status "novo")
+
+        Pedidos de clientes sem coordenadas ficam em `unrouted_order_ids`.
+        Sem depósito configurado, usa o centro das paradas.
+        """
+        capacity = capacity or settings.ROUTE_VEHICLE_CAPACITY
+
+        rows = (
+            db.query(
+                Order.id,
+                Order.customer_id,
+                Customer.name,
+                Customer.address,
+                Customer.latitude,
+                Customer.longitude,
+                func.coalesce(func.sum(OrderItem.quantity), 0)
+            )
+            .join(Customer, Customer.id == Order.customer_id)
+            .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+            .filter(Order.status == "novo")
+            .group_by(Order.id, Customer.id)
+            .order_by(Order.id)
+            .all()
+        )
+
+        routable = [row for row in rows if row.latitude is not None and row.longitude is not None]
+        unrouted = [row.id for row in rows if row.latitude is None or row.longitude is None]
+
+        coordinates = np.array([(row.latitude, row.longitude) for row in routable], dtype=np.float64).reshape(-1, 2)
+        quantities = np.array([row[6] for row in routable], dtype=np.int64)
+
+        if depot_latitude is None or depot_longitude is None:
+            depot_latitude, depot_longitude = settings.DEPOT_LATITUDE, settings.DEPOT_LONGITUDE
+
+        if depot_latitude is None or depot_longitude is None:
+            if not routable:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Informe as coordenadas do depósito"
+                )
+            depot_latitude, depot_longitude = (float(value) for value in coordinates.mean(axis=0))
+
+        batches = RoutePlanningService.plan(coordinates, quantities, (depot_latitude, depot_longitude), capacity)
+
+        return {
+            "depot_latitude": depot_latitude,
+            "depot_longitude": depot_longitude,
+            "vehicle_capacity": capacity,
+            "total_distance_km": round(sum(batch["distance_km"] for batch in batches), 3),
+            "batches": [
+                {
+                    "vehicle": vehicle,
+                    "total_quantity": batch["total_quantity"],
+                    "distance_km": round(batch["distance_km"], 3),
+                    "stops": [
+                        {
+                            "order_id": routable[index].id,
+                            "customer_id": routable[index].customer_id,
+                            "customer_name": routable[index].name,
+                            "address": routable[index].address,
+                            "latitude": routable[index].latitude,
+                            "longitude": routable[index].longitude,
+                            "quantity": int(quantities[index]),
+                            "distance_from_previous_km": round(float(leg), 3)
+                        }
+                        for index, leg in zip(batch["stops"], batch["legs_km"])
+                    ]
+                }
+                for vehicle, batch in enumerate(batches, start=1)
+            ],
+            "unrouted_order_ids": unrouted
+        }
+
+
+route_planning_service = RoutePlanningService()
@@ -0,0 +1,213 @@
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import update
+from datetime import date, datetime
+from typing import Dict, List, Optional
+from fastapi import HTTPException, status
+from app.core.config import settings
+from app.models.order import Order, OrderItem
+from app.models.product import Product
+from app.models.sales import DailyProductSales
+from app.utils.upsert import upsert
+
+
+class SalesRollupService:
+    """
+    Serviço da consolidação diária de vendas (dia x produto)
+
+    Cada entrega concluída é somada uma única vez: a coluna
+    orders.sales_rolled_up_at marca o que já entrou na consolidação e é
+    gravada na mesma transação do incremento.
+    """
+
+    @staticmethod
+    def _apply(db: Session, order_ids: List[int], sign: int) -> None:
+        """
+        Soma (sign=1) ou subtrai (sign=-1) os itens dos pedidos na consolidação
+        """
+        items = (
+            db.query(Order.id, Order.delivered_at, OrderItem.product_id, OrderItem.quantity, OrderItem.subtotal)
+            .join(OrderItem, OrderItem.order_id == Order.id)
+            .filter(Order.id.in_(order_ids))
+            .all()
+        )
+
+        totals: Dict[tuple, dict] = {}
+        for order_id, delivered_at, product_id, quantity, subtotal in items:
+            entry = totals.setdefault(
+                (delivered_at.date(), product_id),
+                {"quantity": 0, "revenue": 0.0, "orders": set()}
+            )
+            entry["quantity"] += quantity
+            entry["revenue"] += subtotal
+            entry["orders"].add(order_id)
+
+        # Ordenado pela chave para travar as linhas sempre na mesma ordem
+        rows = [
+            {
+                "day": day,
+                "product_id": product_id,
+                "quantity": sign * entry["quantity"],
+                "revenue": sign * entry["revenue"],
+                "orders_count": sign * len(entry["orders"]),
+                "updated_at": datetime.utcnow()
+            }
+            for (day, product_id), entry in sorted(totals.items())
+        ]
+        upsert(
+            db,
+            DailyProductSales,
+            rows,
+            ["day", "product_id"],
+            ["quantity", "revenue", "orders_count"],
+            increment=True
+        )
+
+    @staticmethod
+    def _mark(db: Session, order: Order, rolled_up_at: Optional[datetime]) -> bool:
+        """
+        Troca a marcação com UPDATE condicional, sem alterar a versão vista pelo cliente
+
+        A condição é avaliada no banco com a linha travada, então numa corrida
+        com o catch_up só um dos lados efetiva a troca (e soma ou subtrai),
+        mesmo que o pedido em memória tenha sido lido antes do catch_up.
+
+        Returns:
+            True se a marcação mudou
+        """
+        orders = Order.__table__
+        if rolled_up_at is None:
+            pending = orders.c.sales_rolled_up_at.isnot(None)
+        else:
+            pending = orders.c.sales_rolled_up_at.is_(None)
+
+        result = db.execute(
+            update(orders).where(orders.c.id == order.id, pending).values(sales_rolled_up_at=rolled_up_at)
+        )
+        set_committed_value(order, "sales_rolled_up_at", rolled_up_at)
+        return result.rowcount == 1
+
+    @staticmethod
+    def record_delivery(db: Session, order: Order) -> None:
+        """
+        Soma a entrega concluída à consolidação (sem commit)
+        """
+        if order.status != "concluido" or order.delivered_at is None:
+            return
+
+        if SalesRollupService._mark(db, order, datetime.utcnow()):
+            SalesRollupService._apply(db, [order.id], 1)
+
+    @staticmethod
+    def revert_delivery(db: Session, order: Order) -> None:
+        """
+        Retira da consolidação um pedido que deixou de estar concluído ou foi excluído
+
+        Os itens e a data de entrega são lidos do banco, ou seja, antes da
+        alteração ainda não gravada pelo chamador.
+        """
+        if SalesRollupService._mark(db, order, None):
+            SalesRollupService._apply(db, [order.id], -1)
+
+    @staticmethod
+    def catch_up(db: Session, batch_size: Optional[int] = None) -> int:
+        """
+        Soma as entregas concluídas que ainda não entraram na consolidação
+        (histórico anterior à tabela ou alterações feitas fora do OrderService)
+
+        Returns:
+            Quantidade de pedidos consolidados
+        """
+        batch_size = batch_size or settings.SALES_ROLLUP_BATCH_SIZE
+
+        # SKIP LOCKED: pedidos em alteração agora são consolidados pela própria alteração.
+        # O filtro coincide com o índice parcial ix_orders_sales_rollup_pending.
+        order_ids = [
+            order_id for (order_id,) in
+            db.query(Order.id)
+            .filter(
+                Order.status == "concluido",
+                Order.delivered_at.isnot(None),
+                Order.sales_rolled_up_at.is_(None)
+            )
+            .order_by(Order.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ]
+        if not order_ids:
+            db.commit()
+            return 0
+
+        SalesRollupService._apply(db, order_ids, 1)
+
+        # Mantém a versão: a marcação é controle interno e não invalida o ETag do cliente
+        orders = Order.__table__
+        db.execute(
+            update(orders)
+            .where(orders.c.id.in_(order_ids))
+            .values(sales_rolled_up_at=datetime.utcnow())
+        )
+        db.commit()
+
+        return len(order_ids)
+
+    @staticmethod
+    def _check_range(start: date, end: date):
+        if end < start:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Data final anterior à data inicial"
+            )
+
+    @staticmethod
+    def daily_report(db: Session, start: date, end: date, product_id: Optional[int] = None) -> List[dict]:
+        """
+        Vendas por dia e produto no período (inclusive)
+        """
+        SalesRollupService._check_range(start, end)
+
+        query = (
+            db.query(DailyProductSales, Product.name, Product.product_type)
+            .join(Product, Product.id == DailyProductSales.product_id)
+            .filter(DailyProductSales.day >= start, DailyProductSales.day <= end)
+        )
+        if product_id:
+            query = query.filter(DailyProductSales.product_id == product_id)
+
+        return [
+            {
+                "day": row.day,
+                "product_id": row.product_id,
+                "product_name": name,
+                "product_type": product_type,
+                "quantity": row.quantity,
+                "revenue": round(row.revenue, 2),
+                "orders_count": row.orders_count
+            }
+            for row, name, product_type in query.order_by(DailyProductSales.day, DailyProductSales.product_id)
+        ]
+
+    @staticmethod
+    def report_by_type(db: Session, start: date, end: date, granularity: str = "day") -> List[dict]:
+        """
+        Vendas por tipo de produto (gás x água), por dia ou por mês
+        """
+        totals: Dict[tuple, dict] = {}
+        for row in SalesRollupService.daily_report(db, start, end):
+            period = row["day"].strftime("%Y-%m") if granularity == "month" else row["day"].isoformat()
+            entry = totals.setdefault((period, row["product_type"]), {"quantity": 0, "revenue": 0.0})
+            entry["quantity"] += row["quantity"]
+            entry["revenue"] += row["revenue"]
+
+        return [
+            {
+                "period": period,
+                "product_type": product_type,
+                "quantity": entry["quantity"],
+                "revenue": round(entry["revenue"], 2)
+            }
+            for (period, product_type), entry in sorted(totals.items())
+        ]
+
+
+sales_rollup_service = SalesRollupService()
@@ -0,0 +1,190 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, case, func, select
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, Optional
+from app.core.config import settings
+from app.models.order import Order
+from app.models.product import Product
+from app.models.stat_counter import StatCounter
+from app.utils.upsert import upsert
+
+ORDER_STATUSES = ("novo", "em_entrega", "concluido", "cancelado")
+
+STATUS_PREFIX = "orders_by_status:"
+CREATED_PREFIX = "orders_created:"
+REVENUE_PREFIX = "revenue:"
+
+
+class StatsService:
+    """
+    Serviço de estatísticas do dashboard baseado em contadores
+    
+    Os contadores são atualizados na mesma transação das alterações de pedidos,
+    então o resumo lê poucas linhas independente do tamanho das tabelas.
+    Faturamento do dia = pedidos concluídos (entregues) no dia, em UTC.
+    """
+    
+    @staticmethod
+    def _upsert(db: Session, values: Dict[str, float], increment: bool):
+        """
+        Grava os contadores com um único executemany (INSERT ... ON CONFLICT)
+        
+        As chaves vão ordenadas para que transações concorrentes travem as
+        linhas sempre na mesma ordem (sem deadlock).
+        """
+        now = datetime.utcnow()
+        rows = [{"name": name, "value": value, "updated_at": now} for name, value in sorted(values.items())]
+        upsert(db, StatCounter, rows, ["name"], ["value"], increment=increment)
+    
+    @staticmethod
+    def increment(db: Session, deltas: Dict[str, float]):
+        """
+        Soma os deltas aos contadores (sem commit)
+        """
+        StatsService._upsert(db, {name: delta for name, delta in deltas.items() if delta}, increment=True)
+    
+    @staticmethod
+    def _add(deltas: Dict[str, float], name: str, delta: float):
+        deltas[name] = deltas.get(name, 0) + delta
+    
+    @staticmethod
+    def order_created_deltas(orders: Iterable[Order]) -> Dict[str, float]:
+        """
+        Deltas de pedidos recém-criados
+        """
+        deltas = {}
+        today = datetime.utcnow().date().isoformat()
+        for order in orders:
+            StatsService._add(deltas, STATUS_PREFIX + order.status, 1)
+            StatsService._add(deltas, CREATED_PREFIX + today, 1)
+        return deltas
+    
+    @staticmethod
+    def status_change_deltas(
+        order: Order,
+        previous_status: Optional[str],
+        previous_delivered_at: Optional[datetime]
+    ) -> Dict[str, float]:
+        """
+        Deltas da mudança de status (ou da data de entrega) de um pedido
+        
+        O faturamento sai do dia da entrega anterior e entra no da atual, então
+        uma conclusão repetida em outro dia move o valor entre os dias.
+        """
+        deltas = {}
+        if order.status != previous_status:
+            if previous_status:
+                StatsService._add(deltas, STATUS_PREFIX + previous_status, -1)
+            StatsService._add(deltas, STATUS_PREFIX + order.status, 1)
+        
+        if previous_status == "concluido" and previous_delivered_at:
+            StatsService._add(
+                deltas, REVENUE_PREFIX + previous_delivered_at.date().isoformat(), -order.total_amount
+            )
+        if order.status == "concluido" and order.delivered_at:
+            StatsService._add(deltas, REVENUE_PREFIX + order.delivered_at.date().isoformat(), order.total_amount)
+        
+        return deltas
+    
+    @staticmethod
+    def order_deleted_deltas(order: Order) -> Dict[str, float]:
+        """
+        Deltas da exclusão de um pedido
+        """
+        deltas = {STATUS_PREFIX + order.status: -1}
+        if order.created_at:
+            StatsService._add(deltas, CREATED_PREFIX + order.created_at.date().isoformat(), -1)
+        if order.status == "concluido" and order.delivered_at:
+            StatsService._add(deltas, REVENUE_PREFIX + order.delivered_at.date().isoformat(), -order.total_amount)
+        return deltas
+    
+    @staticmethod
+    def get_summary(db: Session) -> dict:
+        """
+        Resumo do dashboard lido dos contadores
+        """
+        today = datetime.utcnow().date()
+        names = [STATUS_PREFIX + s for s in ORDER_STATUSES] + [
+            CREATED_PREFIX + today.isoformat(),
+            REVENUE_PREFIX + today.isoformat()
+        ]
+        counters = dict(db.query(StatCounter.name, StatCounter.value).filter(StatCounter.name.in_(names)).all())
+        
+        orders_by_status = {s: int(counters.get(STATUS_PREFIX + s, 0)) for s in ORDER_STATUSES}
+        
+        # Índice em stock_quantity: busca limitada, não varre a tabela
+        low_stock = (
+            db.query(Product)
+            .filter(Product.is_active == True, Product.stock_quantity <= settings.LOW_STOCK_THRESHOLD)
+            .order_by(Product.stock_quantity, Product.id)
+            .limit(settings.LOW_STOCK_LIMIT)
+            .all()
+        )
+        
+        return {
+            "total_orders": sum(orders_by_status.values()),
+            "orders_by_status": orders_by_status,
+            "today": {
+                "date": today,
+                "orders": int(counters.get(CREATED_PREFIX + today.isoformat(), 0)),
+                "revenue": round(counters.get(REVENUE_PREFIX + today.isoformat(), 0.0), 2)
+            },
+            "low_stock_products": low_stock
+        }
+    
+    @staticmethod
+    def reconcile(db: Session, day: Optional[date] = None) -> Dict[str, float]:
+        """
+        Recalcula os contadores com consultas agregadas e corrige desvios
+        
+        Agregados e contadores são lidos sem lock, em uma única consulta (mesmo
+        snapshot). A correção é aplicada como incremento da diferença, então
+        alterações de pedidos feitas durante a varredura não esperam nem se perdem.
+        
+        Returns:
+            Correções aplicadas (somente contadores que estavam fora de sincronia)
+        """
+        day = day or datetime.utcnow().date()
+        start = datetime.combine(day, time.min)
+        end = start + timedelta(days=1)
+        
+        existing_statuses = [name for (name,) in db.query(StatCounter.name).filter(StatCounter.name.like(STATUS_PREFIX + "%"))]
+        names = sorted(set(existing_statuses) | {STATUS_PREFIX + s for s in ORDER_STATUSES})
+        aggregates = {
+            name: func.sum(case((Order.status == name[len(STATUS_PREFIX):], 1), else_=0))
+            for name in names
+        }
+        aggregates[CREATED_PREFIX + day.isoformat()] = func.sum(
+            case((and_(Order.created_at >= start, Order.created_at < end), 1), else_=0)
+        )
+        aggregates[REVENUE_PREFIX + day.isoformat()] = func.sum(
+            case(
+                (and_(Order.status == "concluido", Order.delivered_at >= start, Order.delivered_at < end), Order.total_amount),
+                else_=0.0
+            )
+        )
+        
+        # Uma varredura de orders; os contadores entram como subconsultas da mesma consulta
+        names = list(aggregates)
+        columns = []
+        for name in names:
+            counter = select(StatCounter.value).where(StatCounter.name == name).scalar_subquery()
+            columns += [func.coalesce(aggregates[name], 0), func.coalesce(counter, 0)]
+        row = db.execute(select(*columns).select_from(Order)).one()
+        db.rollback()
+        
+        deltas = {}
+        for index, name in enumerate(names):
+            actual, counted = row[2 * index], row[2 * index + 1]
+            if abs(actual - counted) > 1e-6:
+                deltas[name] = actual - counted
+        
+        # Transação curta: só os contadores com desvio, incrementados atomicamente
+        if deltas:
+            StatsService.increment(db, deltas)
+            db.commit()
+        
+        return deltas
+
+
+stats_service = StatsService()
@@ -1,6 +1,142 @@
+import asyncio
+import importlib.util
+import logging
+import random
+import time
 import httpx
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from app.core.config import settings
-from typing import Optional
+from typing import Awaitable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Limitador de taxa no modelo token bucket
+
+    Cada chamada a acquire() consome um token; os tokens são repostos
+    continuamente a `rate` por segundo até o limite `capacity` (rajada).
+    Quando não há token disponível a chamada reserva o próximo e aguarda
+    a sua vez, então chamadas concorrentes são enfileiradas sem lock.
+    Com um prazo, a chamada desiste (sem consumir token) se a vez só viria
+    depois dele.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+
+    async def acquire(self, deadline: Optional[float] = None) -> bool:
+        """
+        Aguarda até que um token esteja disponível
+
+        Args:
+            deadline: Instante limite (time.monotonic()) para obter o token
+
+        Returns:
+            False se a espera passaria do prazo (nenhum token é consumido)
+        """
+        if self.rate <= 0:
+            return True
+
+        self._refill()
+        wait = max(1 - self._tokens, 0) / self.rate
+        if deadline is not None and time.monotonic() + wait >= deadline:
+            return False
+
+        self._tokens -= 1
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return True
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker para o provedor do WhatsApp
+
+    closed: chamadas liberadas; após `failure_threshold` falhas seguidas o
+    circuito abre. open: chamadas rejeitadas imediatamente durante
+    `recovery_timeout` segundos. half_open: uma única chamada de teste é
+    liberada; sucesso fecha o circuito, falha o abre novamente.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, recovery_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self._probe_in_flight = False
+        self.counters = {"successes": 0, "failures": 0, "rejected": 0, "opened": 0}
+
+    def allow_request(self) -> bool:
+        """
+        Indica se uma chamada pode ser feita agora
+        """
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.recovery_timeout:
+                self.counters["rejected"] += 1
+                return False
+            self.state = self.HALF_OPEN
+
+        if self.state == self.HALF_OPEN:
+            if self._probe_in_flight:
+                self.counters["rejected"] += 1
+                return False
+            self._probe_in_flight = True
+
+        return True
+
+    def release(self):
+        """
+        Libera a chamada de teste que não chegou ao provedor, sem registrar resultado
+        """
+        self._probe_in_flight = False
+
+    def record_success(self):
+        self.counters["successes"] += 1
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+        self.state = self.CLOSED
+        self.opened_at = None
+
+    def record_failure(self):
+        self.counters["failures"] += 1
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.counters["opened"] += 1
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def snapshot(self) -> dict:
+        """
+        Estado atual e contadores, para monitoramento
+        """
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "open_for_seconds": (
+                round(time.monotonic() - self.opened_at, 1) if self.opened_at is not None else None
+            ),
+            **self.counters
+        }
 
 
 class WhatsAppService:
@@ -13,6 +149,73 @@ class WhatsAppService:
         self.api_url = settings.WHATSAPP_API_URL
         self.api_token = settings.WHATSAPP_API_TOKEN
         self.phone_number_id = settings.WHATSAPP_PHONE_NUMBER_ID
+        self.rate_limiter = TokenBucket(
+            settings.WHATSAPP_RATE_LIMIT_PER_SECOND,
+            settings.WHATSAPP_RATE_LIMIT_BURST
+        )
+        self.max_concurrency = settings.WHATSAPP_MAX_CONCURRENCY
+        self._client: Optional[httpx.AsyncClient] = None
+        self.circuit_breaker = CircuitBreaker(
+            settings.WHATSAPP_BREAKER_FAILURE_THRESHOLD,
+            settings.WHATSAPP_BREAKER_RECOVERY_SECONDS
+        )
+        self.retries = 0
+    
+    def _build_client(self) -> httpx.AsyncClient:
+        """
+        Cria o cliente HTTP compartilhado, com pool de conexões e keep-alive
+        """
+        http2 = settings.WHATSAPP_HTTP2
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("HTTP/2 solicitado mas o pacote 'h2' não está instalado; usando HTTP/1.1")
+            http2 = False
+        
+        return httpx.AsyncClient(
+            headers={
+                "Authorization": f"Bearer {self.api_token}",
+                "Content-Type": "application/json"
+            },
+            limits=httpx.Limits(
+                max_connections=settings.WHATSAPP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.WHATSAPP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.WHATSAPP_KEEPALIVE_EXPIRY_SECONDS
+            ),
+            timeout=httpx.Timeout(
+                connect=settings.WHATSAPP_CONNECT_TIMEOUT,
+                read=settings.WHATSAPP_READ_TIMEOUT,
+                write=settings.WHATSAPP_WRITE_TIMEOUT,
+                pool=settings.WHATSAPP_POOL_TIMEOUT
+            ),
+            http2=http2
+        )
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        Cliente HTTP compartilhado (criado sob demanda se startup() não foi chamado)
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+        return self._client
+    
+    async def startup(self):
+        """
+        Abre o cliente HTTP compartilhado
+        
+        Se um envio já criou o cliente sob demanda, ele é mantido (substituí-lo
+        deixaria o pool de conexões anterior aberto).
+        """
+        if self._client is not None and not self._client.is_closed:
+            return
+        self._client = self._build_client()
+    
+    async def shutdown(self):
+        """
+        Fecha o cliente HTTP e as conexões do pool
+        """
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
     
     async def send_message(self, to: str, message: str) -> dict:
         """
@@ -28,11 +231,6 @@ class WhatsAppService:
         # Remove caracteres especiais do número
         to_clean = to.replace("+", "").replace("-", "").replace(" ", "").replace("(", "").replace(")", "")
         
-        headers = {
-            "Authorization": f"Bearer {self.api_token}",
-            "Content-Type": "application/json"
-        }
-        
         payload = {
             "messaging_product": "whatsapp",
             "to": to_clean,
@@ -42,18 +240,128 @@ class WhatsAppService:
             }
         }
         
+        # Provedor fora do ar: falha imediata em vez de esperar o timeout
+        if not self.circuit_breaker.allow_request():
+            return {"success": False, "error": "Circuito aberto: provedor do WhatsApp indisponível"}
+        
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    self.api_url,
-                    headers=headers,
-                    json=payload,
-                    timeout=30.0
+            return await self._post_with_retries(payload)
+        except BaseException:
+            # Erro inesperado ou cancelamento: não deixa o circuito preso em half_open
+            self.circuit_breaker.record_failure()
+            raise
+    
+    async def _post_with_retries(self, payload: dict) -> dict:
+        """
+        Envia o payload, repetindo em 429/5xx e falhas de rede até o prazo total
+        """
+        deadline = time.monotonic() + settings.WHATSAPP_SEND_DEADLINE_SECONDS
+        attempt = 0
+        
+        while True:
+            # Respeita a cota de mensagens por segundo do provedor, sem esperar além do prazo
+            if not await self.rate_limiter.acquire(deadline):
+                if attempt == 0:
+                    self.circuit_breaker.release()
+                    return {"success": False, "error": "Prazo de envio esgotado aguardando o limite de taxa"}
+                self.circuit_breaker.record_failure()
+                return {"success": False, "error": error}
+            
+            retry_after = None
+            try:
+                remaining = deadline - time.monotonic()
+                response = await asyncio.wait_for(
+                    self.client.post(self.api_url, json=payload),
+                    timeout=max(remaining, 0.001)
                 )
-                response.raise_for_status()
-                return {"success": True, "data": response.json()}
-        except httpx.HTTPError as e:
-            return {"success": False, "error": str(e)}
+            except (httpx.TransportError, asyncio.TimeoutError) as e:
+                error = str(e) or "Tempo limite excedido ao contatar o provedor"
+            else:
+                if response.is_success:
+                    self.circuit_breaker.record_success()
+                    return {"success": True, "data": response.json()}
+                
+                error = f"HTTP {response.status_code}: {response.text[:200]}"
+                retry_after = self._parse_retry_after(response.headers.get("Retry-After"))
+                
+                if response.status_code != 429 and response.status_code < 500:
+                    # Erro do pedido (ex.: número inválido), não do provedor
+                    self.circuit_breaker.record_success()
+                    return {"success": False, "error": error}
+            
+            delay = self._retry_delay(attempt, retry_after)
+            if attempt >= settings.WHATSAPP_MAX_RETRIES or time.monotonic() + delay >= deadline:
+                self.circuit_breaker.record_failure()
+                return {"success": False, "error": error}
+            
+            attempt += 1
+            self.retries += 1
+            await asyncio.sleep(delay)
+    
+    @staticmethod
+    def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """
+        Interpreta o header Retry-After (segundos ou data HTTP)
+        """
+        if not value:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    
+    @staticmethod
+    def _retry_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Backoff exponencial com jitter; o Retry-After do provedor tem prioridade
+        """
+        if retry_after is not None:
+            return retry_after
+        cap = min(settings.WHATSAPP_RETRY_MAX_DELAY, settings.WHATSAPP_RETRY_BASE_DELAY * 2 ** attempt)
+        return random.uniform(0, cap)
+    
+    def stats(self) -> dict:
+        """
+        Estado do circuit breaker e contadores de envio, para monitoramento
+        """
+        return {
+            "circuit_breaker": self.circuit_breaker.snapshot(),
+            "retries": self.retries
+        }
+    
+    async def dispatch_batch(self, sends: Iterable[Awaitable[dict]]) -> dict:
+        """
+        Executa um lote de envios com concorrência limitada
+        
+        Args:
+            sends: Envios a executar (ex.: chamadas a send_reminder ainda não aguardadas)
+        
+        Returns:
+            dict com total, enviados, falhas e o resultado de cada envio
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        async def run(send: Awaitable[dict]) -> dict:
+            async with semaphore:
+                try:
+                    return await send
+                except Exception as e:
+                    return {"success": False, "error": str(e)}
+        
+        results = await asyncio.gather(*(run(send) for send in sends))
+        sent = sum(1 for result in results if result.get("success"))
+        
+        return {
+            "total": len(results),
+            "sent": sent,
+            "failed": len(results) - sent,
+            "results": results
+        }
     
     async def send_order_confirmation(
         self,
@@ -0,0 +1,126 @@
+import os
+import socket
+import threading
+import uuid
+import logging
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy.exc import IntegrityError
+from app.core.database import SessionLocal
+from app.models.scheduler_lock import SchedulerLock
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderLock:
+    """
+    Lock distribuído com lease, gravado na tabela scheduler_locks
+    
+    Garante que apenas uma instância (worker/réplica) execute uma tarefa.
+    O lease expira sozinho se a instância morrer; enquanto válido, as demais
+    instâncias pulam a execução mesmo que seus relógios estejam defasados.
+    Tarefas longas usam heartbeat() para renovar o lease enquanto rodam.
+    """
+    
+    def __init__(self, name: str, lease_seconds: int, session_factory=SessionLocal):
+        self.name = name
+        self.lease_seconds = lease_seconds
+        self.session_factory = session_factory
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    
+    def acquire(self) -> bool:
+        """
+        Tenta obter o lock; retorna False se o lease ainda é válido, inclusive
+        quando o dono é esta mesma instância (a tarefa já está em execução)
+        """
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.lease_seconds)
+        
+        db = self.session_factory()
+        try:
+            # UPDATE condicional é atômico: só um worker assume um lease expirado
+            updated = db.query(SchedulerLock).filter(
+                SchedulerLock.name == self.name,
+                SchedulerLock.expires_at <= now
+            ).update(
+                {"owner": self.owner, "acquired_at": now, "expires_at": expires_at},
+                synchronize_session=False
+            )
+            
+            if updated:
+                db.commit()
+                return True
+            
+            # Primeira execução: cria a linha do lock
+            db.add(SchedulerLock(
+                name=self.name,
+                owner=self.owner,
+                acquired_at=now,
+                expires_at=expires_at
+            ))
+            try:
+                db.commit()
+                return True
+            except IntegrityError:
+                db.rollback()
+                return False
+        finally:
+            db.close()
+    
+    def renew(self) -> bool:
+        """
+        Estende o lease de quem já detém o lock; retorna False se ele foi perdido
+        """
+        db = self.session_factory()
+        try:
+            updated = db.query(SchedulerLock).filter(
+                SchedulerLock.name == self.name,
+                SchedulerLock.owner == self.owner
+            ).update(
+                {"expires_at": datetime.utcnow() + timedelta(seconds=self.lease_seconds)},
+                synchronize_session=False
+            )
+            db.commit()
+            return bool(updated)
+        finally:
+            db.close()
+    
+    @contextmanager
+    def heartbeat(self, interval: Optional[float] = None):
+        """
+        Renova o lease em uma thread a cada `interval` segundos (padrão: um
+        terço do lease) enquanto o bloco executa
+        """
+        interval = interval or self.lease_seconds / 3
+        stop = threading.Event()
+        
+        def renew_loop():
+            while not stop.wait(interval):
+                try:
+                    if not self.renew():
+                        logger.warning(f"Lock {self.name} perdido durante a execução")
+                except Exception as e:
+                    logger.error(f"Erro ao renovar o lock {self.name}: {str(e)}")
+        
+        thread = threading.Thread(target=renew_loop, name=f"lock-heartbeat-{self.name}", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+    
+    def release(self):
+        """
+        Libera o lock imediatamente (usado quando a tarefa falha e pode ser refeita)
+        """
+        db = self.session_factory()
+        try:
+            db.query(SchedulerLock).filter(
+                SchedulerLock.name == self.name,
+                SchedulerLock.owner == self.owner
+            ).update({"expires_at": datetime.utcnow()}, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
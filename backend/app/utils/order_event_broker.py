@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import time
+from contextlib import suppress
+from typing import Optional, Set
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.order_events import order_event_service
+
+logger = logging.getLogger(__name__)
+
+# Eventos aguardando envio por cliente antes de ele ser desconectado
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+
+class Subscription:
+    """
+    Fila de eventos de um cliente conectado ao stream
+    """
+    
+    def __init__(self, start_id: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        
+        # Último evento publicado antes da inscrição; os seguintes chegam pela fila
+        self.start_id = start_id
+        
+        # Cliente lento demais: o stream é encerrado e ele retoma pelo Last-Event-ID
+        self.dropped = False
+
+
+class OrderEventBroker:
+    """
+    Distribui os eventos de pedidos aos clientes conectados nesta instância
+    
+    Uma única consulta por intervalo busca os eventos novos, independente de
+    quantos clientes estão conectados; sem clientes, não consulta o banco.
+    """
+    
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._subscriptions: Set[Subscription] = set()
+        self._last_event_id: Optional[int] = None
+        self._gap_since: Optional[float] = None
+    
+    def subscribe(self, db: Session) -> Subscription:
+        """
+        Registra um cliente e inicia o polling, se ainda não estiver rodando
+        """
+        if self._last_event_id is None:
+            self._last_event_id = order_event_service.latest_id(db)
+        
+        subscription = Subscription(self._last_event_id)
+        self._subscriptions.add(subscription)
+        
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+        
+        return subscription
+    
+    def unsubscribe(self, subscription: Subscription):
+        self._subscriptions.discard(subscription)
+    
+    def publish(self, message: dict):
+        """
+        Entrega o evento a todos os clientes conectados
+        """
+        for subscription in list(self._subscriptions):
+            try:
+                subscription.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                subscription.dropped = True
+                self._subscriptions.discard(subscription)
+    
+    @staticmethod
+    def _fetch_after(last_event_id: int) -> list:
+        """
+        Consulta síncrona dos eventos novos (roda numa thread, fora do event loop)
+        """
+        db = SessionLocal()
+        try:
+            return order_event_service.fetch_after(db, last_event_id)
+        finally:
+            db.close()
+    
+    async def poll_once(self) -> int:
+        """
+        Busca e publica os eventos gravados desde a última consulta
+        
+        A consulta roda numa thread; a publicação nas filas, que não são
+        thread-safe, continua no event loop.
+        
+        Returns:
+            Quantidade de eventos publicados
+        """
+        if not self._subscriptions:
+            # Ao voltar a ter clientes, recomeça do evento mais recente
+            self._last_event_id = None
+            return 0
+        
+        events = await asyncio.to_thread(self._fetch_after, self._last_event_id)
+        
+        published = 0
+        for event in events:
+            if event.id != self._last_event_id + 1:
+                # Os IDs são atribuídos antes do commit: um ID menor pode pertencer
+                # a uma transação ainda em andamento. Aguarda um pouco antes de
+                # pular o buraco (que também surge de transações desfeitas)
+                now = time.monotonic()
+                if self._gap_since is None:
+                    self._gap_since = now
+                if now - self._gap_since < settings.ORDER_EVENTS_GAP_GRACE_SECONDS:
+                    break
+            
+            self._gap_since = None
+            self.publish(order_event_service.serialize(event))
+            self._last_event_id = event.id
+            published += 1
+        
+        return published
+    
+    async def run(self):
+        """
+        Loop de polling; sem espera enquanto houver eventos acumulados
+        """
+        while True:
+            try:
+                published = await self.poll_once()
+            except Exception as e:
+                logger.error(f"Erro ao buscar eventos de pedidos: {str(e)}")
+                published = 0
+            
+            if published < settings.ORDER_EVENTS_CATCH_UP_LIMIT:
+                await asyncio.sleep(settings.ORDER_EVENTS_POLL_INTERVAL_SECONDS)
+    
+    async def shutdown(self):
+        """
+        Para o polling
+        """
+        if self._task is None:
+            return
+        
+        self._task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+        logger.info("Stream de eventos de pedidos finalizado")
+
+
+# Instância singleton
+order_event_broker = OrderEventBroker()
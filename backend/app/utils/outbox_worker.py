@@ -0,0 +1,71 @@
+import asyncio
+import logging
+from contextlib import suppress
+from typing import Optional
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.outbox import outbox_service
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxWorker:
+    """
+    Tarefa em segundo plano que drena o outbox de notificações
+    """
+    
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+    
+    async def process_once(self) -> int:
+        """
+        Processa um lote de mensagens pendentes
+        """
+        db = SessionLocal()
+        try:
+            return await outbox_service.process_pending(db)
+        finally:
+            db.close()
+    
+    async def run(self):
+        """
+        Loop principal: processa lotes enquanto houver mensagens e
+        aguarda o intervalo de polling quando o outbox esvazia
+        """
+        while True:
+            try:
+                processed = await self.process_once()
+            except Exception as e:
+                logger.error(f"Erro ao processar outbox: {str(e)}")
+                processed = 0
+            
+            if processed < settings.OUTBOX_BATCH_SIZE:
+                await asyncio.sleep(settings.OUTBOX_POLL_INTERVAL_SECONDS)
+    
+    def start(self):
+        """
+        Inicia o worker no event loop atual
+        """
+        if not settings.OUTBOX_ENABLED:
+            logger.info("Worker do outbox desabilitado nas configurações")
+            return
+        
+        self._task = asyncio.create_task(self.run())
+        logger.info("Worker do outbox iniciado")
+    
+    async def shutdown(self):
+        """
+        Para o worker
+        """
+        if self._task is None:
+            return
+        
+        self._task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+        logger.info("Worker do outbox finalizado")
+
+
+# Instância singleton
+outbox_worker = OutboxWorker()
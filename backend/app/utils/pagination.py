@@ -0,0 +1,103 @@
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_, literal, String
+from sqlalchemy.orm import Query
+
+# Header com o cursor da próxima página
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: list) -> str:
+    """
+    Gera o token opaco com os valores da chave da última linha da página
+    """
+    encoded = [{"dt": value.isoformat()} if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(encoded).encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, size: int) -> list:
+    """
+    Lê o token gerado por encode_cursor; token inválido resulta em 400
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != size:
+            raise ValueError
+        return [
+            datetime.fromisoformat(value["dt"]) if isinstance(value, dict) else value
+            for value in values
+        ]
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginação inválido"
+        )
+
+
+def _param(value, dialect_name: str):
+    """
+    No SQLite as datas são texto: o parâmetro vai no mesmo formato ISO da
+    coluna (CURRENT_TIMESTAMP grava sem microssegundos, como o isoformat de
+    um valor sem eles), e a coluna é comparada direto, usando o índice
+    """
+    if dialect_name == "sqlite" and isinstance(value, datetime):
+        return literal(value.isoformat(sep=" "), String)
+    return value
+
+
+def keyset_query(query: Query, keys: List[Tuple[object, bool]], cursor: Optional[str]) -> Query:
+    """
+    Aplica a ordenação pelas chaves e, se houver cursor, o filtro que
+    continua logo após a última linha da página anterior
+    """
+    if cursor:
+        values = decode_cursor(cursor, len(keys))
+        dialect_name = query.session.get_bind().dialect.name
+
+        # (a, b) > (x, y) expandido em OR de prefixos, respeitando a direção de cada coluna
+        params = [_param(value, dialect_name) for value in values]
+        conditions = []
+        for i, ((column, descending), value) in enumerate(zip(keys, params)):
+            prefix = [prev_column == prev_value for (prev_column, _), prev_value in zip(keys[:i], params[:i])]
+            conditions.append(and_(*prefix, column < value if descending else column > value))
+        query = query.filter(or_(*conditions))
+
+    return query.order_by(*[column.desc() if descending else column.asc() for column, descending in keys])
+
+
+def paginate(
+    query: Query,
+    keys: List[Tuple[object, bool]],
+    cursor: Optional[str],
+    limit: int,
+    offset: int = 0
+) -> Tuple[list, Optional[str]]:
+    """
+    Paginação por chave (keyset): continua logo após a última linha da
+    página anterior, então qualquer página custa o mesmo que a primeira
+
+    Args:
+        query: Consulta base (com filtros)
+        keys: Colunas da ordenação e se são decrescentes; a última deve ser única (ex.: id)
+        cursor: Token da página anterior (None para a primeira página)
+        limit: Tamanho da página
+        offset: Linhas a pular (compatibilidade com `skip`; ignorado com cursor)
+
+    Returns:
+        Tupla (linhas da página, cursor da próxima página ou None)
+    """
+    query = keyset_query(query, keys, cursor)
+    if offset and not cursor:
+        query = query.offset(offset)
+    rows = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([getattr(rows[-1], column.key) for column, _ in keys])
+
+    return rows, next_cursor
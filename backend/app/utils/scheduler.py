@@ -1,8 +1,18 @@
+import asyncio
+import threading
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+from datetime import datetime
 from app.core.config import settings
 from app.core.database import SessionLocal
 from app.services.notifications import notification_service
+from app.services.consumption import consumption_learning_service
+from app.services.idempotency import idempotency_service
+from app.services.order_events import order_event_service
+from app.services.stats import stats_service
+from app.services.sales import sales_rollup_service
+from app.utils.locks import LeaderLock
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,21 +25,164 @@ class ReminderScheduler:
     
     def __init__(self):
         self.scheduler = AsyncIOScheduler()
+        self.lock = LeaderLock("daily_reminders", settings.REMINDER_LOCK_LEASE_SECONDS)
+        self.learning_lock = LeaderLock("consumption_learning", settings.REMINDER_LOCK_LEASE_SECONDS)
+        self.sales_lock = LeaderLock("sales_rollup_catch_up", self._interval_lease(settings.SALES_ROLLUP_CATCH_UP_MINUTES))
+        self.stats_lock = LeaderLock("reconcile_stats", self._interval_lease(settings.STATS_RECONCILE_INTERVAL_MINUTES))
+        
+        # Impedem duas execuções simultâneas no mesmo processo (cron + gatilho manual)
+        self._reminders_running = asyncio.Lock()
+        self._learning_running = threading.Lock()
+    
+    @staticmethod
+    def _interval_lease(minutes: int) -> int:
+        """
+        Lease das tarefas periódicas: vale até pouco antes do próximo disparo,
+        então só uma instância executa a tarefa a cada intervalo
+        """
+        return max(minutes * 60 - 30, 30)
     
     async def send_daily_reminders(self):
         """
         Tarefa agendada para enviar lembretes diários
+        
+        Todas as instâncias disparam a tarefa, mas só a que obtiver o lock a executa.
+        O lock e as consultas rodam em threads para não bloquear o event loop.
+        """
+        if self._reminders_running.locked():
+            logger.info("Lembretes já em execução nesta instância")
+            return
+        
+        async with self._reminders_running:
+            if not await asyncio.to_thread(self.lock.acquire):
+                logger.info("Lembretes já em execução ou executados por outra instância")
+                return
+            
+            db = SessionLocal()
+            try:
+                with self.lock.heartbeat():
+                    logger.info("Iniciando verificação de lembretes...")
+                    result = await notification_service.check_and_send_reminders(db)
+                logger.info(
+                    f"Lembretes enviados: {result['reminders_sent']} "
+                    f"(falhas: {result['reminders_failed']})"
+                )
+            except Exception as e:
+                logger.error(f"Erro ao enviar lembretes: {str(e)}")
+                # Libera o lock para que a execução possa ser refeita
+                await asyncio.to_thread(self.lock.release)
+            finally:
+                db.close()
+    
+    def learn_consumption_patterns(self):
+        """
+        Tarefa agendada que recalcula o padrão de consumo aprendido
+        (executada fora do event loop pelo executor do agendador)
+        """
+        if not self._learning_running.acquire(blocking=False):
+            logger.info("Aprendizado de consumo já em execução nesta instância")
+            return
+        
+        try:
+            if not self.learning_lock.acquire():
+                logger.info("Aprendizado de consumo já executado por outra instância")
+                return
+            
+            db = SessionLocal()
+            try:
+                with self.learning_lock.heartbeat():
+                    logger.info("Iniciando aprendizado do padrão de consumo...")
+                    result = consumption_learning_service.learn_intervals(db)
+                logger.info(
+                    f"Padrão de consumo aprendido para {result['customers_updated']} clientes "
+                    f"({result['orders_scanned']} entregas analisadas)"
+                )
+            except Exception as e:
+                logger.error(f"Erro ao aprender padrão de consumo: {str(e)}")
+                self.learning_lock.release()
+            finally:
+                db.close()
+        finally:
+            self._learning_running.release()
+    
+    def purge_expired_records(self):
+        """
+        Tarefa agendada que remove chaves de idempotência e eventos de pedidos expirados
         """
         db = SessionLocal()
         try:
-            logger.info("Iniciando verificação de lembretes...")
-            result = await notification_service.check_and_send_reminders(db)
-            logger.info(f"Lembretes enviados: {result['reminders_sent']}")
+            keys = idempotency_service.purge_expired(db)
+            events = order_event_service.purge_expired(db)
+            logger.info(f"Registros expirados removidos: {keys} chaves de idempotência, {events} eventos de pedidos")
         except Exception as e:
-            logger.error(f"Erro ao enviar lembretes: {str(e)}")
+            logger.error(f"Erro ao remover registros expirados: {str(e)}")
         finally:
             db.close()
     
+    def reconcile_stats(self):
+        """
+        Tarefa agendada que recalcula os contadores do dashboard
+        """
+        if not self.stats_lock.acquire():
+            logger.info("Estatísticas já reconciliadas por outra instância neste intervalo")
+            return
+        
+        db = SessionLocal()
+        try:
+            with self.stats_lock.heartbeat():
+                corrections = stats_service.reconcile(db)
+            if corrections:
+                logger.info(f"Contadores do dashboard corrigidos: {corrections}")
+        except Exception as e:
+            logger.error(f"Erro ao reconciliar estatísticas: {str(e)}")
+            self.stats_lock.release()
+        finally:
+            db.close()
+    
+    def catch_up_sales_rollup(self):
+        """
+        Tarefa agendada que soma à consolidação de vendas as entregas ainda não consolidadas
+        """
+        if not self.sales_lock.acquire():
+            logger.info("Consolidação de vendas já executada por outra instância neste intervalo")
+            return
+        
+        db = SessionLocal()
+        try:
+            total = 0
+            with self.sales_lock.heartbeat():
+                while True:
+                    processed = sales_rollup_service.catch_up(db)
+                    total += processed
+                    if processed < settings.SALES_ROLLUP_BATCH_SIZE:
+                        break
+            if total:
+                logger.info(f"Consolidação de vendas: {total} entregas somadas")
+        except Exception as e:
+            logger.error(f"Erro ao consolidar vendas: {str(e)}")
+            self.sales_lock.release()
+        finally:
+            db.close()
+    
+    async def resume_interrupted_run(self):
+        """
+        Retoma a execução do dia caso tenha sido interrompida (queda ou erro)
+        
+        Verificada periodicamente: enquanto o lease da instância que caiu não
+        vence, o lock recusa a retomada e a próxima verificação tenta de novo.
+        """
+        def find_interrupted():
+            db = SessionLocal()
+            try:
+                return notification_service.get_interrupted_run(db)
+            finally:
+                db.close()
+        
+        interrupted = await asyncio.to_thread(find_interrupted)
+        if interrupted:
+            logger.info(f"Retomando execução de lembretes interrompida (#{interrupted.id})")
+            await self.send_daily_reminders()
+    
     def start(self):
         """
         Inicia o agendador
@@ -50,6 +203,55 @@ class ReminderScheduler:
             replace_existing=True
         )
         
+        # Agenda o aprendizado diário do padrão de consumo (antes dos lembretes)
+        if settings.CONSUMPTION_LEARNING_ENABLED:
+            self.scheduler.add_job(
+                self.learn_consumption_patterns,
+                CronTrigger(hour=settings.CONSUMPTION_LEARNING_HOUR, minute=0),
+                id="consumption_learning",
+                name="Aprendizado do padrão de consumo",
+                replace_existing=True
+            )
+        
+        # Limpeza de hora em hora das chaves de idempotência e eventos expirados
+        self.scheduler.add_job(
+            self.purge_expired_records,
+            CronTrigger(minute=30),
+            id="purge_expired_records",
+            name="Limpeza de registros expirados",
+            replace_existing=True
+        )
+        
+        # Reconciliação periódica dos contadores (a primeira na inicialização)
+        self.scheduler.add_job(
+            self.reconcile_stats,
+            IntervalTrigger(minutes=settings.STATS_RECONCILE_INTERVAL_MINUTES),
+            id="reconcile_stats",
+            name="Reconciliação das estatísticas",
+            next_run_time=datetime.now(),
+            replace_existing=True
+        )
+        
+        # Consolidação de vendas das entregas não registradas pelo OrderService (a primeira na inicialização)
+        self.scheduler.add_job(
+            self.catch_up_sales_rollup,
+            IntervalTrigger(minutes=settings.SALES_ROLLUP_CATCH_UP_MINUTES),
+            id="sales_rollup_catch_up",
+            name="Consolidação das vendas diárias",
+            next_run_time=datetime.now(),
+            replace_existing=True
+        )
+        
+        # Verifica periodicamente (a primeira na inicialização) se há execução a retomar
+        self.scheduler.add_job(
+            self.resume_interrupted_run,
+            IntervalTrigger(minutes=settings.REMINDER_RESUME_CHECK_MINUTES),
+            id="resume_reminders",
+            next_run_time=datetime.now(),
+            name="Retomada de lembretes interrompidos",
+            replace_existing=True
+        )
+        
         self.scheduler.start()
         logger.info(f"Agendador iniciado - Lembretes serão enviados às {settings.REMINDER_CHECK_HOUR}:{settings.REMINDER_CHECK_MINUTE:02d}")
     
@@ -0,0 +1,148 @@
+import csv
+import io
+from typing import Iterable, Iterator, List, Sequence, Type
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import Boolean, Date, DateTime, Float, Integer
+from sqlalchemy.orm import Query, Session
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet é opcional (pip install pyarrow)
+    pa = None
+    pq = None
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+CSV_MEDIA_TYPE = "text/csv; charset=utf-8"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+
+# Linhas buscadas do banco por vez durante o streaming
+STREAM_CHUNK_SIZE = 500
+
+
+def wants_ndjson(request: Request) -> bool:
+    """
+    Indica se o cliente pediu a resposta em NDJSON (um objeto JSON por linha)
+    """
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def ndjson_response(
+    db: Session,
+    query: Query,
+    schema: Type[BaseModel],
+    chunk_size: int = STREAM_CHUNK_SIZE
+) -> StreamingResponse:
+    """
+    Serializa o resultado da consulta linha a linha, sem montar a lista inteira
+
+    A consulta é lida com yield_per (cursor do lado do servidor no PostgreSQL),
+    então a memória fica constante independente do tamanho do resultado.
+    """
+    def generate() -> Iterator[str]:
+        # O get_db fecha a sessão antes do corpo ser enviado; a consulta reabre
+        # uma conexão, que é devolvida ao pool ao fim do streaming
+        try:
+            for row in query.yield_per(chunk_size):
+                yield schema.model_validate(row).model_dump_json() + "\n"
+        finally:
+            db.close()
+
+    return StreamingResponse(generate(), media_type=NDJSON_MEDIA_TYPE)
+
+
+def parquet_available() -> bool:
+    """
+    Indica se o pyarrow está instalado (necessário para exportar Parquet)
+    """
+    return pa is not None
+
+
+def iter_csv(columns: Sequence[str], chunks: Iterable[Sequence[tuple]]) -> Iterator[str]:
+    """
+    Escreve o CSV bloco a bloco: cada bloco de linhas vira um pedaço da resposta
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    
+    writer.writerow(columns)
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+class _ChunkSink:
+    """
+    Destino do ParquetWriter que guarda os bytes até o próximo envio
+
+    Mantém a posição absoluta (tell), usada pelo writer nos offsets do rodapé.
+    """
+    
+    def __init__(self):
+        self.parts: List[bytes] = []
+        self.position = 0
+        self.closed = False
+    
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.parts.append(data)
+        self.position += len(data)
+        return len(data)
+    
+    def tell(self) -> int:
+        return self.position
+    
+    def flush(self):
+        pass
+    
+    def close(self):
+        self.closed = True
+    
+    def drain(self) -> bytes:
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+
+def _arrow_type(column_type):
+    """
+    Tipo Arrow correspondente ao tipo SQLAlchemy da coluna
+    """
+    if isinstance(column_type, Boolean):
+        return pa.bool_()
+    if isinstance(column_type, Integer):
+        return pa.int64()
+    if isinstance(column_type, Float):
+        return pa.float64()
+    if isinstance(column_type, DateTime):
+        return pa.timestamp("us", tz="UTC" if column_type.timezone else None)
+    if isinstance(column_type, Date):
+        return pa.date32()
+    return pa.string()
+
+
+def iter_parquet(columns: Sequence, chunks: Iterable[Sequence[tuple]]) -> Iterator[bytes]:
+    """
+    Escreve o Parquet com um row group por bloco de linhas
+
+    Args:
+        columns: Colunas da consulta (selected_columns), para nomes e tipos
+        chunks: Blocos de linhas na ordem das colunas
+    """
+    schema = pa.schema([(column.name, _arrow_type(column.type)) for column in columns])
+    sink = _ChunkSink()
+    
+    with pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema) as writer:
+        for rows in chunks:
+            arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            yield sink.drain()
+    
+    yield sink.drain()
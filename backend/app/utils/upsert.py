@@ -0,0 +1,38 @@
+from datetime import datetime
+from typing import List
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+
+def upsert(
+    db: Session,
+    model,
+    rows: List[dict],
+    index_elements: List[str],
+    columns: List[str],
+    increment: bool = False
+):
+    """
+    INSERT ... ON CONFLICT em um único executemany (PostgreSQL e SQLite)
+    
+    Args:
+        model: Modelo com restrição única em `index_elements`
+        rows: Linhas a gravar
+        columns: Colunas atualizadas quando a linha já existe
+        increment: Soma os valores aos existentes em vez de substituí-los
+    """
+    if not rows:
+        return
+    
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    stmt = dialect.insert(model)
+    table = model.__table__
+    
+    values = {
+        column: table.c[column] + stmt.excluded[column] if increment else stmt.excluded[column]
+        for column in columns
+    }
+    if "updated_at" in table.c:
+        values["updated_at"] = datetime.utcnow()
+    
+    db.execute(stmt.on_conflict_do_update(index_elements=index_elements, set_=values), rows)
@@ -0,0 +1,83 @@
+"""
+Servidor local que simula a WhatsApp Business API para testes de carga
+
+Aceita o mesmo payload enviado por WhatsAppService.send_message e permite
+injetar latência, erros 5xx e respostas 429 (com Retry-After).
+
+Uso:
+    FAKE_WHATSAPP_LATENCY_MS=80 FAKE_WHATSAPP_ERROR_RATE=0.01 \\
+        uvicorn benchmarks.fake_whatsapp:app --port 9000
+
+    WHATSAPP_API_URL=http://127.0.0.1:9000/v1/messages
+"""
+import asyncio
+import os
+import random
+import uuid
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+def create_app(
+    latency_ms: float = 50.0,
+    jitter_ms: float = 20.0,
+    error_rate: float = 0.0,
+    throttle_rate: float = 0.0,
+    retry_after_seconds: float = 1.0
+) -> FastAPI:
+    """
+    Cria a aplicação do provedor falso com o comportamento informado
+    """
+    fake = FastAPI(title="Fake WhatsApp Business API")
+    fake.state.stats = {"received": 0, "accepted": 0, "errors": 0, "throttled": 0, "invalid": 0}
+
+    @fake.post("/v1/messages")
+    async def send_message(request: Request):
+        stats = fake.state.stats
+        stats["received"] += 1
+
+        payload = await request.json()
+        if (
+            payload.get("messaging_product") != "whatsapp"
+            or not str(payload.get("to", "")).isdigit()
+            or payload.get("type") != "text"
+            or not payload.get("text", {}).get("body")
+        ):
+            stats["invalid"] += 1
+            return JSONResponse(status_code=400, content={"error": {"message": "Payload inválido"}})
+
+        await asyncio.sleep(max(latency_ms + random.uniform(-jitter_ms, jitter_ms), 0) / 1000)
+
+        roll = random.random()
+        if roll < throttle_rate:
+            stats["throttled"] += 1
+            return JSONResponse(
+                status_code=429,
+                headers={"Retry-After": str(retry_after_seconds)},
+                content={"error": {"message": "Too many requests"}}
+            )
+        if roll < throttle_rate + error_rate:
+            stats["errors"] += 1
+            return JSONResponse(status_code=503, content={"error": {"message": "Service unavailable"}})
+
+        stats["accepted"] += 1
+        return {
+            "messaging_product": "whatsapp",
+            "contacts": [{"input": payload["to"], "wa_id": payload["to"]}],
+            "messages": [{"id": f"wamid.{uuid.uuid4().hex}"}]
+        }
+
+    @fake.get("/stats")
+    def get_stats():
+        return fake.state.stats
+
+    return fake
+
+
+app = create_app(
+    latency_ms=float(os.getenv("FAKE_WHATSAPP_LATENCY_MS", "50")),
+    jitter_ms=float(os.getenv("FAKE_WHATSAPP_JITTER_MS", "20")),
+    error_rate=float(os.getenv("FAKE_WHATSAPP_ERROR_RATE", "0")),
+    throttle_rate=float(os.getenv("FAKE_WHATSAPP_THROTTLE_RATE", "0")),
+    retry_after_seconds=float(os.getenv("FAKE_WHATSAPP_RETRY_AFTER", "1"))
+)
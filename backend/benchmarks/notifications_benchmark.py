@@ -0,0 +1,256 @@
+"""
+Benchmark do fluxo de notificações contra o provedor falso do WhatsApp
+
+Popula N clientes com histórico de entregas, sobe o provedor falso
+(benchmarks/fake_whatsapp.py) em segundo plano e mede:
+- latência de criação de pedidos (POST /api/v1/orders/)
+- vazão da execução diária de lembretes
+- vazão do worker do outbox (confirmações de pedido)
+
+Uso:
+    python -m benchmarks.notifications_benchmark --customers 5000 --orders 500 \\
+        --latency-ms 80 --error-rate 0.01 --rate-limit 200
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import threading
+import time
+from datetime import datetime, timedelta
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark do fluxo de notificações")
+    parser.add_argument("--database-url", default="sqlite:///./benchmark.db")
+    parser.add_argument("--customers", type=int, default=2000)
+    parser.add_argument("--history", type=int, default=5, help="Entregas concluídas por cliente")
+    parser.add_argument("--orders", type=int, default=200, help="Pedidos criados via API")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=100.0, help="Mensagens por segundo")
+    parser.add_argument("--concurrency", type=int, default=20)
+    return parser.parse_args()
+
+
+def configure_environment(args):
+    """
+    Configura o ambiente antes de importar a aplicação (Settings lê as variáveis na importação)
+    """
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ["WHATSAPP_API_URL"] = f"http://127.0.0.1:{args.port}/v1/messages"
+    os.environ.setdefault("WHATSAPP_API_TOKEN", "benchmark")
+    os.environ.setdefault("WHATSAPP_PHONE_NUMBER_ID", "benchmark")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ["WHATSAPP_RATE_LIMIT_PER_SECOND"] = str(args.rate_limit)
+    os.environ["WHATSAPP_RATE_LIMIT_BURST"] = str(max(int(args.rate_limit), 1))
+    os.environ["WHATSAPP_MAX_CONCURRENCY"] = str(args.concurrency)
+    os.environ["SCHEDULER_ENABLED"] = "False"
+    os.environ["OUTBOX_ENABLED"] = "False"
+
+
+def start_fake_provider(args):
+    """
+    Sobe o provedor falso em uma thread e aguarda ele aceitar conexões
+    """
+    import uvicorn
+    from benchmarks.fake_whatsapp import create_app
+
+    fake_app = create_app(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate
+    )
+    server = uvicorn.Server(uvicorn.Config(fake_app, host="127.0.0.1", port=args.port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+
+    while not server.started:
+        time.sleep(0.05)
+    return server, fake_app
+
+
+def seed(session_factory, customers: int, history: int):
+    """
+    Cria clientes com entregas concluídas, todos com lembrete vencido
+    """
+    from sqlalchemy import insert
+    from app.models.customer import Customer
+    from app.models.order import Order
+    from app.models.product import Product
+
+    now = datetime.utcnow()
+    db = session_factory()
+    try:
+        db.execute(insert(Product), [{
+            "name": "Botijão P13",
+            "price": 110.0,
+            "product_type": "gas",
+            "stock_quantity": 10 ** 9,
+            "is_active": True
+        }])
+
+        for start in range(0, customers, 1000):
+            batch = range(start, min(start + 1000, customers))
+            db.execute(insert(Customer), [{
+                "id": i + 1,
+                "name": f"Cliente {i}",
+                "phone": f"5527{i:09d}",
+                "address": "Rua do Benchmark, 1",
+                "consumption_pattern_days": 30,
+                "next_reminder_due_at": now - timedelta(days=1)
+            } for i in batch])
+            db.execute(insert(Order), [{
+                "customer_id": i + 1,
+                "status": "concluido",
+                "total_amount": 110.0,
+                "delivered_at": now - timedelta(days=28 + 30 * k)
+            } for i in batch for k in range(history)])
+        db.commit()
+    finally:
+        db.close()
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+
+def benchmark_order_creation(session_factory, orders: int, customers: int) -> dict:
+    """
+    Mede a latência de POST /api/v1/orders/ pela aplicação completa
+    """
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.core.database import get_db
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    client = TestClient(app)
+
+    client.post("/api/v1/auth/register", json={
+        "email": "benchmark@example.com",
+        "full_name": "Benchmark",
+        "password": "benchmark123"
+    })
+    token = client.post("/api/v1/auth/login", data={
+        "username": "benchmark@example.com",
+        "password": "benchmark123"
+    }).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    latencies = []
+    for i in range(orders):
+        start = time.perf_counter()
+        response = client.post("/api/v1/orders/", headers=headers, json={
+            "customer_id": i % customers + 1,
+            "items": [{"product_id": 1, "quantity": 1}]
+        })
+        latencies.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+
+    return {
+        "orders": orders,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "mean_ms": round(statistics.mean(latencies), 2)
+    }
+
+
+async def benchmark_notifications(session_factory) -> dict:
+    """
+    Mede a vazão da execução de lembretes e do worker do outbox
+    """
+    from app.services.notifications import notification_service
+    from app.services.outbox import outbox_service
+    from app.services.whatsapp import whatsapp_service
+
+    await whatsapp_service.startup()
+    db = session_factory()
+    try:
+        start = time.perf_counter()
+        reminders = await notification_service.check_and_send_reminders(db)
+        reminders_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        drained = 0
+        while True:
+            processed = await outbox_service.process_pending(db)
+            if not processed:
+                break
+            drained += processed
+        outbox_elapsed = time.perf_counter() - start
+    finally:
+        db.close()
+        await whatsapp_service.shutdown()
+
+    reminders_total = reminders["reminders_sent"] + reminders["reminders_failed"]
+    return {
+        "reminders": {
+            "sent": reminders["reminders_sent"],
+            "failed": reminders["reminders_failed"],
+            "seconds": round(reminders_elapsed, 2),
+            "messages_per_second": round(reminders_total / reminders_elapsed, 1) if reminders_elapsed else None
+        },
+        "outbox": {
+            "processed": drained,
+            "seconds": round(outbox_elapsed, 2),
+            "messages_per_second": round(drained / outbox_elapsed, 1) if outbox_elapsed else None
+        },
+        "whatsapp": whatsapp_service.stats()
+    }
+
+
+def main():
+    args = parse_args()
+    configure_environment(args)
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.core.database import Base
+    import app.models  # noqa: F401 (registra todas as tabelas)
+
+    # Uma linha de log por requisição distorce a medição
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    connect_args = {"check_same_thread": False} if args.database_url.startswith("sqlite") else {}
+    engine = create_engine(args.database_url, connect_args=connect_args)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    print(f"Populando {args.customers} clientes com {args.history} entregas cada...")
+    seed(session_factory, args.customers, args.history)
+
+    server, fake_app = start_fake_provider(args)
+    try:
+        print(f"Criando {args.orders} pedidos via API...")
+        orders = benchmark_order_creation(session_factory, args.orders, args.customers)
+
+        print("Executando lembretes e drenando o outbox...")
+        notifications = asyncio.run(benchmark_notifications(session_factory))
+    finally:
+        server.should_exit = True
+
+    print()
+    print(f"Criação de pedidos: {orders}")
+    print(f"Lembretes:          {notifications['reminders']}")
+    print(f"Outbox:             {notifications['outbox']}")
+    print(f"WhatsApp:           {notifications['whatsapp']}")
+    print(f"Provedor falso:     {fake_app.state.stats}")
+
+
+if __name__ == "__main__":
+    main()
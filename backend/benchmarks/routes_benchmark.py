@@ -0,0 +1,96 @@
+"""
+Benchmark do planejamento de rotas
+
+Gera paradas aleatórias em torno de um depósito e mede o tempo de cada etapa
+(matriz de distâncias, divisão em cargas, vizinho mais próximo e 2-opt),
+comparando a distância antes e depois do 2-opt.
+
+Uso:
+    python -m benchmarks.routes_benchmark --stops 500 --capacity 20 --runs 5
+"""
+import argparse
+import os
+import statistics
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark do planejamento de rotas")
+    parser.add_argument("--stops", type=int, default=500)
+    parser.add_argument("--capacity", type=int, default=20, help="Unidades por veículo")
+    parser.add_argument("--max-quantity", type=int, default=3, help="Unidades máximas por pedido")
+    parser.add_argument("--radius-km", type=float, default=15.0)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    # Settings exige as variáveis obrigatórias na importação
+    for name in ("DATABASE_URL", "SECRET_KEY", "WHATSAPP_API_URL", "WHATSAPP_API_TOKEN", "WHATSAPP_PHONE_NUMBER_ID"):
+        os.environ.setdefault(name, "sqlite:///./benchmark.db" if name == "DATABASE_URL" else "benchmark")
+
+    import numpy as np
+    from app.services.routes import route_planning_service as service
+
+    rng = np.random.default_rng(args.seed)
+    depot = (-20.3155, -40.3128)
+
+    # Paradas distribuídas uniformemente num círculo em torno do depósito
+    radius = args.radius_km / 111.0 * np.sqrt(rng.random(args.stops))
+    theta = rng.random(args.stops) * 2 * np.pi
+    coordinates = np.column_stack([depot[0] + radius * np.sin(theta), depot[1] + radius * np.cos(theta)])
+    quantities = rng.integers(1, args.max_quantity + 1, args.stops)
+
+    timings = {"plan": [], "matrix": [], "split": [], "nearest_neighbour": [], "two_opt": []}
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        batches = service.plan(coordinates, quantities, depot, args.capacity)
+        timings["plan"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        points = np.vstack([np.array([depot]), coordinates])
+        distances = service.distance_matrix(points)
+        timings["matrix"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        splits = service.split_by_capacity(coordinates, quantities, depot, args.capacity)
+        timings["split"].append(time.perf_counter() - start)
+
+        nn_length = opt_length = 0.0
+        nn_elapsed = opt_elapsed = 0.0
+        for stops in splits:
+            nodes = np.concatenate([[0], stops + 1])
+            sub = distances[np.ix_(nodes, nodes)]
+
+            start = time.perf_counter()
+            tour = service.nearest_neighbour(sub)
+            nn_elapsed += time.perf_counter() - start
+
+            start = time.perf_counter()
+            improved = service.two_opt(tour, sub)
+            opt_elapsed += time.perf_counter() - start
+
+            nn_length += service.tour_length(tour, sub)
+            opt_length += service.tour_length(improved, sub)
+
+        timings["nearest_neighbour"].append(nn_elapsed)
+        timings["two_opt"].append(opt_elapsed)
+
+    # Caso extremo: uma única carga com todas as paradas
+    start = time.perf_counter()
+    single = service.plan(coordinates, quantities, depot, int(quantities.sum()))
+    single_elapsed = time.perf_counter() - start
+
+    print(f"Paradas: {args.stops} | capacidade: {args.capacity} | cargas: {len(batches)}")
+    for name, values in timings.items():
+        print(f"  {name:<18} mediana {statistics.median(values) * 1000:8.1f} ms")
+    print(f"Distância vizinho mais próximo: {nn_length:.1f} km")
+    print(f"Distância após 2-opt:           {opt_length:.1f} km ({(1 - opt_length / nn_length) * 100:.1f}% menor)")
+    print(f"Carga única com {args.stops} paradas: {single_elapsed * 1000:.1f} ms, {single[0]['distance_km']:.1f} km")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Add reminder_runs and reminder_sends ledger
+
+Revision ID: 2d7a4e9c1f08
+Revises: 9f3c61a0b2de
+Create Date: 2026-10-18 11:26:08.331472
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2d7a4e9c1f08'
+down_revision: Union[str, None] = '9f3c61a0b2de'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('reminder_runs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('run_date', sa.Date(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('checkpoint_due_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('checkpoint_customer_id', sa.Integer(), nullable=True),
+    sa.Column('reminders_sent', sa.Integer(), nullable=False),
+    sa.Column('reminders_failed', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('started_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('run_date')
+    )
+    op.create_index(op.f('ix_reminder_runs_id'), 'reminder_runs', ['id'], unique=False)
+    op.create_table('reminder_sends',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('run_id', sa.Integer(), nullable=False),
+    sa.Column('customer_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['customer_id'], ['customers.id'], ),
+    sa.ForeignKeyConstraint(['run_id'], ['reminder_runs.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('run_id', 'customer_id', name='uq_reminder_sends_run_customer')
+    )
+    op.create_index(op.f('ix_reminder_sends_id'), 'reminder_sends', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_reminder_sends_id'), table_name='reminder_sends')
+    op.drop_table('reminder_sends')
+    op.drop_index(op.f('ix_reminder_runs_id'), table_name='reminder_runs')
+    op.drop_table('reminder_runs')
@@ -0,0 +1,28 @@
+"""Add latitude and longitude to customers
+
+Revision ID: 3e5b9a2c7d14
+Revises: a87e4c3d1f56
+Create Date: 2026-10-18 15:40:12.602931
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3e5b9a2c7d14'
+down_revision: Union[str, None] = 'a87e4c3d1f56'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('customers', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('customers', sa.Column('longitude', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('customers', 'longitude')
+    op.drop_column('customers', 'latitude')
@@ -0,0 +1,26 @@
+"""Add outbox.claimed_at
+
+Revision ID: 4a9c2e7b13f6
+Revises: f2b7c4e81d95
+Create Date: 2026-10-18 21:04:17.318452
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4a9c2e7b13f6'
+down_revision: Union[str, None] = 'f2b7c4e81d95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('outbox', sa.Column('claimed_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('outbox', 'claimed_at')
@@ -0,0 +1,26 @@
+"""Add version column to orders
+
+Revision ID: 6c2f08e4b9d7
+Revises: e3a9d5b71c42
+Create Date: 2026-10-18 14:32:09.771540
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6c2f08e4b9d7'
+down_revision: Union[str, None] = 'e3a9d5b71c42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('orders', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('orders', 'version')
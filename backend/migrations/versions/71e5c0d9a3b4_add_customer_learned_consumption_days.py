@@ -0,0 +1,26 @@
+"""Add customers.learned_consumption_days
+
+Revision ID: 71e5c0d9a3b4
+Revises: 2d7a4e9c1f08
+Create Date: 2026-10-18 12:08:44.716093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '71e5c0d9a3b4'
+down_revision: Union[str, None] = '2d7a4e9c1f08'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('customers', sa.Column('learned_consumption_days', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('customers', 'learned_consumption_days')
@@ -0,0 +1,33 @@
+"""Add stat counters table and product stock index
+
+Revision ID: 8d4a6f1e0b37
+Revises: c51d7e93a2f0
+Create Date: 2026-10-18 17:03:52.337604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d4a6f1e0b37'
+down_revision: Union[str, None] = 'c51d7e93a2f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('stat_counters',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('value', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.create_index(op.f('ix_products_stock_quantity'), 'products', ['stock_quantity'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_products_stock_quantity'), table_name='products')
+    op.drop_table('stat_counters')
@@ -0,0 +1,54 @@
+"""Add customers.next_reminder_due_at
+
+Revision ID: 9f3c61a0b2de
+Revises: 5b8e2d4f7a91
+Create Date: 2026-10-18 10:41:55.918204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9f3c61a0b2de'
+down_revision: Union[str, None] = '5b8e2d4f7a91'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('customers', sa.Column('next_reminder_due_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index(op.f('ix_customers_next_reminder_due_at'), 'customers', ['next_reminder_due_at'], unique=False)
+
+    # Preenche a partir da última entrega concluída (padrão de consumo - 3 dias)
+    last_delivery = """
+        SELECT customer_id, MAX(delivered_at) AS last_delivered_at
+        FROM orders
+        WHERE status = 'concluido' AND delivered_at IS NOT NULL
+        GROUP BY customer_id
+    """
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(f"""
+            UPDATE customers
+            SET next_reminder_due_at = ld.last_delivered_at
+                + make_interval(days => COALESCE(customers.consumption_pattern_days, 30) - 3)
+            FROM ({last_delivery}) AS ld
+            WHERE ld.customer_id = customers.id
+        """)
+    else:
+        op.execute(f"""
+            UPDATE customers
+            SET next_reminder_due_at = (
+                SELECT datetime(ld.last_delivered_at,
+                                '+' || (COALESCE(customers.consumption_pattern_days, 30) - 3) || ' days')
+                FROM ({last_delivery}) AS ld
+                WHERE ld.customer_id = customers.id
+            )
+        """)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_customers_next_reminder_due_at'), table_name='customers')
+    op.drop_column('customers', 'next_reminder_due_at')
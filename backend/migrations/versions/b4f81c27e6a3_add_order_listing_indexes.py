@@ -0,0 +1,30 @@
+"""Add composite indexes for order listing
+
+Revision ID: b4f81c27e6a3
+Revises: 71e5c0d9a3b4
+Create Date: 2026-10-18 13:37:20.554817
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4f81c27e6a3'
+down_revision: Union[str, None] = '71e5c0d9a3b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_orders_created_at_id', 'orders', ['created_at', 'id'], unique=False)
+    op.create_index('ix_orders_status_created_at', 'orders', ['status', 'created_at'], unique=False)
+    op.create_index('ix_orders_customer_id_created_at', 'orders', ['customer_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_orders_customer_id_created_at', table_name='orders')
+    op.drop_index('ix_orders_status_created_at', table_name='orders')
+    op.drop_index('ix_orders_created_at_id', table_name='orders')
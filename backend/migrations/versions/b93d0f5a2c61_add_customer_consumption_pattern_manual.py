@@ -0,0 +1,29 @@
+"""Add customers.consumption_pattern_manual
+
+Revision ID: b93d0f5a2c61
+Revises: 4a9c2e7b13f6
+Create Date: 2026-10-18 22:37:05.184290
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b93d0f5a2c61'
+down_revision: Union[str, None] = '4a9c2e7b13f6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'customers',
+        sa.Column('consumption_pattern_manual', sa.Boolean(), server_default=sa.false(), nullable=False)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('customers', 'consumption_pattern_manual')
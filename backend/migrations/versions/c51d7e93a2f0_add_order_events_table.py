@@ -0,0 +1,39 @@
+"""Add order events table
+
+Revision ID: c51d7e93a2f0
+Revises: 3e5b9a2c7d14
+Create Date: 2026-10-18 16:21:35.480117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c51d7e93a2f0'
+down_revision: Union[str, None] = '3e5b9a2c7d14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('order_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=False),
+    sa.Column('event_type', sa.String(), nullable=False),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('previous_status', sa.String(), nullable=True),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_order_events_id'), 'order_events', ['id'], unique=False)
+    op.create_index(op.f('ix_order_events_created_at'), 'order_events', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_order_events_created_at'), table_name='order_events')
+    op.drop_index(op.f('ix_order_events_id'), table_name='order_events')
+    op.drop_table('order_events')
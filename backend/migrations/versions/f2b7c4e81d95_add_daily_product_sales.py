@@ -0,0 +1,49 @@
+"""Add daily product sales rollup and orders.sales_rolled_up_at
+
+Revision ID: f2b7c4e81d95
+Revises: 8d4a6f1e0b37
+Create Date: 2026-10-18 18:21:40.512876
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b7c4e81d95'
+down_revision: Union[str, None] = '8d4a6f1e0b37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('daily_product_sales',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.Column('orders_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.PrimaryKeyConstraint('day', 'product_id')
+    )
+    op.create_index(op.f('ix_daily_product_sales_product_id'), 'daily_product_sales', ['product_id'], unique=False)
+    # Entregas existentes ficam sem marcação e são somadas pela tarefa de consolidação
+    op.add_column('orders', sa.Column('sales_rolled_up_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index(
+        'ix_orders_sales_rollup_pending',
+        'orders',
+        ['id'],
+        unique=False,
+        postgresql_where=sa.text("sales_rolled_up_at IS NULL AND status = 'concluido'"),
+        sqlite_where=sa.text("sales_rolled_up_at IS NULL AND status = 'concluido'")
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_orders_sales_rollup_pending', table_name='orders')
+    op.drop_column('orders', 'sales_rolled_up_at')
+    op.drop_index(op.f('ix_daily_product_sales_product_id'), table_name='daily_product_sales')
+    op.drop_table('daily_product_sales')
@@ -1,9 +1,13 @@
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
 from sqlalchemy.orm import sessionmaker
 from app.main import app
-from app.core.database import Base, get_db
+from app.core.database import Base, get_db, get_async_db
+from fastapi import HTTPException
+from app.core.security import create_access_token, get_current_user, get_current_user_for_stream
 
 # Banco de dados de teste em memória
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -24,6 +28,19 @@ def override_get_db():
 
 app.dependency_overrides[get_db] = override_get_db
 
+# Sessões assíncronas no mesmo arquivo; sem pool, pois cada requisição do
+# TestClient roda em um event loop próprio
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False)
+
+
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
+app.dependency_overrides[get_async_db] = override_get_async_db
+
 client = TestClient(app)
 
 
@@ -118,4 +135,59 @@ def test_login_invalid_credentials():
             "password": "wrongpassword"
         }
     )
-    assert response.status_code == 401
\ No newline at end of file
+    assert response.status_code == 401
+
+@pytest.mark.asyncio
+async def test_current_user_releases_session_after_lookup():
+    """
+    Testa que a autenticação não mantém a transação aberta durante a requisição
+    """
+    user_id = client.post(
+        "/api/v1/auth/register",
+        json={
+            "email": "session@example.com",
+            "full_name": "Session User",
+            "password": "sessionpass123"
+        }
+    ).json()["id"]
+    
+    async with TestingAsyncSessionLocal() as db:
+        user = await get_current_user(create_access_token({"sub": str(user_id)}), db)
+        assert not db.in_transaction()
+        assert user.email == "session@example.com"
+
+
+@pytest.mark.asyncio
+async def test_stream_accepts_only_stream_token_in_url():
+    """
+    Testa que a URL do stream aceita só o token de stream, e que ele não vale nas demais rotas
+    """
+    client.post(
+        "/api/v1/auth/register",
+        json={
+            "email": "stream@example.com",
+            "full_name": "Stream User",
+            "password": "streampass123"
+        }
+    )
+    session_token = client.post(
+        "/api/v1/auth/login",
+        data={"username": "stream@example.com", "password": "streampass123"}
+    ).json()["access_token"]
+    
+    response = client.post("/api/v1/orders/stream/token", headers={"Authorization": f"Bearer {session_token}"})
+    assert response.status_code == 200
+    stream_token = response.json()["access_token"]
+    
+    # Token de stream não autentica as rotas comuns
+    response = client.get("/api/v1/orders/", headers={"Authorization": f"Bearer {stream_token}"})
+    assert response.status_code == 401
+    
+    async with TestingAsyncSessionLocal() as db:
+        user = await get_current_user_for_stream(token=None, access_token=stream_token, db=db)
+        assert user.email == "stream@example.com"
+        
+        # Token de sessão na URL é recusado
+        with pytest.raises(HTTPException) as error:
+            await get_current_user_for_stream(token=None, access_token=session_token, db=db)
+        assert error.value.status_code == 401
@@ -1,9 +1,15 @@
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
 from sqlalchemy.orm import sessionmaker
+from datetime import datetime, timedelta
 from app.main import app
-from app.core.database import Base, get_db
+from app.core.database import Base, get_db, get_async_db
+from app.models.customer import Customer
+from app.models.order import Order
+from app.services.consumption import consumption_learning_service
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 
@@ -23,6 +29,19 @@ def override_get_db():
 
 app.dependency_overrides[get_db] = override_get_db
 
+# Sessões assíncronas no mesmo arquivo; sem pool, pois cada requisição do
+# TestClient roda em um event loop próprio
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False)
+
+
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
+app.dependency_overrides[get_async_db] = override_get_async_db
+
 client = TestClient(app)
 
 
@@ -142,4 +161,55 @@ def test_update_customer(auth_token):
     assert response.status_code == 200
     data = response.json()
     assert data["name"] == "Cliente Atualizado"
-    assert data["consumption_pattern_days"] == 40
\ No newline at end of file
+    assert data["consumption_pattern_days"] == 40
+
+def test_manual_pattern_overrides_learned_interval(auth_token):
+    """
+    Testa que editar o padrão de consumo vale mesmo com intervalo aprendido
+    """
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    customer_id = client.post(
+        "/api/v1/customers/",
+        json={
+            "name": "Cliente Aprendido",
+            "phone": "27999999995",
+            "address": "Endereço",
+            "consumption_pattern_days": 30
+        },
+        headers=headers
+    ).json()["id"]
+    
+    # Histórico com entregas a cada 10 dias (intervalo aprendido)
+    delivered_at = datetime.utcnow().replace(microsecond=0) - timedelta(days=2)
+    db = TestingSessionLocal()
+    try:
+        for i in range(4):
+            db.add(Order(
+                customer_id=customer_id,
+                status="concluido",
+                delivered_at=delivered_at - timedelta(days=10 * i)
+            ))
+        db.commit()
+        consumption_learning_service.learn_intervals(db)
+    finally:
+        db.close()
+    
+    data = client.get(f"/api/v1/customers/{customer_id}", headers=headers).json()
+    assert data["learned_consumption_days"] == 10
+    
+    # Edição manual prevalece, inclusive sobre o aprendizado seguinte
+    data = client.put(f"/api/v1/customers/{customer_id}", json={"consumption_pattern_days": 40}, headers=headers).json()
+    assert data["consumption_pattern_manual"] is True
+    assert datetime.fromisoformat(data["next_reminder_due_at"]) == delivered_at + timedelta(days=37)
+    
+    db = TestingSessionLocal()
+    try:
+        consumption_learning_service.learn_intervals(db)
+        due_at = db.get(Customer, customer_id).next_reminder_due_at
+        assert due_at == delivered_at + timedelta(days=37)
+    finally:
+        db.close()
+    
+    # Desligar a edição manual volta ao intervalo aprendido
+    data = client.put(f"/api/v1/customers/{customer_id}", json={"consumption_pattern_manual": False}, headers=headers).json()
+    assert datetime.fromisoformat(data["next_reminder_due_at"]) == delivered_at + timedelta(days=7)
@@ -0,0 +1,71 @@
+import time
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from app.core.replicas import ReplicaRouter
+from app.utils.db_pool import MeasuredQueuePool, pool_status
+
+
+def test_pool_status_reports_usage_and_timeouts(tmp_path):
+    """
+    Testa as métricas do pool: conexões em uso, overflow e checkouts que expiraram
+    """
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=MeasuredQueuePool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.05
+    )
+
+    first = engine.connect()
+    second = engine.connect()
+    status = pool_status(engine)
+    assert status["checked_out"] == 2
+    assert status["overflow"] == 1
+    assert status["checkouts"] == 2
+
+    with pytest.raises(PoolTimeoutError):
+        engine.connect()
+
+    status = pool_status(engine)
+    assert status["timeouts"] == 1
+    assert status["wait_max_ms"] >= 50
+
+    first.close()
+    second.close()
+    assert pool_status(engine)["checked_out"] == 0
+    engine.dispose()
+
+
+def test_replica_router_rotates_over_healthy_replicas(tmp_path):
+    """
+    Testa o rodízio entre réplicas, pulando a que está fora do ar até a próxima verificação
+    """
+    first = create_engine(f"sqlite:///{tmp_path / 'first.db'}")
+    second = create_engine(f"sqlite:///{tmp_path / 'second.db'}")
+    broken = create_engine(f"sqlite:///{tmp_path / 'missing' / 'broken.db'}")
+    router = ReplicaRouter([first, broken, second], check_interval=60)
+
+    # Antes da primeira verificação nenhuma réplica é usada (pick não verifica)
+    assert router.pick() is None
+    router.check_all()
+
+    assert [router.pick() for _ in range(4)] == [first, second, first, second]
+    assert [replica["healthy"] for replica in router.status()] == [True, False, True]
+
+    router.mark_failed(first)
+    assert [router.pick() for _ in range(2)] == [second, second]
+
+    router.mark_failed(second)
+    assert router.pick() is None
+
+    # A thread de verificação devolve as réplicas ao rodízio
+    router.start()
+    deadline = time.monotonic() + 5
+    healthy = []
+    while healthy != [True, False, True] and time.monotonic() < deadline:
+        time.sleep(0.01)
+        healthy = [replica["healthy"] for replica in router.status()]
+    assert healthy == [True, False, True]
+    router.dispose()
@@ -0,0 +1,347 @@
+import asyncio
+import threading
+import time
+import numpy as np
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.core.database import Base
+from app.models.customer import Customer
+from app.models.order import Order
+from app.models.reminder import ReminderRun, ReminderSend
+from app.models.scheduler_lock import SchedulerLock
+from app.services.consumption import consumption_learning_service
+from app.services.notifications import notification_service
+from app.services.whatsapp import whatsapp_service
+from app.utils import scheduler as scheduler_module
+from app.utils.locks import LeaderLock
+from app.utils.scheduler import ReminderScheduler
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture(autouse=True)
+def setup_database():
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def db():
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def create_customer(db, name, phone, pattern_days, delivered_days_ago=()):
+    """
+    Cria cliente com pedidos concluídos há N dias
+    """
+    customer = Customer(
+        name=name,
+        phone=phone,
+        address="Endereço",
+        consumption_pattern_days=pattern_days
+    )
+    db.add(customer)
+    db.flush()
+
+    for days_ago in delivered_days_ago:
+        db.add(Order(
+            customer_id=customer.id,
+            status="concluido",
+            delivered_at=datetime.utcnow() - timedelta(days=days_ago)
+        ))
+
+    db.flush()
+    notification_service.refresh_next_reminder(db, customer)
+    db.commit()
+    return customer
+
+
+def test_reminder_candidates_only_due_customers(db):
+    """
+    Testa que apenas clientes com lembrete vencido são retornados
+    """
+    due = create_customer(db, "Vencido", "27900000001", 30, delivered_days_ago=[60, 28])
+    create_customer(db, "Recente", "27900000002", 30, delivered_days_ago=[40, 10])
+    create_customer(db, "Sem pedidos", "27900000003", 30)
+
+    candidates = [
+        row
+        for chunk in notification_service.iter_reminder_candidates(db)
+        for row in chunk
+    ]
+
+    assert [row.id for row in candidates] == [due.id]
+    assert (datetime.utcnow() - candidates[0].next_reminder_due_at).days == 1
+
+
+def test_pattern_change_reschedules_reminder(db):
+    """
+    Testa que alterar o padrão de consumo recalcula o próximo lembrete
+    """
+    customer = create_customer(db, "Cliente", "27900000004", 30, delivered_days_ago=[20])
+    assert not list(notification_service.iter_reminder_candidates(db))
+
+    customer.consumption_pattern_days = 15
+    notification_service.refresh_next_reminder(db, customer)
+    db.commit()
+
+    candidates = [row for chunk in notification_service.iter_reminder_candidates(db) for row in chunk]
+    assert [row.id for row in candidates] == [customer.id]
+
+
+def test_reminder_candidates_streamed_in_chunks(db):
+    """
+    Testa que os candidatos são entregues em blocos do tamanho solicitado
+    """
+    for i in range(5):
+        create_customer(db, f"Cliente {i}", f"2790000001{i}", 10, delivered_days_ago=[20])
+
+    chunks = list(notification_service.iter_reminder_candidates(db, chunk_size=2))
+
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+
+
+def test_leader_lock_allows_single_owner():
+    """
+    Testa que apenas uma instância obtém o lock enquanto o lease é válido
+    """
+    first = LeaderLock("daily_reminders", 60, session_factory=TestingSessionLocal)
+    second = LeaderLock("daily_reminders", 60, session_factory=TestingSessionLocal)
+
+    assert first.acquire()
+    assert not second.acquire()
+
+    # Nem o próprio dono obtém de novo enquanto a tarefa roda; só renova
+    assert not first.acquire()
+    assert first.renew()
+
+    first.release()
+    assert second.acquire()
+    assert not first.acquire()
+    assert not first.renew()
+
+
+def test_leader_lock_heartbeat_keeps_lease_until_released():
+    """
+    Testa que o heartbeat mantém o lease além da duração inicial e que ele expira depois
+    """
+    first = LeaderLock("daily_reminders", 1, session_factory=TestingSessionLocal)
+    second = LeaderLock("daily_reminders", 1, session_factory=TestingSessionLocal)
+
+    assert first.acquire()
+    with first.heartbeat(interval=0.2):
+        time.sleep(1.5)
+        assert not second.acquire()
+
+    # Sem heartbeat o lease vence sozinho (ex.: instância que caiu)
+    time.sleep(1.2)
+    assert second.acquire()
+
+
+@pytest.mark.asyncio
+async def test_reminders_do_not_overlap_in_same_instance(monkeypatch):
+    """
+    Testa que um segundo disparo (cron ou gatilho manual) durante uma execução é ignorado
+    """
+    reminder_scheduler = ReminderScheduler()
+    reminder_scheduler.lock = LeaderLock("daily_reminders", 60, session_factory=TestingSessionLocal)
+    monkeypatch.setattr(scheduler_module, "SessionLocal", TestingSessionLocal)
+
+    calls = []
+
+    async def slow_run(db):
+        calls.append(db)
+        await asyncio.sleep(0.1)
+        return {"reminders_sent": 0, "reminders_failed": 0}
+
+    monkeypatch.setattr(notification_service, "check_and_send_reminders", slow_run)
+
+    await asyncio.gather(
+        reminder_scheduler.send_daily_reminders(),
+        reminder_scheduler.send_daily_reminders()
+    )
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_interrupted_run_resumes_from_checkpoint(db, monkeypatch):
+    """
+    Testa que uma execução interrompida retoma do checkpoint sem reenviar
+    """
+    for i in range(5):
+        create_customer(db, f"Cliente {i}", f"2790000002{i}", 10, delivered_days_ago=[20])
+
+    monkeypatch.setattr(settings, "REMINDER_BATCH_SIZE", 2)
+    messaged = []
+    original_dispatch = whatsapp_service.dispatch_batch
+
+    async def fake_send_message(to, message):
+        messaged.append(to)
+        return {"success": True, "data": {}}
+
+    async def crashing_dispatch(sends):
+        if len(messaged) >= 2:
+            for send in sends:
+                send.close()
+            raise RuntimeError("queda do pod")
+        return await original_dispatch(sends)
+
+    monkeypatch.setattr(whatsapp_service, "send_message", fake_send_message)
+    monkeypatch.setattr(whatsapp_service, "dispatch_batch", crashing_dispatch)
+
+    with pytest.raises(RuntimeError):
+        await notification_service.check_and_send_reminders(db)
+
+    run = db.query(ReminderRun).one()
+    assert run.status == "failed"
+    assert run.reminders_sent == 2
+    assert notification_service.get_interrupted_run(db) is not None
+
+    monkeypatch.setattr(whatsapp_service, "dispatch_batch", original_dispatch)
+    result = await notification_service.check_and_send_reminders(db)
+
+    # Os dois clientes do bloco que caiu ficam registrados como pendentes e não são reenviados
+    assert result["reminders_sent"] == 3
+    assert len(messaged) == 3
+    assert len(set(messaged)) == 3
+    assert db.query(ReminderSend).count() == 5
+    assert notification_service.get_interrupted_run(db) is None
+
+
+@pytest.mark.asyncio
+async def test_reminder_run_keeps_database_work_off_the_event_loop(db, monkeypatch):
+    """
+    Testa que o lock, as consultas e os checkpoints da execução rodam fora do event loop
+    """
+    for i in range(3):
+        create_customer(db, f"Cliente {i}", f"2790000005{i}", 10, delivered_days_ago=[20])
+    db.commit()
+
+    reminder_scheduler = ReminderScheduler()
+    reminder_scheduler.lock = LeaderLock("daily_reminders", 60, session_factory=TestingSessionLocal)
+    monkeypatch.setattr(scheduler_module, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(settings, "REMINDER_BATCH_SIZE", 2)
+
+    async def fake_send_message(to, message):
+        return {"success": True, "data": {}}
+
+    monkeypatch.setattr(whatsapp_service, "send_message", fake_send_message)
+
+    loop_thread = threading.current_thread()
+    on_loop = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if threading.current_thread() is loop_thread:
+            on_loop.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        await reminder_scheduler.send_daily_reminders()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    assert on_loop == []
+    run = db.query(ReminderRun).one()
+    assert (run.status, run.reminders_sent) == ("completed", 3)
+
+
+@pytest.mark.asyncio
+async def test_scheduler_resumes_run_after_stale_lock_expires(db, monkeypatch):
+    """
+    Testa a retomada pelo agendador quando a instância que caiu ainda consta como dona do lock
+    """
+    for i in range(3):
+        create_customer(db, f"Cliente {i}", f"2790000004{i}", 10, delivered_days_ago=[20])
+
+    now = datetime.utcnow()
+    db.add(ReminderRun(run_date=now.date(), status="running"))
+    db.add(SchedulerLock(
+        name="daily_reminders",
+        owner="pod-que-caiu",
+        acquired_at=now,
+        expires_at=now + timedelta(seconds=settings.REMINDER_LOCK_LEASE_SECONDS)
+    ))
+    db.commit()
+
+    reminder_scheduler = ReminderScheduler()
+    reminder_scheduler.lock = LeaderLock(
+        "daily_reminders", settings.REMINDER_LOCK_LEASE_SECONDS, session_factory=TestingSessionLocal
+    )
+    monkeypatch.setattr(scheduler_module, "SessionLocal", TestingSessionLocal)
+
+    messaged = []
+
+    async def fake_send_message(to, message):
+        messaged.append(to)
+        return {"success": True, "data": {}}
+
+    monkeypatch.setattr(whatsapp_service, "send_message", fake_send_message)
+
+    # Lease da instância morta ainda válido: a verificação não retoma
+    await reminder_scheduler.resume_interrupted_run()
+    assert messaged == []
+    assert notification_service.get_interrupted_run(db) is not None
+
+    # Sem heartbeat, o lease vence; a verificação seguinte retoma
+    db.query(SchedulerLock).update({"expires_at": datetime.utcnow() - timedelta(seconds=1)})
+    db.commit()
+    await reminder_scheduler.resume_interrupted_run()
+
+    assert len(messaged) == 3
+    db.expire_all()
+    assert notification_service.get_interrupted_run(db) is None
+
+
+def test_compute_intervals_uses_robust_median():
+    """
+    Testa a mediana vetorizada dos intervalos, ignorando outliers e entregas no mesmo dia
+    """
+    day = 86400.0
+    customer_ids = np.array([1, 1, 1, 1, 1, 2, 2, 3, 3, 3, 3])
+    delivered = np.array([
+        0, 10, 20, 20.2, 90, 0, 15, 0, 7, 14, 21
+    ]) * day
+
+    ids, learned, last_delivered = consumption_learning_service.compute_intervals(
+        customer_ids, delivered, min_intervals=3, max_intervals=12
+    )
+
+    # Cliente 1: intervalos 10, 10, 70 (o de 0.2 dia é ignorado) -> mediana 10
+    # Cliente 2: apenas um intervalo -> histórico insuficiente
+    assert ids.tolist() == [1, 3]
+    assert learned.tolist() == [10, 7]
+    assert (last_delivered / day).tolist() == [90, 21]
+
+
+def test_learn_intervals_updates_customers_across_chunks(db):
+    """
+    Testa o aprendizado em blocos pequenos e o uso do valor aprendido no lembrete
+    """
+    learner = create_customer(db, "Regular", "27900000031", 30, delivered_days_ago=[50, 40, 30, 20, 10])
+    newcomer = create_customer(db, "Novo", "27900000032", 30, delivered_days_ago=[12, 2])
+
+    result = consumption_learning_service.learn_intervals(db, chunk_size=3)
+    assert result["orders_scanned"] == 7
+    assert result["customers_updated"] == 1
+
+    db.refresh(learner)
+    db.refresh(newcomer)
+    assert learner.learned_consumption_days == 10
+    assert newcomer.learned_consumption_days is None
+
+    # Última entrega há 10 dias e intervalo aprendido de 10: lembrete já venceu
+    candidates = [row.id for chunk in notification_service.iter_reminder_candidates(db) for row in chunk]
+    assert candidates == [learner.id]
@@ -0,0 +1,757 @@
+import csv
+import io
+import json
+import pytest
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlalchemy.orm import Session, sessionmaker
+from app.main import app
+from app.core.config import settings
+from app.core.database import Base, get_db, get_async_db
+from app.models.idempotency import IdempotencyKey
+from app.models.order import Order
+from app.models.order_event import OrderEvent
+from app.models.outbox import OutboxMessage
+from app.models.stat_counter import StatCounter
+from app.services import orders as orders_service_module
+from app.services.orders import order_service
+from app.services.outbox import outbox_service
+from app.services.stats import stats_service
+from app.services.sales import sales_rollup_service
+from app.services.order_events import order_event_service
+from app.services.whatsapp import whatsapp_service
+from app.utils import order_event_broker as order_event_broker_module
+from app.utils.order_event_broker import OrderEventBroker
+from app.utils.pagination import encode_cursor, keyset_query
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+app.dependency_overrides[get_db] = override_get_db
+
+# Sessões assíncronas no mesmo arquivo; sem pool, pois cada requisição do
+# TestClient roda em um event loop próprio
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False)
+
+
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
+app.dependency_overrides[get_async_db] = override_get_async_db
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def setup_database():
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def auth_headers():
+    """
+    Cria usuário e retorna header de autenticação
+    """
+    client.post(
+        "/api/v1/auth/register",
+        json={
+            "email": "orders@example.com",
+            "full_name": "Orders User",
+            "password": "password123"
+        }
+    )
+
+    response = client.post(
+        "/api/v1/auth/login",
+        data={
+            "username": "orders@example.com",
+            "password": "password123"
+        }
+    )
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def customer_id(auth_headers):
+    response = client.post(
+        "/api/v1/customers/",
+        json={
+            "name": "Cliente Pedido",
+            "phone": "27988887777",
+            "address": "Rua dos Pedidos, 1",
+            "consumption_pattern_days": 30
+        },
+        headers=auth_headers
+    )
+    return response.json()["id"]
+
+
+@pytest.fixture
+def product_id(auth_headers):
+    response = client.post(
+        "/api/v1/products/",
+        json={
+            "name": "Botijão P13",
+            "price": 110.0,
+            "product_type": "gas",
+            "stock_quantity": 10
+        },
+        headers=auth_headers
+    )
+    return response.json()["id"]
+
+
+@pytest.fixture
+def whatsapp_calls(monkeypatch):
+    """
+    Substitui o envio real por um registro das mensagens enviadas
+    """
+    calls = []
+
+    async def fake_send_message(to, message):
+        calls.append(to)
+        return {"success": True, "data": {}}
+
+    monkeypatch.setattr(whatsapp_service, "send_message", fake_send_message)
+    return calls
+
+
+def create_order(auth_headers, customer_id, product_id, quantity=2):
+    return client.post(
+        "/api/v1/orders/",
+        json={
+            "customer_id": customer_id,
+            "items": [{"product_id": product_id, "quantity": quantity}]
+        },
+        headers=auth_headers
+    )
+
+
+def test_create_order_enqueues_confirmation(auth_headers, customer_id, product_id, whatsapp_calls):
+    """
+    Testa que o pedido grava a confirmação no outbox sem enviar na requisição
+    """
+    response = create_order(auth_headers, customer_id, product_id)
+    assert response.status_code == 201
+    assert response.json()["total_amount"] == 220.0
+    assert whatsapp_calls == []
+
+    db = TestingSessionLocal()
+    try:
+        message = db.query(OutboxMessage).one()
+        assert message.kind == "order_confirmation"
+        assert message.status == "pending"
+        assert message.payload["order_id"] == response.json()["id"]
+    finally:
+        db.close()
+
+
+@pytest.mark.asyncio
+async def test_outbox_delivers_pending_messages(auth_headers, customer_id, product_id, whatsapp_calls):
+    """
+    Testa que o worker do outbox envia e marca as mensagens pendentes
+    """
+    order_id = create_order(auth_headers, customer_id, product_id).json()["id"]
+    client.post(f"/api/v1/orders/{order_id}/complete", headers=auth_headers)
+
+    # Entrega concluída agenda o próximo lembrete
+    customer = client.get(f"/api/v1/customers/{customer_id}", headers=auth_headers).json()
+    assert customer["next_reminder_due_at"] is not None
+
+    db = TestingSessionLocal()
+    try:
+        assert await outbox_service.process_pending(db) == 2
+        assert whatsapp_calls == ["27988887777", "27988887777"]
+        assert {m.status for m in db.query(OutboxMessage)} == {"sent"}
+        assert await outbox_service.process_pending(db) == 0
+    finally:
+        db.close()
+
+
+@pytest.mark.asyncio
+async def test_outbox_schedules_retry_on_failure(auth_headers, customer_id, product_id, monkeypatch):
+    """
+    Testa que falhas de envio são registradas e reagendadas
+    """
+    async def failing_send_message(to, message):
+        return {"success": False, "error": "provedor indisponível"}
+
+    monkeypatch.setattr(whatsapp_service, "send_message", failing_send_message)
+    create_order(auth_headers, customer_id, product_id)
+
+    db = TestingSessionLocal()
+    try:
+        assert await outbox_service.process_pending(db) == 1
+        message = db.query(OutboxMessage).one()
+        assert message.status == "pending"
+        assert message.attempts == 1
+        assert message.last_error == "provedor indisponível"
+
+        # Próxima tentativa ainda não está disponível
+        assert await outbox_service.process_pending(db) == 0
+    finally:
+        db.close()
+
+
+@pytest.mark.asyncio
+async def test_outbox_retries_abandoned_claim(auth_headers, customer_id, product_id, monkeypatch):
+    """
+    Testa que o envio acontece fora de transação e que a reserva de um
+    worker que caiu volta a ficar disponível quando vence
+    """
+    db = TestingSessionLocal()
+    in_transaction = []
+
+    async def fake_send_message(to, message):
+        in_transaction.append(db.in_transaction())
+        return {"success": True, "data": {}}
+
+    monkeypatch.setattr(whatsapp_service, "send_message", fake_send_message)
+    create_order(auth_headers, customer_id, product_id)
+
+    try:
+        # Worker que reservou o lote e caiu antes de enviar
+        assert len(outbox_service._claim(db, 10, datetime.utcnow())) == 1
+        assert await outbox_service.process_pending(db) == 0
+
+        # Reserva vencida: o lote é retomado
+        message = db.query(OutboxMessage).one()
+        message.available_at = datetime.utcnow()
+        db.commit()
+
+        assert await outbox_service.process_pending(db) == 1
+        assert in_transaction == [False]
+        message = db.query(OutboxMessage).one()
+        assert message.status == "sent"
+        assert message.claimed_at is None
+    finally:
+        db.close()
+
+
+def test_create_order_with_multiple_items_updates_stock(auth_headers, customer_id, product_id):
+    """
+    Testa pedido com vários itens (inclusive produto repetido) e a baixa de estoque
+    """
+    water = client.post(
+        "/api/v1/products/",
+        json={"name": "Galão 20L", "price": 12.5, "product_type": "water", "stock_quantity": 50},
+        headers=auth_headers
+    ).json()["id"]
+
+    response = client.post(
+        "/api/v1/orders/",
+        json={
+            "customer_id": customer_id,
+            "items": [
+                {"product_id": product_id, "quantity": 1},
+                {"product_id": water, "quantity": 4},
+                {"product_id": product_id, "quantity": 2}
+            ]
+        },
+        headers=auth_headers
+    )
+    assert response.status_code == 201
+    data = response.json()
+    assert data["total_amount"] == 380.0
+    assert [item["quantity"] for item in data["items"]] == [1, 4, 2]
+
+    gas = client.get(f"/api/v1/products/{product_id}", headers=auth_headers).json()
+    assert gas["stock_quantity"] == 7
+    assert client.get(f"/api/v1/products/{water}", headers=auth_headers).json()["stock_quantity"] == 46
+
+
+def test_create_order_with_unknown_product_changes_nothing(auth_headers, customer_id, product_id):
+    """
+    Testa que um produto inexistente rejeita o pedido inteiro
+    """
+    response = client.post(
+        "/api/v1/orders/",
+        json={
+            "customer_id": customer_id,
+            "items": [
+                {"product_id": product_id, "quantity": 1},
+                {"product_id": 9999, "quantity": 1}
+            ]
+        },
+        headers=auth_headers
+    )
+    assert response.status_code == 404
+
+    assert client.get(f"/api/v1/products/{product_id}", headers=auth_headers).json()["stock_quantity"] == 10
+    assert client.get("/api/v1/orders/", headers=auth_headers).json() == []
+
+
+def test_bulk_create_orders_reports_partial_failures(auth_headers, customer_id, product_id):
+    """
+    Testa criação em lote com falhas parciais
+    """
+    response = client.post(
+        "/api/v1/orders/bulk",
+        json={
+            "orders": [
+                {"customer_id": customer_id, "items": [{"product_id": product_id, "quantity": 1}]},
+                {"customer_id": 9999, "items": [{"product_id": product_id, "quantity": 1}]},
+                {"customer_id": customer_id, "items": [{"product_id": 9999, "quantity": 1}]},
+                {"customer_id": customer_id, "items": [{"product_id": product_id, "quantity": 3}]}
+            ]
+        },
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 2
+    assert data["failed"] == 2
+    assert [r["success"] for r in data["results"]] == [True, False, False, True]
+    assert data["results"][1]["error"] == "Cliente não encontrado"
+    assert data["results"][3]["order"]["total_amount"] == 330.0
+    assert data["results"][3]["order"]["items"][0]["quantity"] == 3
+
+    assert client.get(f"/api/v1/products/{product_id}", headers=auth_headers).json()["stock_quantity"] == 6
+
+    db = TestingSessionLocal()
+    try:
+        assert db.query(OutboxMessage).count() == 2
+    finally:
+        db.close()
+
+
+def test_list_orders_keyset_pagination(auth_headers, customer_id, product_id):
+    """
+    Testa a paginação por cursor: páginas sem repetição e na ordem mais recente primeiro
+    """
+    created = [create_order(auth_headers, customer_id, product_id, quantity=1).json()["id"] for _ in range(5)]
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/v1/orders/", params=params, headers=auth_headers)
+        assert response.status_code == 200
+        seen.extend(order["id"] for order in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert seen == sorted(created, reverse=True)
+
+    # O filtro do cursor compara a coluna direto e usa o índice (created_at, id)
+    db = TestingSessionLocal()
+    try:
+        first = db.query(Order).filter(Order.id == created[-1]).one()
+        query = keyset_query(
+            db.query(Order.id),
+            [(Order.created_at, True), (Order.id, True)],
+            encode_cursor([first.created_at, first.id])
+        )
+        sql = query.statement.compile(engine, compile_kwargs={"literal_binds": True})
+        plan = " ".join(str(row) for row in db.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+        assert "SEARCH" in plan and "ix_orders_created_at_id" in plan
+    finally:
+        db.close()
+
+    response = client.get("/api/v1/orders/", params={"cursor": "invalido"}, headers=auth_headers)
+    assert response.status_code == 400
+
+
+def count_queries(request):
+    """
+    Conta os comandos SQL executados durante a requisição
+    """
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    # Escuta todas as engines: outro módulo de teste pode ter sobrescrito o get_db
+    event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = request()
+    finally:
+        event.remove(Engine, "before_cursor_execute", before_cursor_execute)
+    return response, len(statements)
+
+
+def test_order_listings_use_fixed_number_of_queries(auth_headers, customer_id, product_id):
+    """
+    Testa que os itens são carregados de uma vez, independente da quantidade de pedidos
+    """
+    create_order(auth_headers, customer_id, product_id, quantity=1)
+    list_url = "/api/v1/orders/"
+    history_url = f"/api/v1/orders/customer/{customer_id}/history"
+
+    _, list_queries = count_queries(lambda: client.get(list_url, headers=auth_headers))
+    _, history_queries = count_queries(lambda: client.get(history_url, headers=auth_headers))
+
+    for _ in range(4):
+        create_order(auth_headers, customer_id, product_id, quantity=1)
+
+    response, queries = count_queries(lambda: client.get(list_url, headers=auth_headers))
+    assert len(response.json()) == 5
+    # Usuário autenticado, pedidos e itens
+    assert queries == list_queries == 3
+
+    response, queries = count_queries(lambda: client.get(history_url, headers=auth_headers))
+    assert all(order["items"] for order in response.json())
+    assert queries == history_queries == 3
+
+
+def test_customer_history_streams_ndjson(auth_headers, customer_id, product_id):
+    """
+    Testa o histórico em NDJSON: um pedido por linha, mais recentes primeiro
+    """
+    created = [create_order(auth_headers, customer_id, product_id, quantity=1).json()["id"] for _ in range(3)]
+
+    response = client.get(
+        f"/api/v1/orders/customer/{customer_id}/history",
+        headers={**auth_headers, "Accept": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [order["id"] for order in lines] == sorted(created, reverse=True)
+    assert all(order["items"][0]["quantity"] == 1 for order in lines)
+
+    response = client.get("/api/v1/orders/", params={"limit": 1}, headers={**auth_headers, "Accept": "application/x-ndjson"})
+    assert len(response.text.splitlines()) == 3
+
+
+def test_update_order_with_stale_etag_conflicts(auth_headers, customer_id, product_id):
+    """
+    Testa o controle otimista: If-Match desatualizado resulta em 409
+    """
+    order_id = create_order(auth_headers, customer_id, product_id).json()["id"]
+
+    response = client.get(f"/api/v1/orders/{order_id}", headers=auth_headers)
+    etag = response.headers["ETag"]
+    assert etag == '"1"'
+
+    response = client.put(
+        f"/api/v1/orders/{order_id}",
+        json={"status": "em_entrega"},
+        headers={**auth_headers, "If-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["ETag"] == '"2"'
+
+    response = client.put(
+        f"/api/v1/orders/{order_id}",
+        json={"notes": "Portão azul"},
+        headers={**auth_headers, "If-Match": etag}
+    )
+    assert response.status_code == 409
+    assert client.get(f"/api/v1/orders/{order_id}", headers=auth_headers).json()["notes"] is None
+
+
+def test_concurrent_order_write_is_rejected(auth_headers, customer_id, product_id):
+    """
+    Testa que a versão no WHERE do UPDATE detecta escrita concorrente sem lock
+    """
+    order_id = create_order(auth_headers, customer_id, product_id).json()["id"]
+
+    db = TestingSessionLocal()
+    try:
+        stale = db.query(Order).filter(Order.id == order_id).one()
+
+        client.put(f"/api/v1/orders/{order_id}", json={"status": "em_entrega"}, headers=auth_headers)
+
+        stale.notes = "Escrita atrasada"
+        with pytest.raises(HTTPException) as exc:
+            order_service._flush_or_conflict(db)
+        assert exc.value.status_code == 409
+    finally:
+        db.close()
+
+    assert client.get(f"/api/v1/orders/{order_id}", headers=auth_headers).json()["status"] == "em_entrega"
+
+
+def test_idempotency_key_replays_order_creation(auth_headers, customer_id, product_id):
+    """
+    Testa que repetir o POST com a mesma Idempotency-Key não cria outro pedido
+    """
+    headers = {**auth_headers, "Idempotency-Key": "pedido-123"}
+    payload = {"customer_id": customer_id, "items": [{"product_id": product_id, "quantity": 2}]}
+
+    # A chave nunca é confirmada sem a resposta (um commit só, junto com o pedido)
+    committed_statuses = []
+
+    def before_commit(session):
+        committed_statuses.extend(
+            obj.response_status for obj in [*session.new, *session.identity_map.values()]
+            if isinstance(obj, IdempotencyKey)
+        )
+
+    event.listen(Session, "before_commit", before_commit)
+    try:
+        first = client.post("/api/v1/orders/", json=payload, headers=headers)
+        retry = client.post("/api/v1/orders/", json=payload, headers=headers)
+    finally:
+        event.remove(Session, "before_commit", before_commit)
+
+    assert committed_statuses == [201]
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert len(client.get("/api/v1/orders/", headers=auth_headers).json()) == 1
+    assert client.get(f"/api/v1/products/{product_id}", headers=auth_headers).json()["stock_quantity"] == 8
+
+    db = TestingSessionLocal()
+    try:
+        assert db.query(OutboxMessage).count() == 1
+    finally:
+        db.close()
+
+    # Mesma chave com outro corpo é rejeitada
+    payload["items"][0]["quantity"] = 3
+    assert client.post("/api/v1/orders/", json=payload, headers=headers).status_code == 422
+
+
+def test_failed_request_releases_idempotency_key(auth_headers, customer_id, product_id):
+    """
+    Testa que uma requisição que falhou não reserva a chave
+    """
+    headers = {**auth_headers, "Idempotency-Key": "pedido-456"}
+    payload = {"customer_id": customer_id, "items": [{"product_id": 9999, "quantity": 1}]}
+
+    assert client.post("/api/v1/orders/", json=payload, headers=headers).status_code == 404
+
+    # A chave continua livre para a requisição corrigida
+    payload["items"][0]["product_id"] = product_id
+    assert client.post("/api/v1/orders/", json=payload, headers=headers).status_code == 201
+
+
+def test_order_changes_are_recorded_as_events(auth_headers, customer_id, product_id):
+    """
+    Testa que criação, alteração, conclusão e exclusão geram eventos em sequência
+    """
+    order_id = create_order(auth_headers, customer_id, product_id).json()["id"]
+    client.put(f"/api/v1/orders/{order_id}", json={"status": "em_entrega"}, headers=auth_headers)
+    client.post(f"/api/v1/orders/{order_id}/complete", headers=auth_headers)
+    client.delete(f"/api/v1/orders/{order_id}", headers=auth_headers)
+
+    db = TestingSessionLocal()
+    try:
+        events = order_event_service.fetch_after(db, 0)
+    finally:
+        db.close()
+
+    assert [event.event_type for event in events] == [
+        "order.created", "order.updated", "order.completed", "order.deleted"
+    ]
+    assert [(event.previous_status, event.status) for event in events[1:3]] == [
+        ("novo", "em_entrega"), ("em_entrega", "concluido")
+    ]
+    assert events[2].payload["version"] == 3
+
+
+@pytest.mark.asyncio
+async def test_event_broker_fans_out_and_waits_for_gaps(auth_headers, customer_id, product_id, monkeypatch):
+    """
+    Testa que o broker publica os eventos novos e espera IDs ainda não confirmados
+    """
+    monkeypatch.setattr(order_event_broker_module, "SessionLocal", TestingSessionLocal)
+    broker = OrderEventBroker()
+
+    db = TestingSessionLocal()
+    try:
+        subscription = broker.subscribe(db)
+    finally:
+        db.close()
+    await broker.shutdown()
+
+    order_id = create_order(auth_headers, customer_id, product_id).json()["id"]
+    assert await broker.poll_once() == 1
+    message = subscription.queue.get_nowait()
+    assert message["event_type"] == "order.created"
+    assert order_event_service.matches(message, {"novo"})
+    assert not order_event_service.matches(message, {"concluido"})
+
+    # Simula um ID reservado por uma transação ainda aberta
+    db = TestingSessionLocal()
+    try:
+        db.add(OrderEvent(id=message["id"] + 2, order_id=order_id, event_type="order.updated", payload={}))
+        db.commit()
+    finally:
+        db.close()
+
+    assert await broker.poll_once() == 0
+    monkeypatch.setattr(settings, "ORDER_EVENTS_GAP_GRACE_SECONDS", 0)
+    assert await broker.poll_once() == 1
+    assert subscription.queue.get_nowait()["id"] == message["id"] + 2
+
+
+def test_stats_summary_tracks_order_changes(auth_headers, customer_id, product_id):
+    """
+    Testa os contadores do dashboard e a reconciliação com o banco
+    """
+    first = create_order(auth_headers, customer_id, product_id, quantity=1).json()["id"]
+    second = create_order(auth_headers, customer_id, product_id, quantity=2).json()["id"]
+    third = create_order(auth_headers, customer_id, product_id, quantity=3).json()["id"]
+
+    client.put(f"/api/v1/orders/{second}", json={"status": "em_entrega"}, headers=auth_headers)
+    client.post(f"/api/v1/orders/{third}/complete", headers=auth_headers)
+    client.delete(f"/api/v1/orders/{first}", headers=auth_headers)
+
+    summary = client.get("/api/v1/stats/summary", headers=auth_headers).json()
+    assert summary["orders_by_status"] == {"novo": 0, "em_entrega": 1, "concluido": 1, "cancelado": 0}
+    assert summary["total_orders"] == 2
+    assert summary["today"]["orders"] == 2
+    assert summary["today"]["revenue"] == 330.0
+    assert [p["id"] for p in summary["low_stock_products"]] == [product_id]
+    assert summary["low_stock_products"][0]["stock_quantity"] == 4
+
+    # Reconciliação corrige um contador fora de sincronia
+    db = TestingSessionLocal()
+    try:
+        stats_service.increment(db, {"orders_by_status:novo": 5})
+        db.commit()
+        assert stats_service.reconcile(db) == {"orders_by_status:novo": -5}
+        assert stats_service.reconcile(db) == {}
+    finally:
+        db.close()
+
+    assert client.get("/api/v1/stats/summary", headers=auth_headers).json() == summary
+
+
+def test_completing_again_moves_revenue_to_new_day(auth_headers, customer_id, product_id, monkeypatch):
+    """
+    Testa que concluir de novo em outro dia move o faturamento entre os dias
+    """
+    order_id = create_order(auth_headers, customer_id, product_id, quantity=1).json()["id"]
+    yesterday = datetime.utcnow() - timedelta(days=1)
+
+    class Yesterday(datetime):
+        @classmethod
+        def utcnow(cls):
+            return yesterday
+
+    monkeypatch.setattr(orders_service_module, "datetime", Yesterday)
+    client.post(f"/api/v1/orders/{order_id}/complete", headers=auth_headers)
+    monkeypatch.setattr(orders_service_module, "datetime", datetime)
+    client.post(f"/api/v1/orders/{order_id}/complete", headers=auth_headers)
+
+    db = TestingSessionLocal()
+    try:
+        counters = dict(db.query(StatCounter.name, StatCounter.value))
+        assert counters[f"revenue:{yesterday.date().isoformat()}"] == 0
+        assert counters[f"revenue:{datetime.utcnow().date().isoformat()}"] == 110.0
+        assert counters["orders_by_status:concluido"] == 1
+        assert stats_service.reconcile(db) == {}
+    finally:
+        db.close()
+
+
+def test_sales_rollup_follows_deliveries(auth_headers, customer_id, product_id):
+    """
+    Testa a consolidação diária de vendas: entrega, reabertura, exclusão e catch-up
+    """
+    first = create_order(auth_headers, customer_id, product_id, quantity=1).json()["id"]
+    second = create_order(auth_headers, customer_id, product_id, quantity=2).json()["id"]
+    third = create_order(auth_headers, customer_id, product_id, quantity=3).json()["id"]
+
+    client.post(f"/api/v1/orders/{first}/complete", headers=auth_headers)
+    client.post(f"/api/v1/orders/{second}/complete", headers=auth_headers)
+    # Conclusão repetida não soma de novo
+    client.post(f"/api/v1/orders/{second}/complete", headers=auth_headers)
+    client.put(f"/api/v1/orders/{first}", json={"status": "em_entrega"}, headers=auth_headers)
+
+    # Entrega gravada fora do OrderService fica para o catch-up
+    db = TestingSessionLocal()
+    try:
+        order = db.query(Order).filter(Order.id == third).first()
+        order.status = "concluido"
+        order.delivered_at = order.created_at
+        db.commit()
+    finally:
+        db.close()
+
+    today = datetime.utcnow().date().isoformat()
+    params = {"start": today, "end": today}
+    rows = client.get("/api/v1/reports/sales/daily", params=params, headers=auth_headers).json()
+    assert [(row["quantity"], row["orders_count"], row["revenue"]) for row in rows] == [(2, 1, 220.0)]
+
+    # Pedido lido antes do catch-up: a reversão usa a marcação gravada no banco
+    stale_db = TestingSessionLocal()
+    db = TestingSessionLocal()
+    try:
+        stale = stale_db.query(Order).filter(Order.id == third).first()
+        stale_db.expunge(stale)
+        stale_db.rollback()
+        assert stale.sales_rolled_up_at is None
+        assert sales_rollup_service.catch_up(db) == 1
+        assert sales_rollup_service.catch_up(db) == 0
+        assert db.query(Order.version).filter(Order.id == third).scalar() == stale.version
+
+        sales_rollup_service.revert_delivery(stale_db, stale)
+        stale_db.commit()
+        rows = client.get("/api/v1/reports/sales/daily", params=params, headers=auth_headers).json()
+        assert [(row["quantity"], row["orders_count"]) for row in rows] == [(2, 1)]
+
+        assert sales_rollup_service.catch_up(db) == 1
+    finally:
+        stale_db.close()
+        db.close()
+
+    client.delete(f"/api/v1/orders/{second}", headers=auth_headers)
+
+    rows = client.get(
+        "/api/v1/reports/sales/by-type",
+        params={**params, "granularity": "month"},
+        headers=auth_headers
+    ).json()
+    assert rows == [{"period": today[:7], "product_type": "gas", "quantity": 3, "revenue": 330.0}]
+
+
+def test_export_orders_as_csv(auth_headers, customer_id, product_id):
+    """
+    Testa a exportação em CSV: uma linha por item, filtrada pelo período
+    """
+    first = create_order(auth_headers, customer_id, product_id, quantity=1).json()["id"]
+    second = create_order(auth_headers, customer_id, product_id, quantity=2).json()["id"]
+
+    today = datetime.utcnow().date().isoformat()
+    response = client.get(
+        "/api/v1/orders/export",
+        params={"format": "csv", "from": today, "to": today},
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [(int(row["order_id"]), int(row["quantity"])) for row in rows] == [(first, 1), (second, 2)]
+    assert rows[0]["customer_name"] == "Cliente Pedido"
+    assert rows[1]["subtotal"] == "220.0"
+
+    response = client.get(
+        "/api/v1/orders/export",
+        params={"from": "2000-01-01", "to": "2000-01-31"},
+        headers=auth_headers
+    )
+    assert len(response.text.splitlines()) == 1
@@ -0,0 +1,135 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlalchemy.orm import sessionmaker
+from app.main import app
+from app.core.database import Base, get_db, get_async_db
+from app.services.routes import route_planning_service
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+app.dependency_overrides[get_db] = override_get_db
+
+# Sessões assíncronas no mesmo arquivo; sem pool, pois cada requisição do
+# TestClient roda em um event loop próprio
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False)
+
+
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
+app.dependency_overrides[get_async_db] = override_get_async_db
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def setup_database():
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def auth_headers():
+    client.post(
+        "/api/v1/auth/register",
+        json={"email": "routes@example.com", "full_name": "Routes User", "password": "password123"}
+    )
+    response = client.post(
+        "/api/v1/auth/login",
+        data={"username": "routes@example.com", "password": "password123"}
+    )
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def test_two_opt_removes_crossing():
+    """
+    Testa que o 2-opt desfaz o cruzamento de uma rota em forma de "X"
+    """
+    square = np.array([[0.0, 0.0], [0.0, 0.01], [0.01, 0.01], [0.01, 0.0]])
+    distances = route_planning_service.distance_matrix(square)
+    crossing = np.array([0, 2, 1, 3])
+
+    improved = route_planning_service.two_opt(crossing, distances)
+
+    perimeter = distances[0, 1] + distances[1, 2] + distances[2, 3] + distances[3, 0]
+    assert route_planning_service.tour_length(improved, distances) == pytest.approx(perimeter)
+    assert improved[0] == 0
+
+
+def test_plan_respects_vehicle_capacity():
+    """
+    Testa que cada carga respeita a capacidade e toda parada aparece uma única vez
+    """
+    rng = np.random.default_rng(7)
+    coordinates = np.column_stack([-20.3 + rng.random(200) * 0.1, -40.3 + rng.random(200) * 0.1])
+    quantities = rng.integers(1, 4, 200)
+    quantities[0] = 30
+
+    batches = route_planning_service.plan(coordinates, quantities, (-20.25, -40.25), capacity=20)
+
+    stops = np.concatenate([batch["stops"] for batch in batches])
+    assert sorted(stops.tolist()) == list(range(200))
+    for batch in batches:
+        assert batch["total_quantity"] <= 20 or len(batch["stops"]) == 1
+        assert batch["total_quantity"] == quantities[batch["stops"]].sum()
+
+
+def test_plan_endpoint_groups_open_orders(auth_headers):
+    """
+    Testa o endpoint de rotas: só pedidos novos, clientes sem coordenadas à parte
+    """
+    product_id = client.post(
+        "/api/v1/products/",
+        json={"name": "Botijão P13", "price": 110.0, "product_type": "gas", "stock_quantity": 100},
+        headers=auth_headers
+    ).json()["id"]
+
+    order_ids = []
+    for i, coordinates in enumerate([(-20.31, -40.31), (-20.32, -40.30), (-20.30, -40.29), None]):
+        customer = {"name": f"Cliente {i}", "phone": f"2798000000{i}", "address": f"Rua {i}"}
+        if coordinates:
+            customer["latitude"], customer["longitude"] = coordinates
+        customer_id = client.post("/api/v1/customers/", json=customer, headers=auth_headers).json()["id"]
+        order_ids.append(client.post(
+            "/api/v1/orders/",
+            json={"customer_id": customer_id, "items": [{"product_id": product_id, "quantity": 2}]},
+            headers=auth_headers
+        ).json()["id"])
+
+    # Pedido já concluído não entra no planejamento
+    client.post(f"/api/v1/orders/{order_ids[2]}/complete", headers=auth_headers)
+
+    response = client.get(
+        "/api/v1/routes/plan",
+        params={"capacity": 2, "depot_latitude": -20.3, "depot_longitude": -40.3},
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    data = response.json()
+
+    assert data["unrouted_order_ids"] == [order_ids[3]]
+    assert len(data["batches"]) == 2
+    assert sorted(stop["order_id"] for batch in data["batches"] for stop in batch["stops"]) == order_ids[:2]
+    assert all(batch["distance_km"] > 0 for batch in data["batches"])
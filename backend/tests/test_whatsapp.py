@@ -0,0 +1,178 @@
+import asyncio
+import json
+import time
+import httpx
+import pytest
+from app.core.config import settings
+from app.services.whatsapp import CircuitBreaker, TokenBucket, WhatsAppService
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_limits_rate():
+    """
+    Testa que o token bucket libera a rajada e depois respeita a taxa
+    """
+    bucket = TokenBucket(rate=50, capacity=5)
+
+    start = time.monotonic()
+    await asyncio.gather(*(bucket.acquire() for _ in range(15)))
+    elapsed = time.monotonic() - start
+
+    # 5 tokens imediatos + 10 a 50/s = ~0.2s
+    assert elapsed >= 0.18
+
+
+@pytest.mark.asyncio
+async def test_send_gives_up_when_rate_limit_wait_exceeds_deadline(monkeypatch):
+    """
+    Testa que o envio desiste antes de esperar o token bucket além do prazo
+    """
+    monkeypatch.setattr(settings, "WHATSAPP_SEND_DEADLINE_SECONDS", 0.2)
+    service = WhatsAppService()
+    service.rate_limiter = TokenBucket(rate=1, capacity=1)
+    service._client = httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, json={}))
+    )
+
+    assert (await service.send_message("5527999990001", "Olá"))["success"]
+
+    # Próximo token só em ~1s: falha imediata, sem consumir a cota
+    start = time.monotonic()
+    result = await service.send_message("5527999990001", "Olá")
+    assert not result["success"]
+    assert "limite de taxa" in result["error"]
+    assert time.monotonic() - start < 0.1
+    assert service.rate_limiter._tokens > -0.5
+    assert service.circuit_breaker.snapshot()["failures"] == 0
+    await service.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_dispatch_batch_counts_and_concurrency():
+    """
+    Testa contagem de sucessos/falhas e limite de concorrência do lote
+    """
+    service = WhatsAppService()
+    service.max_concurrency = 3
+    running = 0
+    peak = 0
+
+    async def fake_send(i):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        if i == 7:
+            raise RuntimeError("falha inesperada")
+        return {"success": i % 2 == 0}
+
+    result = await service.dispatch_batch(fake_send(i) for i in range(10))
+
+    assert result["total"] == 10
+    assert result["sent"] == 5
+    assert result["failed"] == 5
+    assert peak == 3
+
+
+@pytest.mark.asyncio
+async def test_send_message_reuses_shared_client():
+    """
+    Testa que os envios reutilizam o mesmo cliente HTTP com timeouts separados
+    """
+    service = WhatsAppService()
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={"messages": [{"id": "wamid.1"}]})
+
+    await service.startup()
+    assert service.client.timeout.connect == settings.WHATSAPP_CONNECT_TIMEOUT
+    assert service.client.timeout.read == settings.WHATSAPP_READ_TIMEOUT
+    await service.shutdown()
+
+    # Cliente criado sob demanda antes do startup não é substituído
+    lazy = service.client
+    await service.startup()
+    assert service.client is lazy
+    await service.shutdown()
+
+    service._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    client = service.client
+
+    first = await service.send_message("+55 (27) 99999-0001", "Olá")
+    second = await service.send_message("5527999990002", "Olá")
+
+    assert first["success"] and second["success"]
+    assert service.client is client
+    assert json.loads(requests[0].content)["to"] == "5527999990001"
+
+    await service.shutdown()
+    assert service._client is None
+
+
+@pytest.mark.asyncio
+async def test_send_message_retries_and_honours_retry_after(monkeypatch):
+    """
+    Testa novas tentativas em 429/5xx respeitando o Retry-After
+    """
+    service = WhatsAppService()
+    responses = [
+        httpx.Response(429, headers={"Retry-After": "0.05"}),
+        httpx.Response(503),
+        httpx.Response(200, json={"messages": []}),
+    ]
+    service._client = httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda request: responses.pop(0))
+    )
+    delays = []
+    original_delay = service._retry_delay
+
+    def recording_delay(attempt, retry_after=None):
+        delay = original_delay(attempt, retry_after)
+        delays.append(delay)
+        return delay
+
+    monkeypatch.setattr(service, "_retry_delay", recording_delay)
+
+    result = await service.send_message("5527999990001", "Olá")
+
+    assert result["success"]
+    assert delays[0] == 0.05
+    assert delays[1] <= settings.WHATSAPP_RETRY_BASE_DELAY * 2
+    assert service.stats()["retries"] == 2
+    assert service.stats()["circuit_breaker"]["state"] == "closed"
+    await service.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_opens_and_probes(monkeypatch):
+    """
+    Testa que o circuito abre após falhas seguidas, rejeita chamadas e fecha após sondagem bem-sucedida
+    """
+    monkeypatch.setattr(settings, "WHATSAPP_MAX_RETRIES", 0)
+    service = WhatsAppService()
+    service.circuit_breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=0.05)
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(500 if len(calls) <= 2 else 200, json={})
+
+    service._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    assert not (await service.send_message("5527999990001", "Olá"))["success"]
+    assert not (await service.send_message("5527999990001", "Olá"))["success"]
+    assert service.circuit_breaker.state == CircuitBreaker.OPEN
+
+    # Circuito aberto: falha sem chamar o provedor
+    rejected = await service.send_message("5527999990001", "Olá")
+    assert "Circuito aberto" in rejected["error"]
+    assert len(calls) == 2
+
+    await asyncio.sleep(0.06)
+    assert (await service.send_message("5527999990001", "Olá"))["success"]
+    assert service.circuit_breaker.snapshot()["state"] == "closed"
+    assert service.circuit_breaker.snapshot()["rejected"] == 1
+    await service.shutdown()
@@ -1,13 +1,15 @@
 import { useEffect, useState } from 'react'
 import { ShoppingCart, CheckCircle, Clock, TrendingUp } from 'lucide-react'
-import { Order } from '../types'
+import { Order, StatsSummary } from '../types'
 import { orderService } from '../services/orders'
+import { statsService } from '../services/stats'
 import StatCard from '../components/StatCard'
 import OrderCard from '../components/OrderCard'
 import Loading from '../components/Loading'
 
 const Dashboard = () => {
   const [orders, setOrders] = useState<Order[]>([])
+  const [summary, setSummary] = useState<StatsSummary | null>(null)
   const [isLoading, setIsLoading] = useState(true)
 
   useEffect(() => {
@@ -16,8 +18,12 @@ const Dashboard = () => {
 
   const loadOrders = async () => {
     try {
-      const data = await orderService.getAll(0, 10)
+      const [data, stats] = await Promise.all([
+        orderService.getAll(0, 6),
+        statsService.getSummary(),
+      ])
       setOrders(data)
+      setSummary(stats)
     } catch (error) {
       console.error('Erro ao carregar pedidos:', error)
     } finally {
@@ -46,10 +52,10 @@ const Dashboard = () => {
   if (isLoading) return <Loading />
 
   const stats = {
-    total: orders.length,
-    novo: orders.filter((o) => o.status === 'novo').length,
-    em_entrega: orders.filter((o) => o.status === 'em_entrega').length,
-    concluido: orders.filter((o) => o.status === 'concluido').length,
+    total: summary?.total_orders ?? 0,
+    novo: summary?.orders_by_status.novo ?? 0,
+    em_entrega: summary?.orders_by_status.em_entrega ?? 0,
+    concluido: summary?.orders_by_status.concluido ?? 0,
   }
 
   return (
@@ -2,6 +2,11 @@ import axios, { AxiosError, InternalAxiosRequestConfig } from 'axios'
 
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000/api/v1'
 
+// Após uma escrita, as leituras vão ao banco primário por alguns segundos
+// (as réplicas podem ainda não ter recebido a alteração)
+const READ_PRIMARY_WINDOW_MS = 5000
+let lastWriteAt = 0
+
 export const api = axios.create({
   baseURL: API_URL,
   headers: {
@@ -16,6 +21,13 @@ api.interceptors.request.use(
     if (token && config.headers) {
       config.headers.Authorization = `Bearer ${token}`
     }
+    
+    const method = (config.method || 'get').toLowerCase()
+    if (method !== 'get') {
+      lastWriteAt = Date.now()
+    } else if (Date.now() - lastWriteAt < READ_PRIMARY_WINDOW_MS && config.headers) {
+      config.headers['X-Read-Primary'] = '1'
+    }
     return config
   },
   (error: AxiosError) => {
@@ -0,0 +1,9 @@
+import { api } from './api'
+import { StatsSummary } from '../types'
+
+export const statsService = {
+  async getSummary(): Promise<StatsSummary> {
+    const { data } = await api.get<StatsSummary>('/stats/summary')
+    return data
+  },
+}
@@ -110,4 +110,20 @@ export interface OrderCreate {
 export interface OrderUpdate {
   status?: 'novo' | 'em_entrega' | 'concluido' | 'cancelado'
   notes?: string
-}
\ No newline at end of file
+}
+
+// Estatísticas do dashboard
+export interface StatsSummary {
+  total_orders: number
+  orders_by_status: Record<'novo' | 'em_entrega' | 'concluido' | 'cancelado', number>
+  today: {
+    date: string
+    orders: number
+    revenue: number
+  }
+  low_stock_products: {
+    id: number
+    name: string
+    stock_quantity: number
+  }[]
+}